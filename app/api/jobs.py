@@ -0,0 +1,120 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.services.job_queue import job_queue, job_kind, FINISHED
+from app.services.metrics import span, label_request
+from app.services.ocr_service import PDF_DPI
+
+router = APIRouter()
+
+LANGUAGES = ["en"]
+VIDEO_FRAME_SKIP = 15
+STREAM_POLL_S = 0.5
+STREAM_FORMATS = ("ndjson", "sse")
+
+
+def _job_status(job):
+    return {
+        "job_id": job["id"],
+        "filename": job["filename"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "units_done": job["units_done"],
+        "total_units": job["total_units"],
+        "last_unit": job["last_unit"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+def _get_job(job_id: str):
+    job = job_queue.store.get(job_id) if job_queue.store is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@router.post("", name="Submit OCR Job", status_code=202)
+async def submit_job(
+    file: UploadFile = File(...),
+    dpi: Optional[int] = None,
+    use_text_layer: bool = True,
+    frame_skip: int = VIDEO_FRAME_SKIP,
+):
+    """
+    Queue an image, PDF or video for background EasyOCR and return its job ID
+    immediately. Poll ``GET /jobs/{id}`` or follow ``GET /jobs/{id}/stream``.
+    """
+    suffix = Path(file.filename).suffix.lower()
+    kind = job_kind(suffix)
+    if kind is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
+    if frame_skip < 1:
+        raise HTTPException(status_code=400, detail="frame_skip must be >= 1")
+    params = {"languages": LANGUAGES}
+    if kind == "pdf":
+        params.update(dpi=dpi or PDF_DPI, use_text_layer=use_text_layer)
+    elif kind == "video":
+        params.update(frame_skip=frame_skip)
+
+    label_request(input_type=kind)
+    with span("upload_read"):
+        data = await file.read()
+    job_id = await asyncio.to_thread(job_queue.submit, data, file.filename, kind, suffix, params)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/{job_id}", name="OCR Job Status")
+async def job_status(job_id: str, include_results: bool = True, after: int = -1):
+    """
+    Status and progress of a job, plus the results of the pages/frames
+    completed so far (only those after sequence number ``after``).
+    """
+    job = await asyncio.to_thread(_get_job, job_id)
+    response = _job_status(job)
+    if include_results:
+        units = await asyncio.to_thread(job_queue.store.units, job_id, after, 1_000_000)
+        response["units"] = units
+        response["results"] = [row for unit in units for row in unit["rows"]]
+    return response
+
+
+@router.get("/{job_id}/stream", name="Stream OCR Job Results")
+async def stream_job(job_id: str, format: str = "ndjson", after: int = -1):
+    """
+    Stream per-page/per-frame results as they complete, as NDJSON (one unit
+    per line) or server-sent events; ends with a final status record once
+    the job is done or failed. ``after`` resumes a dropped stream.
+    """
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    await asyncio.to_thread(_get_job, job_id)
+
+    def encode(event, payload):
+        if format == "sse":
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({"event": event, **payload}) + "\n"
+
+    async def events():
+        last_seq = after
+        while True:
+            job = await asyncio.to_thread(job_queue.store.get, job_id)
+            units = await asyncio.to_thread(job_queue.store.units, job_id, last_seq)
+            for unit in units:
+                last_seq = unit["seq"]
+                yield encode("unit", unit)
+            if job is None or (job["status"] in FINISHED and not units):
+                yield encode("status", _job_status(job) if job else {"job_id": job_id, "status": "deleted"})
+                return
+            if not units:
+                await asyncio.sleep(STREAM_POLL_S)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
@@ -1,35 +1,180 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException,Form
 from pathlib import Path
-import tempfile
-import re
-from app.services.ocr_service import extract_text_from_image, extract_text_from_video, extract_text_from_pdf
+from typing import Optional
+from app.services.ocr_service import extract_text_from_image, extract_text_from_video, extract_text_from_pdf, PDF_DPI
+from app.services.executor import run_in_engine, EngineBusyError
+from app.services.deadlines import RequestCancelled
+from app.services.result_cache import result_cache, make_key
+from app.services.resolution import validate_scale
+from app.services.ingest import IMAGE_EXTS, VIDEO_EXTS, PDF_EXTS, temp_path
+from app.services.cascade import cascade_image, cascade_pdf, parse_tiers, CASCADE_TIERS
+from app.services.engine_registry import registry
+from app.services.serialization import FastJSONResponse, to_columnar
+from app.services.metrics import span, label_request
+from app.services.verify_service import verify_upload, verify_units, units_from_results
+from app.services.templates import extract_template_fields, TEMPLATES
 
 router = APIRouter(prefix="/ocr", tags=["OCR"])
 
+LANGUAGES = ["en"]
+VIDEO_FRAME_SKIP = 15
+RESULT_FORMATS = ("rows", "columnar")
+# Engine tiers for cascade mode, limited to the engines this process serves
+CASCADE = parse_tiers(CASCADE_TIERS, enabled=registry.enabled)
+# How each verify-ocr field is matched (see field_matcher)
+VERIFY_FIELD_KINDS = {"name": "text", "dob": "date", "Pan": "id"}
+
+
+def _easyocr_request(
+    data: bytes,
+    suffix: str,
+    dpi: Optional[int] = None,
+    use_text_layer: bool = True,
+    video_mode: str = "frames",
+    scale: Optional[float] = None,
+    tile: Optional[bool] = None,
+):
+    """Input kind, engine parameters and result cache key for an EasyOCR upload."""
+    if suffix in IMAGE_EXTS:
+        kind, params = "image", {"scale": scale, "tile": tile}
+    elif suffix in VIDEO_EXTS:
+        if video_mode not in ("frames", "spans"):
+            raise HTTPException(status_code=400, detail=f"Unsupported video_mode: {video_mode}")
+        kind, params = "video", {"frame_skip": VIDEO_FRAME_SKIP, "mode": video_mode}
+    elif suffix in PDF_EXTS:
+        kind, params = "pdf", {"dpi": dpi or PDF_DPI, "use_text_layer": use_text_layer, "tile": tile}
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
+    label_request(input_type=kind)
+    return kind, params, make_key(data, "easyocr", kind=kind, languages=LANGUAGES, **params)
+
+
+async def _run_easyocr(
+    data: bytes,
+    suffix: str,
+    dpi: Optional[int] = None,
+    use_text_layer: bool = True,
+    video_mode: str = "frames",
+    scale: Optional[float] = None,
+    tile: Optional[bool] = None,
+):
+    """
+    OCR an upload with EasyOCR, answering from the result cache when the same
+    bytes were already processed with the same settings.
+    """
+    kind, params, key = _easyocr_request(data, suffix, dpi, use_text_layer, video_mode, scale, tile)
+
+    async def compute():
+        if kind == "image":
+            # Decoded from memory on the worker, no temp file
+            return await run_in_engine("easyocr", extract_text_from_image, data, languages=LANGUAGES, **params)
+        # cv2.VideoCapture and the PDF process pool need a real path; removed once OCR is done
+        with temp_path(data, suffix) as path:
+            if kind == "video":
+                return await run_in_engine("easyocr", extract_text_from_video, path, languages=LANGUAGES, **params)
+            return await run_in_engine("easyocr", extract_text_from_pdf, path, languages=LANGUAGES, **params)
+
+    return await result_cache.get_or_compute(key, compute)
+
+
+async def _run_cascade(data: bytes, suffix: str, min_confidence: Optional[float] = None, use_text_layer: bool = True):
+    """Cheapest engine first, escalating only low-confidence regions (see services.cascade)."""
+    if suffix in IMAGE_EXTS:
+        kind = "image"
+    elif suffix in PDF_EXTS:
+        kind = "pdf"
+    else:
+        raise HTTPException(status_code=400, detail=f"Cascade mode supports images and PDFs, not {suffix}")
+    label_request(input_type=kind)
+
+    async def compute():
+        if kind == "image":
+            return await cascade_image(data, CASCADE, min_confidence)
+        return await cascade_pdf(data, CASCADE, min_confidence, use_text_layer=use_text_layer)
+
+    key = make_key(data, "cascade", kind=kind, tiers=CASCADE, min_confidence=min_confidence,
+                   use_text_layer=use_text_layer)
+    return await result_cache.get_or_compute(key, compute)
+
+
+async def _run_template(data: bytes, template: str):
+    """Template field OCR of a card image with EasyOCR, through the result cache."""
+    if template != "auto" and template not in TEMPLATES:
+        raise HTTPException(status_code=400, detail=f"Unknown template: {template} (known: auto, {', '.join(TEMPLATES)})")
+
+    async def compute():
+        return await run_in_engine("easyocr", extract_template_fields, data, template=template, languages=LANGUAGES)
+
+    key = make_key(data, "easyocr", kind="template", template=template, languages=LANGUAGES)
+    return await result_cache.get_or_compute(key, compute)
+
+
 @router.post("/", name="Perform OCR (Image or Video)")
-async def perform_ocr(file: UploadFile = File(...)):
+async def perform_ocr(
+    file: UploadFile = File(...),
+    dpi: Optional[int] = None,
+    use_text_layer: bool = True,
+    video_mode: str = "frames",
+    scale: Optional[float] = None,
+    tile: Optional[bool] = None,
+    format: str = "rows",
+    cascade: bool = False,
+    min_confidence: Optional[float] = None,
+):
     """
     Perform OCR on uploaded image or video.
+    ``dpi`` sets the PDF render resolution (default OCR_PDF_DPI); PDF pages with
+    an embedded text layer are read directly unless ``use_text_layer`` is false.
+    ``video_mode=spans`` returns deduplicated text spans with first/last frame
+    instead of one row per frame.
+    Images are rescaled to EasyOCR's preferred text height; ``scale`` overrides
+    the automatic factor. Bounding boxes are always in original image coordinates.
+    ``tile=true`` reads large images/PDF pages as overlapping tiles in parallel
+    (``false`` never tiles; unset tiles above OCR_TILE_AUTO_PX).
+    ``format=columnar`` returns ``results`` as parallel arrays (text, confidence,
+    flattened bbox) instead of one object per box.
+    ``cascade=true`` reads images/PDFs with the cheapest engine first and only
+    re-reads regions below ``min_confidence`` (0-1) with heavier engines; each
+    row records the ``tier``/``engine`` that produced it.
+    PDFs and videos stop at the next page/frame once the request deadline
+    (``X-Request-Timeout`` header, seconds) passes; the partial result is
+    flagged ``truncated``.
     """
     try:
-        # Save temporarily
+        if format not in RESULT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+        try:
+            validate_scale(scale)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid scale parameter: {e}")
         suffix = Path(file.filename).suffix.lower()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
-
-        if suffix in [".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"]:
-            results = extract_text_from_image(tmp_path)
-        elif suffix in [".mp4", ".mov", ".avi", ".mkv"]:
-            results = extract_text_from_video(tmp_path, frame_skip=15)
-        elif suffix in [".pdf"]:
-            results = extract_text_from_pdf(tmp_path)
+        with span("upload_read"):
+            data = await file.read()
+        if cascade:
+            results = await _run_cascade(data, suffix, min_confidence, use_text_layer)
         else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
+            results = await _run_easyocr(
+                data, suffix, dpi=dpi, use_text_layer=use_text_layer, video_mode=video_mode,
+                scale=scale, tile=tile,
+            )
 
         # Always extract the list of results from the dict if needed
+        pages = None
+        video_stats = None
+        resolution = None
+        tiers = None
+        tiling = None
+        truncated = None
+        errors = None
         if isinstance(results, dict):
             result_list = results.get("results", [])
+            pages = results.get("pages")
+            video_stats = results.get("stats")
+            resolution = results.get("resolution")
+            tiers = results.get("tiers")
+            tiling = results.get("tiling")
+            truncated = results.get("truncated")
+            errors = results.get("errors")
         else:
             result_list = results
 
@@ -37,96 +182,156 @@ async def perform_ocr(file: UploadFile = File(...)):
             [item.get("text", "") for item in result_list if isinstance(item, dict) and item.get("text")]
         ).strip()
 
-        return {
+        response = {
             "filename": file.filename,
             "total_items": len(result_list),
-            "results": result_list,
+            "results": to_columnar(result_list) if format == "columnar" else result_list,
             "full_text": full_text
         }
+        if pages is not None:
+            # Which path (text_layer / ocr / error) each PDF page took
+            response["pages"] = pages
+        if video_stats is not None:
+            response["video_stats"] = video_stats
+        if resolution is not None:
+            response["resolution"] = resolution
+        if tiling is not None:
+            response["tiling"] = tiling
+        if truncated:
+            # Deadline passed: partial result, ``skipped`` pages/frames were not read
+            response["truncated"] = truncated
+        if errors:
+            # Pages that failed to render; such results are not cached
+            response["errors"] = errors
+        if cascade:
+            # Highest tier any row needed, and what each tier cost
+            response["tier"] = results.get("tier")
+            if tiers is not None:
+                response["tiers"] = tiers
+        # Returned directly: skips jsonable_encoder's walk over every box
+        return FastJSONResponse(response)
 
+    except (HTTPException, EngineBusyError, RequestCancelled):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
 
 
+@router.post("/template", name="Template Field OCR")
+async def template_ocr(file: UploadFile = File(...), template: str = "auto"):
+    """
+    Read a PAN / Aadhaar / driving licence card by its layout: the card is
+    aligned to the ``template`` (``auto`` detects the layout) and only the
+    field regions are recognized. Returns structured fields with normalized
+    values (ISO dates, validated IDs) instead of full-text OCR.
+    """
+    try:
+        suffix = Path(file.filename).suffix.lower()
+        if suffix not in IMAGE_EXTS:
+            raise HTTPException(status_code=400, detail="Template OCR supports images only.")
+        label_request(input_type="image")
+        with span("upload_read"):
+            data = await file.read()
+        result = await _run_template(data, template)
+        if not result["aligned"]:
+            raise HTTPException(status_code=422, detail="Could not locate a card to align to a template.")
+        return {
+            "filename": file.filename,
+            "template": result["template"],
+            "alignment": result["alignment"],
+            "fields": {name: field["value"] for name, field in result["fields"].items()},
+            "field_details": result["fields"],
+            "pixels_recognized": result["pixels_recognized"],
+            "time_taken": result["time_taken"],
+        }
+
+    except (HTTPException, EngineBusyError, RequestCancelled):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Template OCR failed: {str(e)}")
+
+
 @router.post("/verify-ocr", name="Perform OCR and Verify Name/DOB")
 async def verify_ocr(
     file: UploadFile = File(...),
     name: str = Form(...),
     dob: str = Form(...),
-    Pan:str = Form(...)
+    Pan:str = Form(...),
+    max_units: Optional[int] = Form(None),
+    max_ms: Optional[float] = Form(None),
+    template: Optional[str] = Form(None),
 ):
     """
     Perform OCR on uploaded image/video/PDF and check if provided name and DOB exist in extracted text.
+    Pages/frames are checked as they are recognized and OCR stops as soon as every
+    field is found, or after ``max_units`` pages/frames / ``max_ms`` milliseconds.
+    Fields are matched tolerantly: OCR-confusable characters (0/O, 1/l, ...),
+    dropped spaces, hyphenated names and any common date layout still match.
+    The page or frame, score and text span of each match are reported.
+    With ``template`` (PAN / Aadhaar / Driving_License / auto) a card image is
+    read by its layout, recognizing only the field regions; uploads that
+    cannot be aligned fall back to full OCR.
     """
     try:
-        # Save temporarily
         suffix = Path(file.filename).suffix.lower()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
-
-        # Determine type and extract text
-        if suffix in [".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"]:
-            results = extract_text_from_image(tmp_path)
-        elif suffix in [".mp4", ".mov", ".avi", ".mkv"]:
-            results = extract_text_from_video(tmp_path, frame_skip=15)
-        elif suffix in [".pdf"]:
-            results = extract_text_from_pdf(tmp_path)
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
-
-        # # Combine all recognized text
-        # full_text = " ".join(
-        #     [item.get("text", "") for item in results if item.get("text")]
-        # ).strip().lower()
+        with span("upload_read"):
+            data = await file.read()
+        fields = {"name": name, "dob": dob, "Pan": Pan}
+        kind, _params, key = _easyocr_request(data, suffix)
 
-        # # Normalize and check presence
-        # name_present = name.lower() in full_text
-        # dob_present = dob.lower() in full_text
-        # Pan_present = Pan.lower() in full_text
+        templated = None
+        if template and kind == "image":
+            templated = await _run_template(data, template)
+            if not templated["aligned"]:
+                templated = None
 
-
-
-        # Always extract the list of results from the dict if needed
-        if isinstance(results, dict):
-            result_list = results.get("results", [])
-            time_taken = results.get("time_taken")
+        # Reuse a full /ocr/ result for the same bytes when there is one
+        cached = await result_cache.aget(key) if templated is None else None
+        if templated is not None:
+            unit = {"unit": "image", "index": 1, "rows": templated["results"]}
+            result = verify_units([unit], fields, kinds=VERIFY_FIELD_KINDS, max_units=max_units, max_ms=max_ms)
+            source = "template"
+        elif cached is not None:
+            result = verify_units(units_from_results(cached.get("results", [])), fields,
+                                  kinds=VERIFY_FIELD_KINDS, max_units=max_units, max_ms=max_ms)
+            source = "cache"
+        elif kind == "video":
+            # cv2.VideoCapture needs a real path; removed once verification stops
+            with temp_path(data, suffix) as path:
+                result = await run_in_engine(
+                    "easyocr", verify_upload, path, kind, fields, kinds=VERIFY_FIELD_KINDS, languages=LANGUAGES,
+                    frame_skip=VIDEO_FRAME_SKIP, max_units=max_units, max_ms=max_ms,
+                )
+            source = "ocr"
         else:
-            result_list = results
-            time_taken = None
-
-        full_text = " ".join(
-            [item.get("text", "") for item in result_list if isinstance(item, dict) and item.get("text")]
-        ).strip().lower()
-
-
-        def exact_phrase(text, phrase):
-            if not phrase:
-                return False
-            phrase = phrase.lower().strip()
-            # \b → ensures exact full-word boundary (no partial matches)
-            pattern = r"\b" + re.escape(phrase) + r"\b"
-            return re.search(pattern, text) is not None
-
+            result = await run_in_engine(
+                "easyocr", verify_upload, data, kind, fields, kinds=VERIFY_FIELD_KINDS, languages=LANGUAGES,
+                max_units=max_units, max_ms=max_ms,
+            )
+            source = "ocr"
 
-        # Exact match checks
-        name_present = exact_phrase(full_text, name)
-        dob_present = exact_phrase(full_text, dob)
-        Pan_present = exact_phrase(full_text, Pan)
+        matches = result["matches"]
+        name_present = matches["name"]["found"]
+        dob_present = matches["dob"]["found"]
+        Pan_present = matches["Pan"]["found"]
 
         verification_status = "verified" if (name_present and dob_present and Pan_present) else "not_verified"
 
         return {
-            # "filename": file.filename,
-            # "total_items": len(results),
-            # "results": results,
-            "full_text": full_text,
+            "full_text": result["full_text"],
             "name_found": name_present,
             "dob_found": dob_present,
             "Pan_found": Pan_present,
             "status": verification_status,
-            "time_taken": time_taken
+            "matches": matches,
+            "units_processed": result["units_processed"],
+            "stopped": result["stopped"],
+            "errors": result.get("errors"),
+            "source": source,
+            "time_taken": result["time_taken"]
         }
 
+    except (HTTPException, EngineBusyError, RequestCancelled):
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"OCR verification failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"OCR verification failed: {str(e)}")
@@ -1,36 +1,32 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException
 from pathlib import Path
-import tempfile
-import shutil
-import re
+from typing import Optional
 
-from app.services.paddleocr_service import paddle_ocr_and_annotate, ocr  # Import preloaded OCR
+from app.services.paddleocr_service import paddle_ocr_and_annotate  # Uses the shared (preloaded) model
+from app.services.resolution import validate_scale
+from app.services.executor import run_in_engine, EngineBusyError
+from app.services.deadlines import RequestCancelled
+from app.services.result_cache import result_cache, make_key
+from app.services.document_ids import analyze_document
+from app.services.metrics import span, label_request
+from app.services.templates import extract_template_fields, TEMPLATES
 
 router = APIRouter(prefix="/paddleocr", tags=["PaddleOCR"])
 
-# Document ID regex patterns
-DOCUMENT_PATTERNS = {
-    "PAN": r"[A-Z]{5}[0-9]{4}[A-Z]{1}",
-    "Aadhaar": r"\b\d{4}\s?\d{4}\s?\d{4}\b",
-    "Driving_License": r"[A-Z]{2}[-\s]?\d{2}[-\s]?\d{4}[-\s]?\d{7}",
-    "Passport": r"\b[A-Z]\d{7}\b",
-    "UDYAM": r"UDYAM-[A-Z]{2}-\d{2}-\d{7}"
-}
-
-def extract_document_ids(text: str):
-    """Extract document IDs from text using regex patterns"""
-    found_documents = {}
-    
-    for doc_type, pattern in DOCUMENT_PATTERNS.items():
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            # Remove duplicates and clean up
-            found_documents[doc_type] = list(set(matches))
-    
-    return found_documents
-
 @router.post("/predict", name="PaddleOCR Fast Predict")
-async def paddleocr_predict(file: UploadFile = File(...)):
+async def paddleocr_predict(
+    file: UploadFile = File(...),
+    scale: Optional[float] = None,
+    tile: Optional[bool] = None,
+    template: Optional[str] = None,
+):
+    """
+    ``scale`` overrides the automatic text-height normalization factor;
+    ``tile`` reads large images as overlapping tiles (unset: automatic).
+    ``template`` (PAN / Aadhaar / Driving_License / auto) aligns the card to
+    its layout and recognizes only the field regions, returning ``fields``;
+    images that cannot be aligned fall back to the full predict.
+    """
     try:
         suffix = Path(file.filename).suffix.lower()
         allowed_exts = {".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".webp"}
@@ -38,26 +34,66 @@ async def paddleocr_predict(file: UploadFile = File(...)):
         if suffix not in allowed_exts:
             raise HTTPException(status_code=400, detail="Only image files are supported for PaddleOCR.")
 
-        # Fast temp save (no memory read)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            tmp_path = tmp.name
+        if template and template != "auto" and template not in TEMPLATES:
+            raise HTTPException(status_code=400, detail=f"Unknown template: {template}")
+        try:
+            validate_scale(scale)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid scale parameter: {e}")
+
+        label_request(input_type="image")
+        with span("upload_read"):
+            data = await file.read()
+
+        if template:
+            async def compute_template():
+                return await run_in_engine("paddleocr", extract_template_fields, data, template=template,
+                                           engine="paddleocr")
+
+            key = make_key(data, "paddleocr", lang="en", kind="template", template=template)
+            templated = await result_cache.get_or_compute(key, compute_template)
+            if templated["aligned"]:
+                texts = [field["value"] for field in templated["fields"].values() if field["value"]]
+                raw_text = " ".join(texts)
+                analysis = analyze_document(raw_text)
+                return {
+                    "filename": file.filename,
+                    "texts": texts,
+                    "raw_text": raw_text,
+                    "document_ids": analysis["document_ids"],
+                    "document_type": templated["template"],
+                    "document_types": analysis["document_types"],
+                    "template": templated["template"],
+                    "alignment": templated["alignment"],
+                    "fields": {name: field["value"] for name, field in templated["fields"].items()},
+                    "field_details": templated["fields"],
+                    "execution_time": templated["time_taken"]
+                }
+
+        async def compute():
+            # Run FAST OCR with preloaded model; the upload is decoded in memory
+            return await run_in_engine("paddleocr", paddle_ocr_and_annotate, data, lang="en", scale=scale, tile=tile)
 
-        # Run FAST OCR with preloaded model
-        result = paddle_ocr_and_annotate(tmp_path, ocr=ocr)
+        key = make_key(data, "paddleocr", lang="en", kind="image", scale=scale, tile=tile)
+        result = await result_cache.get_or_compute(key, compute)
         
-        # Extract document IDs from OCR text
+        # Extract validated document IDs and rank the document type
         raw_text = result["raw_text"]
-        document_ids = extract_document_ids(raw_text)
+        analysis = analyze_document(raw_text)
 
         return {
             "filename": file.filename,
             "texts": result["texts"],
             "raw_text": raw_text,
-            "document_ids": document_ids,
-            "document_type": list(document_ids.keys())[0] if document_ids else None,
+            "document_ids": analysis["document_ids"],
+            "document_type": analysis["document_type"],
+            "document_types": analysis["document_types"],
+            "resolution": result.get("resolution"),
+            "tiling": result.get("tiling"),
             "execution_time": result["execution_time"]
         }
 
+    except (HTTPException, EngineBusyError, RequestCancelled):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PaddleOCR failed: {str(e)}")
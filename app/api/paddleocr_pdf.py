@@ -1,85 +1,91 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException
 from pathlib import Path
-import tempfile
-import fitz  # PyMuPDF
+from typing import Optional
 import os
-import re
-from app.services.paddleocr_service import paddle_ocr_and_annotate, ocr  # Use shared OCR instance
+from app.services.paddleocr_service import paddle_ocr_pdf  # Uses the shared (preloaded) model
+from app.services.pdf_service import parse_page_range
+from app.services.executor import run_in_engine, EngineBusyError
+from app.services.deadlines import RequestCancelled
+from app.services.result_cache import result_cache, make_key
+from app.services.serialization import FastJSONResponse
+from app.services.document_ids import scan_document_ids, group_document_ids, analyze_document
+from app.services.metrics import span, label_request
 
 router = APIRouter(prefix="/paddleocr", tags=["PaddleOCR"])
 
-# Document ID regex patterns
-DOCUMENT_PATTERNS = {
-    "PAN": r"[A-Z]{5}[0-9]{4}[A-Z]{1}",
-    "Aadhaar": r"\b\d{4}\s?\d{4}\s?\d{4}\b",
-    "Driving_License": r"[A-Z]{2}[-\s]?\d{2}[-\s]?\d{4}[-\s]?\d{7}",
-    "Passport": r"\b[A-Z]\d{7}\b",
-    "UDYAM": r"UDYAM-[A-Z]{2}-\d{2}-\d{7}"
-}
-
-def extract_document_ids(text: str):
-    """Extract document IDs from text using regex patterns"""
-    found_documents = {}
-    
-    for doc_type, pattern in DOCUMENT_PATTERNS.items():
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        if matches:
-            # Remove duplicates and clean up
-            found_documents[doc_type] = list(set(matches))
-    
-    return found_documents
+# Rendered pages allowed to wait for OCR at once (bounds memory on long PDFs)
+PAGES_IN_FLIGHT = int(os.getenv("PADDLE_PDF_PAGES_IN_FLIGHT", "2"))
 
 @router.post("/pdf", name="PaddleOCR PDF Predict and Annotate")
-async def paddleocr_pdf_predict(file: UploadFile = File(...)):
+async def paddleocr_pdf_predict(
+    file: UploadFile = File(...),
+    pages: Optional[str] = None,
+    dpi: Optional[int] = None,
+    use_text_layer: bool = True,
+    tile: Optional[bool] = None,
+):
+    """
+    OCR all pages of a PDF, or the ``pages`` selection (e.g. "1-3,5").
+    Pages are rendered and recognized in a pipeline (born-digital pages are read
+    from their text layer without OCR); per-page results, the path each page took,
+    document IDs aggregated across pages and per-stage timings are returned.
+    Without ``dpi`` each page is rendered at the DPI that puts its text at
+    PaddleOCR's preferred height (reported per page). ``tile`` reads large
+    pages as overlapping tiles (unset: automatic above OCR_TILE_AUTO_PX).
+    """
     try:
         suffix = Path(file.filename).suffix.lower()
         if suffix != ".pdf":
             raise HTTPException(status_code=400, detail="Only PDF files are supported for this endpoint.")
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
-        print(f"[PaddleOCR] Converting PDF to images: {tmp_path}")
-        
-        # Use PyMuPDF to convert PDF to image (no poppler needed)
-        pdf_document = fitz.open(tmp_path)
-        print(f"[PaddleOCR] Processing first page only.")
-        results = []
-        annotated_paths = []
-        import time
-        
-        # Process only the first page
-        page = pdf_document[0]
-        pix = page.get_pixmap(dpi=120)
-        img_path = tmp_path + f"_page_1.png"
-        pix.save(img_path)
-        pdf_document.close()
-        print(f"[PaddleOCR] Processing page 1 -> {img_path}")
-        t0 = time.time()
         try:
-            # Use the global OCR object
-            result = paddle_ocr_and_annotate(img_path, ocr=ocr)
-            results.append(result['texts'])
-            annotated_paths.append(result['annotated_path'])
-            print(f"[PaddleOCR] Page 1 done in {time.time() - t0:.2f} seconds.")
-        except Exception as page_e:
-            print(f"[PaddleOCR] Error processing page 1: {page_e}")
-            results.append([f"Error processing page 1: {page_e}"])
-            annotated_paths.append(None)
-        
-        # Extract document IDs from OCR text
-        raw_text = result.get('raw_text', ' '.join(results[0]) if results else '')
-        document_ids = extract_document_ids(raw_text)
-        
-        return {
+            page_selection = parse_page_range(pages)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid pages parameter: {e}")
+        label_request(input_type="pdf")
+        with span("upload_read"):
+            data = await file.read()
+
+        async def compute():
+            return await run_in_engine(
+                "paddleocr", paddle_ocr_pdf, data,
+                pages=page_selection, dpi=dpi, max_in_flight=PAGES_IN_FLIGHT, lang="en",
+                use_text_layer=use_text_layer, tile=tile,
+            )
+
+        key = make_key(data, "paddleocr", lang="en", kind="pdf", dpi=dpi, pages=page_selection,
+                       text_layer=use_text_layer, tile=tile)
+        result = await result_cache.get_or_compute(key, compute)
+
+        # Extract document IDs per page and across the whole document
+        page_results = []
+        matches = []
+        for page in result["pages"]:
+            page_matches = scan_document_ids(page["raw_text"])
+            matches.extend(page_matches)
+            page_results.append({**page, "document_ids": group_document_ids(page_matches)})
+
+        raw_text = " ".join(page["raw_text"] for page in result["pages"] if page["raw_text"])
+        analysis = analyze_document(raw_text, matches=matches)
+
+        return FastJSONResponse({
             "filename": file.filename,
-            "pages": 1,
-            "texts": results,
+            "pages": len(page_results),
+            "texts": [page["texts"] for page in page_results],
             "raw_text": raw_text,
-            "document_ids": document_ids,
-            "document_type": list(document_ids.keys())[0] if document_ids else None,
-            "annotated_image_paths": annotated_paths,
-            "execution_time": result['execution_time']
-        }
+            "document_ids": analysis["document_ids"],
+            "document_type": analysis["document_type"],
+            "document_types": analysis["document_types"],
+            "page_results": page_results,
+            "text_layer_pages": sum(1 for page in page_results if page["path"] == "text_layer"),
+            "ocr_pages": sum(1 for page in page_results if page["path"] == "ocr"),
+            "annotated_image_paths": [None] * len(page_results),
+            "timing": result["timing"],
+            "truncated": result.get("truncated"),
+            "errors": result.get("errors"),
+            "execution_time": result["timing"]["total_s"]
+        })
+    except (HTTPException, EngineBusyError, RequestCancelled):
+        raise
     except Exception as e:
         import traceback
         print(traceback.format_exc())
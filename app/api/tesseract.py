@@ -1,24 +1,52 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException
-from pathlib import Path
-import tempfile
-from app.services.tesseract_service import tesseract_best_ocr
+from typing import Optional
+from app.services.tesseract_service import tesseract_best_ocr, PSM_MODES
+from app.services.resolution import validate_scale
+from app.services.executor import run_in_engine, EngineBusyError
+from app.services.deadlines import RequestCancelled
+from app.services.result_cache import result_cache, make_key
+from app.services.metrics import span, label_request
 
 router = APIRouter(prefix="/tesseract", tags=["Tesseract OCR"])
 
 @router.post("/tes", name="Perform Tesseract OCR (Best Variant)")
-async def perform_tesseract_ocr(file: UploadFile = File(...)):
+async def perform_tesseract_ocr(
+    file: UploadFile = File(...),
+    min_confidence: Optional[float] = None,
+    max_calls: Optional[int] = None,
+    max_ms: Optional[float] = None,
+    scale: Optional[float] = None,
+):
     """
     Perform high-accuracy Tesseract OCR on uploaded image using multiple preprocessing variants.
+    The search stops early at ``min_confidence`` or when the call/time budget is spent.
+    ``scale`` overrides the automatic text-height normalization factor.
     """
     try:
-        suffix = Path(file.filename).suffix.lower()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(await file.read())
-            tmp_path = tmp.name
-        result = tesseract_best_ocr(tmp_path)
+        try:
+            validate_scale(scale)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid scale parameter: {e}")
+        label_request(input_type="image")
+        with span("upload_read"):
+            data = await file.read()
+
+        async def compute():
+            return await run_in_engine(
+                "tesseract", tesseract_best_ocr, data,
+                min_confidence=min_confidence, max_calls=max_calls, max_ms=max_ms, scale=scale,
+            )
+
+        key = make_key(
+            data, "tesseract", psm=PSM_MODES,
+            min_confidence=min_confidence, max_calls=max_calls, max_ms=max_ms, scale=scale,
+        )
+        result = await result_cache.get_or_compute(key, compute)
         return {
             "filename": file.filename,
             **result
         }
+    except (HTTPException, EngineBusyError, RequestCancelled):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tesseract OCR failed: {str(e)}")
@@ -1,28 +1,113 @@
-from fastapi import FastAPI
-from app.api import tesseract, users,ocr,paddleocr_pdf
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from app.api import users
 from fastapi.middleware.cors import CORSMiddleware
+from app.services.executor import EngineBusyError, shutdown_pools, pool_stats
+from app.services.batcher import batcher_stats
+from app.services.result_cache import result_cache
+from app.services.engine_registry import registry
+from app.services.model_cache import model_cache
+from app.services.serialization import FastJSONResponse
+from app.services.metrics import metrics, MetricsMiddleware, CONTENT_TYPE
+from app.services.deadlines import DeadlineMiddleware, RequestCancelled
 
-from app.api.paddleocr import router as paddleocr_router
 
-app = FastAPI(title="Simple FastAPI App",root_path="/ocr-api" )
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm models in the background: "/" answers immediately,
+    # "/ready" turns green once every configured model is hot.
+    preload = asyncio.create_task(asyncio.to_thread(registry.preload))
+    job_queue = None
+    if registry.is_enabled("easyocr"):
+        from app.services.job_queue import job_queue
+        # Resumes jobs interrupted by the previous shutdown/crash
+        job_queue.start()
+    yield
+    if not preload.done():
+        preload.cancel()
+    if job_queue is not None:
+        job_queue.stop()
+    shutdown_pools(wait=False)
+    ocr_service = sys.modules.get("app.services.ocr_service")
+    if ocr_service is not None:
+        ocr_service.shutdown_pdf_pool()
+
+
+app = FastAPI(title="Simple FastAPI App",root_path="/ocr-api", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  
+    allow_origins=["*"],
     allow_credentials=True,
-    allow_methods=["*"],  
-    allow_headers=["*"],  
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Per-request deadline / disconnect token for the OCR loops
+app.add_middleware(DeadlineMiddleware)
+# Outermost: per-request context for stage spans, request metrics, Server-Timing
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(EngineBusyError)
+async def engine_busy_handler(request: Request, exc: EngineBusyError):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
-# Register routes
+@app.exception_handler(RequestCancelled)
+async def request_cancelled_handler(request: Request, exc: RequestCancelled):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc), "reason": exc.reason})
+
+
+# Register routes (routers of disabled engines are never imported)
 app.include_router(users.router, prefix="/users", tags=["Users"])
-app.include_router(ocr.router, prefix="/ocr", tags=["OCR"])
-app.include_router(tesseract.router, prefix="/tesseract", tags=["Tesseract OCR"])
-app.include_router(paddleocr_router)
-app.include_router(paddleocr_pdf.router, prefix="/paddleocr", tags=["PaddleOCR"])
+if registry.is_enabled("easyocr"):
+    from app.api import ocr, jobs
+    app.include_router(ocr.router, prefix="/ocr", tags=["OCR"])
+    app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+if registry.is_enabled("tesseract"):
+    from app.api import tesseract
+    app.include_router(tesseract.router, prefix="/tesseract", tags=["Tesseract OCR"])
+if registry.is_enabled("paddleocr"):
+    from app.api import paddleocr_pdf
+    from app.api.paddleocr import router as paddleocr_router
+    app.include_router(paddleocr_router)
+    app.include_router(paddleocr_pdf.router, prefix="/paddleocr", tags=["PaddleOCR"])
 # app.include_router(google_ocr.router, prefix="/vision", tags=["Google Vision OCR"])
 
 @app.get("/")
 def root():
     return {"message": "Welcome to FastAPI OCR APIs!"}
+
+
+@app.get("/ready")
+def ready():
+    status = registry.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@app.get("/engines/stats")
+def engine_stats():
+    stats = {"pools": pool_stats(), "batchers": batcher_stats(), "models": model_cache.stats()}
+    job_queue = sys.modules.get("app.services.job_queue")
+    if job_queue is not None:
+        stats["jobs"] = job_queue.job_queue.stats()
+    return stats
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return result_cache.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,158 @@
+"""
+Prefork serving entry point.
+
+Loads the configured OCR models once in a parent process, then forks worker
+processes that share the model weights copy-on-write and all accept on one
+listening socket. A single CPU budget is split across workers, and each
+worker caps the intra-op thread pools of torch, OpenMP/MKL, OpenCV, Paddle
+and Tesseract to its share so workers don't oversubscribe the machine.
+
+    python -m app.serve --workers 8 --cpu-budget 32 --port 8000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+# Env vars read by the native libraries when they initialize their pools
+_THREAD_ENV = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "PADDLE_CPU_THREADS",
+)
+
+
+def thread_budget(cpu_budget: int, workers: int) -> int:
+    """Intra-op threads per worker for a total CPU budget."""
+    return max(1, cpu_budget // max(1, workers))
+
+
+def apply_thread_env(threads: int):
+    """Must run before torch/paddle/cv2 are imported."""
+    for name in _THREAD_ENV:
+        os.environ[name] = str(threads)
+    # Each tesseract call is single-threaded; parallelism comes from running several
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def apply_thread_limits(threads: int):
+    """Cap already-imported libraries' thread pools (runs in each worker)."""
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(max(1, min(2, threads)))
+        except RuntimeError:
+            pass  # only settable before the first parallel op
+    cv2 = sys.modules.get("cv2")
+    if cv2 is not None:
+        cv2.setNumThreads(threads)
+
+
+def _serve_worker(app, sock, threads, args):
+    import uvicorn
+    from app.services.engine_registry import registry
+
+    apply_thread_limits(threads)
+    # Models are already resident (inherited); the worker's lifespan only
+    # re-warms them so its own thread pools are created post-fork.
+    registry.reset()
+    registry.warmup = os.getenv("OCR_WARMUP", "1") != "0"
+    config = uvicorn.Config(app, log_level=args.log_level, lifespan="on", timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _fork_worker(app, sock, threads, args):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _serve_worker(app, sock, threads, args)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefork OCR API server")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("OCR_SERVE_WORKERS", "0")),
+                        help="worker processes (default: cpu budget / threads per worker)")
+    parser.add_argument("--cpu-budget", type=int, default=int(os.getenv("OCR_CPU_BUDGET", str(os.cpu_count() or 1))))
+    parser.add_argument("--threads-per-worker", type=int, default=int(os.getenv("OCR_THREADS_PER_WORKER", "4")))
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--keep-alive", type=int, default=5)
+    args = parser.parse_args()
+
+    workers = args.workers or max(1, args.cpu_budget // max(1, args.threads_per_worker))
+    threads = thread_budget(args.cpu_budget, workers)
+    apply_thread_env(threads)
+
+    from app.main import app
+    from app.services.engine_registry import registry
+
+    # Load weights in the parent without running inference: inference would
+    # start OpenMP/torch worker threads, which do not survive fork().
+    registry.warmup = False
+    registry.preload()
+    # Keep the loaded objects out of GC bookkeeping so refcount/GC writes
+    # don't un-share their pages in the children.
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    print(f"[Serve] {workers} workers x {threads} threads on {args.host}:{args.port}")
+    children = {}
+    for _ in range(workers):
+        children[_fork_worker(app, sock, threads, args)] = time.monotonic()
+
+    stopping = False
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        print(f"[Serve] worker {pid} exited with status {status}, restarting")
+        if time.monotonic() - started < 1:
+            time.sleep(1)  # don't spin on a worker that dies at startup
+        children[_fork_worker(app, sock, threads, args)] = time.monotonic()
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
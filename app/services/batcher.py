@@ -0,0 +1,138 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, List
+
+from app.services.metrics import metrics
+
+# -------------------------------------------------------------
+# Dynamic micro-batching
+# -------------------------------------------------------------
+# Concurrent single-image calls into the same engine are coalesced: the first
+# call opens a window of OCR_BATCH_WINDOW_MS, every call for the same batch key
+# that arrives before it closes (up to OCR_BATCH_MAX_SIZE) joins it, and the
+# whole batch runs as one batched inference. Results are scattered back to the
+# waiting callers. A window of 0 disables batching (calls run directly).
+
+BATCH_WINDOW_MS = float(os.getenv("OCR_BATCH_WINDOW_MS", "0"))
+BATCH_MAX_SIZE = int(os.getenv("OCR_BATCH_MAX_SIZE", "8"))
+BATCH_CONCURRENCY = int(os.getenv("OCR_BATCH_CONCURRENCY", "1"))
+
+_BATCHERS = []
+
+
+class MicroBatcher:
+    """
+    ``run_batch(key, items) -> results`` must return one result per item, in order.
+    Items with different keys (e.g. different models or image shapes) are
+    never mixed in one batch.
+    """
+
+    def __init__(self, name: str, run_batch: Callable[[Hashable, List[Any]], List[Any]],
+                 window_ms: float = BATCH_WINDOW_MS, max_batch_size: int = BATCH_MAX_SIZE,
+                 concurrency: int = BATCH_CONCURRENCY):
+        self.name = name
+        self.run_batch = run_batch
+        self.window_ms = window_ms
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue = queue.Queue()
+        self._runner = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix=f"batch-{name}")
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "items": 0, "max_batch": 0}
+        _BATCHERS.append(self)
+
+    @property
+    def enabled(self):
+        return self.window_ms > 0 and self.max_batch_size > 1
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._collect, name=f"batcher-{self.name}", daemon=True)
+                    self._thread.start()
+
+    def submit(self, key: Hashable, item: Any) -> Future:
+        future = Future()
+        if not self.enabled:
+            try:
+                future.set_result(self.run_batch(key, [item])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._ensure_started()
+        self._queue.put((key, item, future))
+        return future
+
+    def __call__(self, key: Hashable, item: Any) -> Any:
+        """Blocking single-item call; batched with concurrent callers when enabled."""
+        return self.submit(key, item).result()
+
+    def _collect(self):
+        pending = {}  # key -> [(item, future)], insertion-ordered by first arrival
+        deadlines = {}
+        while True:
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, min(deadlines.values()) - time.monotonic())
+            try:
+                key, item, future = self._queue.get(timeout=timeout)
+                if key not in pending:
+                    pending[key] = []
+                    deadlines[key] = time.monotonic() + self.window_ms / 1000.0
+                pending[key].append((item, future))
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            for key in list(pending):
+                if len(pending[key]) >= self.max_batch_size or deadlines[key] <= now:
+                    batch = pending.pop(key)
+                    del deadlines[key]
+                    while batch:
+                        chunk, batch = batch[:self.max_batch_size], batch[self.max_batch_size:]
+                        self._runner.submit(self._dispatch, key, chunk)
+
+    def _dispatch(self, key, batch):
+        items = [item for item, _ in batch]
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["items"] += len(items)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(items))
+        try:
+            results = self.run_batch(key, items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(items)} inputs")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            batches = self._stats["batches"]
+            return {
+                **self._stats,
+                "avg_batch": round(self._stats["items"] / batches, 2) if batches else 0.0,
+                "window_ms": self.window_ms,
+                "max_batch_size": self.max_batch_size,
+            }
+
+
+def batcher_stats():
+    return {batcher.name: batcher.stats() for batcher in _BATCHERS}
+
+
+@metrics.collector
+def _batcher_metrics():
+    stats = batcher_stats()
+    yield "ocr_batches_total", "counter", "Micro-batches dispatched.", [
+        ({"batcher": name}, s["batches"]) for name, s in stats.items()
+    ]
+    yield "ocr_batch_items_total", "counter", "Items dispatched in micro-batches.", [
+        ({"batcher": name}, s["items"]) for name, s in stats.items()
+    ]
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from app.services.deadlines import check_cancelled
+from app.services.engines import get_engine
+from app.services.executor import run_in_engine
+from app.services.ingest import load_image
+from app.services.metrics import count_error
+from app.services.pdf_service import iter_rendered_pages, open_pdf, resolve_pages, TextLayer
+
+# -------------------------------------------------------------
+# Confidence-driven engine cascade
+# -------------------------------------------------------------
+# The cheapest tier reads the whole image first; only regions it read with
+# low confidence are cropped and re-read by the next (heavier) tier, and so
+# on. If a tier finds nothing at all, or too much of the image is uncertain,
+# the next tier reads the whole image instead. Every row records the tier
+# and engine that produced it.
+#
+#   OCR_CASCADE_TIERS           comma-separated engine[/mode][@text_height],
+#                               cheapest first; text_height < the engine's
+#                               default means a lower-resolution pass
+#   OCR_CASCADE_MIN_CONFIDENCE  rows below this (0-1) are escalated
+#   OCR_CASCADE_MAX_REGIONS     more uncertain regions than this -> escalate
+#                               the whole image instead of crops
+#   OCR_CASCADE_PAD             padding (px) around escalated crops
+#
+# Tiers whose engine is disabled (OCR_ENGINES) are skipped. Each tier runs as
+# one job on its engine's pool, so the pools' limits still apply.
+
+CASCADE_TIERS = os.getenv("OCR_CASCADE_TIERS", "tesseract/fast@20,paddleocr,easyocr")
+CASCADE_MIN_CONFIDENCE = float(os.getenv("OCR_CASCADE_MIN_CONFIDENCE", "0.8"))
+CASCADE_MAX_REGIONS = int(os.getenv("OCR_CASCADE_MAX_REGIONS", "24"))
+CASCADE_PAD = int(os.getenv("OCR_CASCADE_PAD", "4"))
+# Uncertain area above this share of the text area -> whole image escalation
+FULL_ESCALATION_AREA = 0.5
+
+
+def parse_tiers(spec: str, enabled=None) -> List[dict]:
+    """``"tesseract/fast@20,easyocr"`` -> [{"engine", "mode", "text_height"}, ...]"""
+    tiers = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        text_height = None
+        if "@" in part:
+            part, _, height = part.partition("@")
+            text_height = float(height)
+        engine, _, mode = part.partition("/")
+        get_engine(engine, mode or None)  # validates the name
+        if enabled is not None and engine not in enabled:
+            continue
+        tiers.append({"engine": engine, "mode": mode or None, "text_height": text_height})
+    if not tiers:
+        raise ValueError(f"No enabled engine in cascade tiers: {spec}")
+    return tiers
+
+
+def _rect(bbox):
+    points = np.asarray(bbox, dtype=np.float64).reshape(-1, 2)
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+    return [float(x0), float(y0), float(x1), float(y1)]
+
+
+def _merge_regions(rects, gap_ratio=1.0):
+    """Greedily merge rects on the same line that are within a text height of each other."""
+    merged = []
+    for rect in sorted(rects, key=lambda r: (r[1], r[0])):
+        for group in merged:
+            height = max(group[3] - group[1], rect[3] - rect[1])
+            overlap = min(group[3], rect[3]) - max(group[1], rect[1])
+            gap = max(rect[0] - group[2], group[0] - rect[2])
+            if overlap > 0.5 * min(group[3] - group[1], rect[3] - rect[1]) and gap <= gap_ratio * height:
+                group[:] = [min(group[0], rect[0]), min(group[1], rect[1]),
+                            max(group[2], rect[2]), max(group[3], rect[3])]
+                break
+        else:
+            merged.append(list(rect))
+    return merged
+
+
+def _crop_rect(rect, shape, pad):
+    h, w = shape[:2]
+    return (
+        max(0, int(rect[0]) - pad), max(0, int(rect[1]) - pad),
+        min(w, int(np.ceil(rect[2])) + pad), min(h, int(np.ceil(rect[3])) + pad),
+    )
+
+
+def _area(rect):
+    return max(0.0, rect[2] - rect[0]) * max(0.0, rect[3] - rect[1])
+
+
+def _inside(rect, region):
+    cx, cy = (rect[0] + rect[2]) / 2, (rect[1] + rect[3]) / 2
+    return region[0] <= cx <= region[2] and region[1] <= cy <= region[3]
+
+
+async def _run_tier(tier, method, *args):
+    engine = get_engine(tier["engine"], tier["mode"])
+    return await run_in_engine(tier["engine"], getattr(engine, method), *args, text_height=tier["text_height"])
+
+
+async def cascade_image(image, tiers: Optional[List[dict]] = None, min_confidence: Optional[float] = None):
+    """
+    Run the cascade over one image (BGR ndarray, encoded bytes or path).
+    Returns rows tagged with ``tier``/``engine`` plus per-tier statistics.
+    A passed request deadline stops before the next escalation and flags the
+    result ``truncated``.
+    """
+    tiers = tiers or parse_tiers(CASCADE_TIERS)
+    min_confidence = CASCADE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    img = image if isinstance(image, np.ndarray) else await asyncio.to_thread(load_image, image)
+    rows = []
+    stats = []
+    truncated = None
+
+    for level, tier in enumerate(tiers):
+        t0 = time.perf_counter()
+        uncertain = [row for row in rows if row["confidence"] < min_confidence]
+        if level > 0 and rows and not uncertain:
+            break
+        if level > 0:
+            truncated = check_cancelled("tier", remaining=len(tiers) - level)
+            if truncated:
+                break
+        regions = _merge_regions([_rect(row["bbox"]) for row in uncertain])
+        text_area = sum(_area(_rect(row["bbox"])) for row in rows) or 1.0
+        full = (
+            level == 0
+            or not rows
+            or len(regions) > CASCADE_MAX_REGIONS
+            or sum(_area(r) for r in regions) > FULL_ESCALATION_AREA * text_area
+        )
+
+        if full:
+            result = await _run_tier(tier, "recognize", img)
+            new_rows = [{**row, "tier": level, "engine": tier["engine"]} for row in result["rows"]]
+            if level == 0 or not rows:
+                rows = new_rows
+            else:
+                # Keep what the cheaper tiers already read confidently
+                confident = [row for row in rows if row["confidence"] >= min_confidence]
+                rows = confident + [
+                    row for row in new_rows
+                    if not any(_inside(_rect(row["bbox"]), _rect(c["bbox"])) for c in confident)
+                ]
+            stats.append({"tier": level, "engine": tier["engine"], "scope": "image", "regions": 1,
+                          "time_s": round(time.perf_counter() - t0, 4)})
+            continue
+
+        crops = [_crop_rect(region, img.shape, CASCADE_PAD) for region in regions]
+        results = await _run_tier(tier, "recognize_regions", img, crops)
+        for region, crop, result in zip(regions, crops, results):
+            members = [row for row in uncertain if _inside(_rect(row["bbox"]), region)]
+            old_confidence = max((row["confidence"] for row in members), default=0.0)
+            if not result["text"] or result["confidence"] <= old_confidence:
+                continue
+            x0, y0, x1, y1 = (float(v) for v in crop)
+            member_ids = {id(row) for row in members}
+            rows = [row for row in rows if id(row) not in member_ids]
+            rows.append({
+                "text": result["text"],
+                "confidence": result["confidence"],
+                "bbox": [[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+                "tier": level,
+                "engine": tier["engine"],
+            })
+        stats.append({"tier": level, "engine": tier["engine"], "scope": "regions", "regions": len(crops),
+                      "time_s": round(time.perf_counter() - t0, 4)})
+
+    rows.sort(key=lambda row: (round(_rect(row["bbox"])[1] / 10), _rect(row["bbox"])[0]))
+    result = {
+        "results": rows,
+        "tiers": stats,
+        "tier": max((row["tier"] for row in rows), default=0),
+    }
+    if truncated:
+        result["truncated"] = truncated
+    return result
+
+
+def _page_total(data: bytes, pages) -> int:
+    with open_pdf(data) as document:
+        return len(resolve_pages(pages, document.page_count))
+
+
+async def cascade_pdf(data: bytes, tiers: Optional[List[dict]] = None, min_confidence: Optional[float] = None,
+                      pages=None, use_text_layer: bool = True):
+    """
+    Cascade page by page; pages with a usable text layer need no OCR at all
+    (reported as tier "text_layer"). A passed request deadline stops before
+    the next OCR page (or escalation) and flags the result ``truncated``.
+    Pages that fail to render are listed under ``errors``.
+    """
+    tiers = tiers or parse_tiers(CASCADE_TIERS)
+    page_total = await asyncio.to_thread(_page_total, data, pages)
+    page_iter = iter_rendered_pages(data, pages, dpi=None, use_text_layer=use_text_layer, engine=tiers[0]["engine"])
+    results = []
+    page_stats = []
+    errors = []
+    truncated = None
+    try:
+        while True:
+            item = await asyncio.to_thread(next, page_iter, None)
+            if item is None:
+                break
+            page_num, page_img, _render_s, page_dpi = item
+            if isinstance(page_img, Exception):
+                count_error("page", "render")
+                errors.append({"page": page_num, "stage": "render", "error": str(page_img)})
+                page_stats.append({"page": page_num, "tier": None, "error": str(page_img)})
+                continue
+            if isinstance(page_img, TextLayer):
+                results.extend({**word, "page": page_num, "tier": "text_layer", "engine": None}
+                               for word in page_img.words)
+                page_stats.append({"page": page_num, "tier": "text_layer", "dpi": page_dpi})
+                continue
+            truncated = check_cancelled("page", remaining=page_total - len(page_stats))
+            if truncated:
+                break
+            page = await cascade_image(page_img, tiers, min_confidence)
+            results.extend({**row, "page": page_num} for row in page["results"])
+            page_stats.append({"page": page_num, "tier": page["tier"], "dpi": page_dpi, "tiers": page["tiers"]})
+            if page.get("truncated"):
+                # Deadline passed inside the page: the pages after it are skipped too
+                truncated = check_cancelled("page", remaining=page_total - len(page_stats)) or page["truncated"]
+                break
+    finally:
+        await asyncio.to_thread(page_iter.close)
+    ocr_tiers = [page["tier"] for page in page_stats if isinstance(page["tier"], int)]
+    result = {
+        "results": results,
+        "pages": page_stats,
+        "tier": max(ocr_tiers) if ocr_tiers else ("text_layer" if page_stats else None),
+    }
+    if truncated:
+        result["truncated"] = truncated
+    if errors:
+        result["errors"] = errors
+    return result
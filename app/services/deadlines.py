@@ -0,0 +1,245 @@
+import asyncio
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from app.services.metrics import metrics
+
+# -------------------------------------------------------------
+# Request deadlines and client-disconnect cancellation
+# -------------------------------------------------------------
+# Every HTTP request gets a CancelToken carrying its deadline: the
+# ``X-Request-Timeout`` header (seconds), else the endpoint's default, else
+# OCR_DEADLINE_S. The token lives in a context variable, so it follows the
+# request into the engine pools (thread jobs run in a copy of the caller's
+# context), and the service loops call ``check_cancelled`` at every page,
+# frame and variant boundary. Once the deadline has passed or the client has
+# disconnected, work stops at the next boundary:
+#
+#   deadline     partial results flagged ``truncated`` (OCR_DEADLINE_PARTIAL=1)
+#                or a clean 504 abort (OCR_DEADLINE_PARTIAL=0)
+#   disconnect   abort; nobody is left to read a partial result (499)
+#
+#   OCR_DEADLINE_S         default deadline in seconds (0 = none)
+#   OCR_DEADLINE_MAX_S     cap on deadlines requested through the header
+#   OCR_DEADLINES          per-endpoint defaults, "path=seconds,..." using the
+#                          route path (e.g. "/ocr/ocr/=60,/paddleocr/predict=20")
+#   OCR_DEADLINE_PARTIAL   1: truncate on deadline, 0: abort
+#
+# Work outside a request (background jobs, preload) carries no token and is
+# never cancelled. Process-pool jobs cannot see the token; they are stopped
+# between submissions by the loop that feeds them.
+
+DEFAULT_DEADLINE_S = float(os.getenv("OCR_DEADLINE_S", "120"))
+MAX_DEADLINE_S = float(os.getenv("OCR_DEADLINE_MAX_S", "600"))
+PARTIAL_ON_DEADLINE = os.getenv("OCR_DEADLINE_PARTIAL", "1") != "0"
+DEADLINE_HEADER = b"x-request-timeout"
+
+# Interactive single-image endpoints fail fast; PDFs and videos use OCR_DEADLINE_S
+_DEFAULT_ENDPOINT_DEADLINES = {
+    "/tesseract/tesseract/tes": 30.0,
+    "/paddleocr/predict": 30.0,
+    "/ocr/ocr/template": 15.0,
+}
+
+
+def _parse_endpoint_deadlines(spec: str) -> dict:
+    deadlines = dict(_DEFAULT_ENDPOINT_DEADLINES)
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        path, _, seconds = item.rpartition("=")
+        if not path:
+            raise ValueError(f"Invalid OCR_DEADLINES entry: {item!r} (expected path=seconds)")
+        deadlines[path.strip()] = float(seconds)
+    return deadlines
+
+
+ENDPOINT_DEADLINES = _parse_endpoint_deadlines(os.getenv("OCR_DEADLINES", ""))
+
+CANCELLED_REQUESTS = metrics.counter(
+    "ocr_cancelled_requests_total", "Requests whose OCR was stopped early, by reason.",
+    ("reason", "endpoint"),
+)
+CANCELLED_UNITS = metrics.counter(
+    "ocr_cancelled_units_total", "Pages, frames, variants and queued jobs skipped by cancellation.",
+    ("unit", "reason", "endpoint"),
+)
+
+
+class RequestCancelled(RuntimeError):
+    """Raised at a work boundary when a request is aborted (client gone or deadline)."""
+
+    def __init__(self, reason: str):
+        super().__init__(
+            "Client disconnected" if reason == "disconnect" else "Request deadline exceeded"
+        )
+        self.reason = reason
+        # 499: client closed request (nginx convention); 504: deadline
+        self.status_code = 499 if reason == "disconnect" else 504
+
+
+class CancelToken:
+    """Deadline and cancellation state of one request, shared with its worker threads."""
+
+    def __init__(self, timeout: Optional[float] = None, scope=None, start: Optional[float] = None):
+        self.start = time.monotonic() if start is None else start
+        self.scope = scope
+        self.reason = None
+        self.finished = False
+        self._timeout = timeout
+        self._deadline = None
+        self._resolved = False
+        self._lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        route = (self.scope or {}).get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """Monotonic deadline; endpoint defaults resolve once the route is known."""
+        if not self._resolved:
+            timeout = self._timeout
+            if timeout is None:
+                route = (self.scope or {}).get("route")
+                timeout = ENDPOINT_DEADLINES.get(getattr(route, "path", None), DEFAULT_DEADLINE_S)
+                if route is None:
+                    return self.start + timeout if timeout > 0 else None
+            self._deadline = self.start + timeout if timeout and timeout > 0 else None
+            self._resolved = True
+        return self._deadline
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (None = no deadline)."""
+        deadline = self.deadline
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def cancel(self, reason: str = "disconnect") -> bool:
+        """Mark the request cancelled; False if it already was or has completed."""
+        with self._lock:
+            if self.reason is not None or self.finished:
+                return False
+            self.reason = reason
+        CANCELLED_REQUESTS.inc(reason=reason, endpoint=self.endpoint)
+        return True
+
+    def poll(self) -> Optional[str]:
+        """Why work should stop ("deadline" / "disconnect"), or None to keep going."""
+        if self.reason is None and not self.finished:
+            deadline = self.deadline
+            if deadline is not None and time.monotonic() >= deadline:
+                self.cancel("deadline")
+        return self.reason
+
+
+_token: ContextVar[Optional[CancelToken]] = ContextVar("ocr_cancel_token", default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _token.get()
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left for the current request (None = no deadline / no request)."""
+    token = _token.get()
+    return None if token is None else token.remaining()
+
+
+def check_cancelled(unit: str, remaining: int = 1) -> Optional[dict]:
+    """
+    Call at a page/frame/variant boundary. Returns None to keep going.
+    When the current request's deadline has passed or its client is gone,
+    counts the ``remaining`` skipped units and either returns the truncation
+    note for a partial result (``{"reason", "unit", "skipped"}``) or raises
+    RequestCancelled.
+    """
+    token = _token.get()
+    if token is None:
+        return None
+    reason = token.poll()
+    if reason is None:
+        return None
+    CANCELLED_UNITS.inc(max(0, remaining), unit=unit, reason=reason, endpoint=token.endpoint)
+    if reason == "disconnect" or not PARTIAL_ON_DEADLINE:
+        raise RequestCancelled(reason)
+    return {"reason": reason, "unit": unit, "skipped": max(0, remaining)}
+
+
+def raise_if_cancelled(unit: str = "job"):
+    """Abort before starting ``unit`` (one skipped) if the current request is cancelled."""
+    token = _token.get()
+    reason = token.poll() if token is not None else None
+    if reason is not None:
+        CANCELLED_UNITS.inc(unit=unit, reason=reason, endpoint=token.endpoint)
+        raise RequestCancelled(reason)
+
+
+def is_truncated(result) -> bool:
+    return isinstance(result, dict) and bool(result.get("truncated"))
+
+
+def _header_timeout(scope) -> Optional[float]:
+    for name, value in scope.get("headers", []):
+        if name == DEADLINE_HEADER:
+            try:
+                timeout = float(value.decode("latin-1"))
+            except ValueError:
+                return None
+            return min(timeout, MAX_DEADLINE_S) if timeout > 0 else None
+    return None
+
+
+# ---------------- ASGI middleware ----------------
+class DeadlineMiddleware:
+    """
+    Opens the request's CancelToken and watches for the client going away.
+    A pump task owns the server's ``receive`` from the start and hands the
+    messages to the app through a small bounded queue (upload backpressure
+    is kept); an ``http.disconnect`` cancels the token, whether or not the
+    app ever reads the body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = CancelToken(_header_timeout(scope), scope)
+        reset = _token.set(token)
+        messages = asyncio.Queue(maxsize=8)
+
+        async def pump():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    token.cancel("disconnect")
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        async def receive_from_pump():
+            message = await messages.get()
+            if message["type"] == "http.disconnect":
+                # Every later receive() sees the disconnect too
+                messages.put_nowait(message)
+            return message
+
+        async def send_and_finish(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Servers report a completed response as a disconnect too
+                token.finished = True
+            await send(message)
+
+        pump_task = asyncio.ensure_future(pump())
+        try:
+            await self.app(scope, receive_from_pump, send_and_finish)
+        finally:
+            token.finished = True
+            pump_task.cancel()
+            _token.reset(reset)
@@ -0,0 +1,232 @@
+import os
+import re
+from datetime import date
+from typing import Dict, List, Optional, Union
+
+# -------------------------------------------------------------
+# Document ID extraction
+# -------------------------------------------------------------
+# All ID types are found in a single pass of one precompiled scanner. The
+# scanner is deliberately loose about OCR-confusable characters (O/0, I/1,
+# S/5, B/8); every candidate is then corrected position by position against
+# its type's shape and validated structurally, so "any 12 digits" is no
+# longer an Aadhaar:
+#
+#   Aadhaar          12 digits, first digit 2-9, Verhoeff check digit
+#   PAN              AAAAA9999A, 4th letter a valid holder type, serial != 0000
+#   Driving_License  state code + RTO + issue year (plausible) + 7 digits
+#   Passport         Indian series letter + 7 digits
+#   UDYAM            UDYAM-<state>-99-9999999
+#
+#   DOCID_MAX_CORRECTIONS   max OCR-confusion fixes accepted per ID
+#
+# Document type is ranked from the IDs' confidences plus header keywords
+# ("Income Tax Department", "UIDAI", ...), not from dict ordering.
+
+MAX_CORRECTIONS = int(os.getenv("DOCID_MAX_CORRECTIONS", "2"))
+CORRECTION_PENALTY = 0.1
+KEYWORD_WEIGHT = 0.2
+
+_D = r"[0-9OoIlSB]"   # digit, or a letter OCR commonly reads for one
+_L = r"[A-Za-z0158]"  # letter, or a digit OCR commonly reads for one
+
+_PATTERNS = {
+    "UDYAM": rf"UDYAM[-\s]?{_L}{{2}}[-\s]?{_D}{{2}}[-\s]?{_D}{{7}}",
+    "Driving_License": rf"{_L}{{2}}[-\s]?{_D}{{2}}[-\s]?{_D}{{4}}[-\s]?{_D}{{7}}",
+    "PAN": rf"{_L}{{5}}{_D}{{4}}{_L}",
+    "Passport": rf"[A-Za-z]{_D}{{7}}",
+    "Aadhaar": rf"{_D}{{4}}\s?{_D}{{4}}\s?{_D}{{4}}",
+}
+_SCANNER = re.compile(
+    r"(?<![A-Za-z0-9])(?:"
+    + "|".join(f"(?P<{doc_type}>{pattern})" for doc_type, pattern in _PATTERNS.items())
+    + r")(?![A-Za-z0-9])",
+    re.IGNORECASE,
+)
+
+# Shape of each ID without separators: A = letter, 9 = digit, else literal
+_SHAPES = {
+    "UDYAM": "UDYAMAA999999999",
+    "Driving_License": "AA9999999999999",
+    "PAN": "AAAAA9999A",
+    "Passport": "A9999999",
+    "Aadhaar": "999999999999",
+}
+_BASE_CONFIDENCE = {
+    "UDYAM": 0.95,
+    "Aadhaar": 0.9,
+    "PAN": 0.85,
+    "Driving_License": 0.8,
+    "Passport": 0.6,
+}
+_KEYWORDS = {
+    "PAN": r"income\s*tax|permanent\s*account",
+    "Aadhaar": r"aadhaa?r|uidai|unique\s*identification",
+    "Driving_License": r"driving\s*licen[cs]e|\bdl\s*no\b",
+    "Passport": r"passport|republic\s*of\s*india",
+    "UDYAM": r"udyam\s*registration|msme",
+}
+_KEYWORD_SCANNER = re.compile(
+    "|".join(f"(?P<{doc_type}>{pattern})" for doc_type, pattern in _KEYWORDS.items()),
+    re.IGNORECASE,
+)
+
+_TO_DIGIT = str.maketrans("OoIlSB", "001158")
+_TO_LETTER = str.maketrans("0158", "OISB")
+
+# PAN 4th character: P person, C company, H HUF, F firm, A AOP, T trust,
+# B BOI, L local authority, J artificial juridical person, G government
+_PAN_HOLDER_TYPES = set("PCHFATBLJG")
+_STATE_CODES = {
+    "AN", "AP", "AR", "AS", "BR", "CG", "CH", "DD", "DL", "DN", "GA", "GJ", "HP", "HR", "JH", "JK",
+    "KA", "KL", "LA", "LD", "MH", "ML", "MN", "MP", "MZ", "NL", "OD", "OR", "PB", "PY", "RJ", "SK",
+    "TN", "TR", "TS", "UK", "UP", "WB",
+}
+_PASSPORT_SERIES = set("ABCDEFGHJKLMNPRSTUVWY")
+
+# Verhoeff dihedral group tables
+_VERHOEFF_D = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9), (1, 2, 3, 4, 0, 6, 7, 8, 9, 5),
+    (2, 3, 4, 0, 1, 7, 8, 9, 5, 6), (3, 4, 0, 1, 2, 8, 9, 5, 6, 7),
+    (4, 0, 1, 2, 3, 9, 5, 6, 7, 8), (5, 9, 8, 7, 6, 0, 4, 3, 2, 1),
+    (6, 5, 9, 8, 7, 1, 0, 4, 3, 2), (7, 6, 5, 9, 8, 2, 1, 0, 4, 3),
+    (8, 7, 6, 5, 9, 3, 2, 1, 0, 4), (9, 8, 7, 6, 5, 4, 3, 2, 1, 0),
+)
+_VERHOEFF_P = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9), (1, 5, 7, 6, 2, 8, 3, 0, 9, 4),
+    (5, 8, 0, 3, 7, 9, 6, 1, 4, 2), (8, 9, 1, 6, 0, 4, 3, 5, 2, 7),
+    (9, 4, 5, 3, 1, 2, 6, 8, 7, 0), (4, 2, 8, 6, 5, 7, 3, 9, 0, 1),
+    (2, 7, 9, 3, 8, 0, 6, 4, 1, 5), (7, 0, 4, 6, 9, 1, 3, 2, 5, 8),
+)
+
+
+def verhoeff_valid(number: str) -> bool:
+    check = 0
+    for i, digit in enumerate(reversed(number)):
+        check = _VERHOEFF_D[check][_VERHOEFF_P[i % 8][int(digit)]]
+    return check == 0
+
+
+def _correct(compact: str, shape: str):
+    """Fix confusable characters against ``shape``; returns (value, corrections) or None."""
+    chars = []
+    corrections = 0
+    for char, expected in zip(compact, shape):
+        if expected == "9":
+            fixed = char.translate(_TO_DIGIT)
+        elif expected == "A":
+            fixed = char.upper().translate(_TO_LETTER)
+        else:
+            fixed = char.upper()
+            if fixed != expected:
+                return None
+        corrections += fixed != char.upper()
+        chars.append(fixed)
+    return "".join(chars), corrections
+
+
+def _valid(doc_type: str, value: str) -> bool:
+    if doc_type == "Aadhaar":
+        return value[0] not in "01" and verhoeff_valid(value)
+    if doc_type == "PAN":
+        return value[3] in _PAN_HOLDER_TYPES and value[5:9] != "0000"
+    if doc_type == "Driving_License":
+        year = int(value[4:8])
+        return value[:2] in _STATE_CODES and 1950 <= year <= date.today().year
+    if doc_type == "Passport":
+        return value[0] in _PASSPORT_SERIES and value[1] != "0"
+    if doc_type == "UDYAM":
+        return value[5:7] in _STATE_CODES
+    return True
+
+
+def _display(doc_type: str, value: str) -> str:
+    if doc_type == "UDYAM":
+        return f"UDYAM-{value[5:7]}-{value[7:9]}-{value[9:]}"
+    return value
+
+
+def _as_text(text: Union[str, List[str]]) -> str:
+    # Per-line OCR output is joined so IDs split across boxes are still found
+    return text if isinstance(text, str) else " ".join(t for t in text if t)
+
+
+def scan_document_ids(text: Union[str, List[str]]) -> List[dict]:
+    """
+    Validated IDs in ``text`` (or a list of OCR lines), one scanner pass.
+    Each match: type, value (normalized), raw, start, end, corrections, confidence.
+    """
+    text = _as_text(text)
+    found = []
+    for m in _SCANNER.finditer(text):
+        doc_type = m.lastgroup
+        raw = m.group()
+        compact = re.sub(r"[^A-Za-z0-9]", "", raw)
+        corrected = _correct(compact, _SHAPES[doc_type])
+        if corrected is None:
+            continue
+        value, corrections = corrected
+        if corrections > MAX_CORRECTIONS or not _valid(doc_type, value):
+            continue
+        found.append({
+            "type": doc_type,
+            "value": _display(doc_type, value),
+            "raw": raw,
+            "start": m.start(),
+            "end": m.end(),
+            "corrections": corrections,
+            "confidence": round(max(0.0, _BASE_CONFIDENCE[doc_type] - CORRECTION_PENALTY * corrections), 3),
+        })
+    return found
+
+
+def group_document_ids(matches: List[dict]) -> Dict[str, List[str]]:
+    """``{doc_type: [unique values]}`` in first-seen order."""
+    grouped = {}
+    for match in matches:
+        values = grouped.setdefault(match["type"], [])
+        if match["value"] not in values:
+            values.append(match["value"])
+    return grouped
+
+
+def extract_document_ids(text: Union[str, List[str]]) -> Dict[str, List[str]]:
+    """Extract validated document IDs from text, grouped by document type."""
+    return group_document_ids(scan_document_ids(text))
+
+
+def classify_document(text: Union[str, List[str]], matches: Optional[List[dict]] = None) -> List[dict]:
+    """
+    Rank document types by the best ID confidence of each type plus header
+    keywords; highest score first, types with no evidence omitted.
+    """
+    text = _as_text(text)
+    if matches is None:
+        matches = scan_document_ids(text)
+    best = {}
+    for match in matches:
+        best[match["type"]] = max(best.get(match["type"], 0.0), match["confidence"])
+    keywords = {m.lastgroup for m in _KEYWORD_SCANNER.finditer(text)}
+    ranked = []
+    for doc_type in _SHAPES:
+        if doc_type not in best and doc_type not in keywords:
+            continue
+        score = (1 - KEYWORD_WEIGHT) * best.get(doc_type, 0.0) + KEYWORD_WEIGHT * (doc_type in keywords)
+        ranked.append({"type": doc_type, "score": round(score, 3), "has_id": doc_type in best})
+    ranked.sort(key=lambda r: r["score"], reverse=True)
+    return ranked
+
+
+def analyze_document(text: Union[str, List[str]], matches: Optional[List[dict]] = None) -> dict:
+    """IDs, matches and the ranked/most likely document type for one text."""
+    text = _as_text(text)
+    if matches is None:
+        matches = scan_document_ids(text)
+    ranked = classify_document(text, matches)
+    with_id = [r for r in ranked if r["has_id"]]
+    return {
+        "document_ids": group_document_ids(matches),
+        "document_type": with_id[0]["type"] if with_id else None,
+        "document_types": ranked,
+        "matches": matches,
+    }
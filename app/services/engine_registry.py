@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# -------------------------------------------------------------
+# Engine registry
+# -------------------------------------------------------------
+# Decides which engines this process serves and gets their models hot before
+# /ready reports green:
+#
+#   OCR_ENGINES=easyocr,paddleocr,tesseract   engines to enable; the modules of
+#                                             disabled engines are never imported
+#   OCR_EASYOCR_PRELOAD=en;en,hi              EasyOCR language sets to preload
+#   OCR_PADDLE_PRELOAD=en                     PaddleOCR languages to preload
+#   OCR_WARMUP=1                              run one inference per model
+#
+# Engine service modules are imported lazily inside the loaders so importing
+# the registry itself stays cheap. Preloaded models are pinned in the model
+# cache so on-demand languages can never evict them.
+
+ALL_ENGINES = ("easyocr", "paddleocr", "tesseract")
+
+
+def _enabled_from_env():
+    raw = os.getenv("OCR_ENGINES", ",".join(ALL_ENGINES))
+    engines = [e.strip().lower() for e in raw.split(",") if e.strip()]
+    unknown = set(engines) - set(ALL_ENGINES)
+    if unknown:
+        raise ValueError(f"Unknown engines in OCR_ENGINES: {', '.join(sorted(unknown))}")
+    return engines
+
+
+def _easyocr_preload():
+    raw = os.getenv("OCR_EASYOCR_PRELOAD", "en")
+    return [[lang.strip() for lang in group.split(",") if lang.strip()] for group in raw.split(";") if group.strip()]
+
+
+def _paddle_preload():
+    return [lang.strip() for lang in os.getenv("OCR_PADDLE_PRELOAD", "en").split(",") if lang.strip()]
+
+
+def warmup_image():
+    """Small synthetic text image (BGR) used for warmup inferences."""
+    img = np.full((96, 480, 3), 255, dtype=np.uint8)
+    cv2.putText(img, "WARMUP 0123 ABCD", (12, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2, cv2.LINE_AA)
+    return img
+
+
+# ---------------- loaders: (load, warmup) per engine ----------------
+def _load_easyocr(languages):
+    from app.services.ocr_service import get_easyocr_reader
+    return get_easyocr_reader(languages, gpu=False, pin=True)
+
+
+def _warm_easyocr(reader):
+    reader.readtext(cv2.cvtColor(warmup_image(), cv2.COLOR_BGR2RGB))
+
+
+def _load_paddleocr(lang):
+    from app.services.paddleocr_service import get_paddle_ocr
+    return get_paddle_ocr(lang, pin=True)
+
+
+def _warm_paddleocr(ocr):
+    ocr.predict(warmup_image())
+
+
+def _load_tesseract(_):
+    from app.services.tesseract_backend import get_backend
+    return get_backend()
+
+
+def _warm_tesseract(backend):
+    backend.image_to_words(cv2.cvtColor(warmup_image(), cv2.COLOR_BGR2GRAY), 6)
+
+
+_LOADERS = {
+    "easyocr": (_load_easyocr, _warm_easyocr),
+    "paddleocr": (_load_paddleocr, _warm_paddleocr),
+    "tesseract": (_load_tesseract, _warm_tesseract),
+}
+
+
+class EngineRegistry:
+    def __init__(self, enabled=None, warmup=None):
+        self.enabled = list(enabled) if enabled is not None else _enabled_from_env()
+        self.warmup = (os.getenv("OCR_WARMUP", "1") != "0") if warmup is None else warmup
+        self._lock = threading.Lock()
+        self._models = {}
+        self._preloaded = False
+        for engine in ALL_ENGINES:
+            if engine not in self.enabled:
+                continue
+            for variant in self._preload_variants(engine):
+                self._models[(engine, self._label(variant))] = {
+                    "engine": engine,
+                    "model": self._label(variant),
+                    "status": "pending",
+                }
+
+    def reset(self):
+        """Mark every model pending again (e.g. in a freshly forked worker)."""
+        with self._lock:
+            self._preloaded = False
+            for key in self._models:
+                engine, label = key
+                self._models[key] = {"engine": engine, "model": label, "status": "pending"}
+
+    def is_enabled(self, engine):
+        return engine in self.enabled
+
+    @staticmethod
+    def _label(variant):
+        if isinstance(variant, (list, tuple)):
+            return "+".join(variant)
+        return str(variant)
+
+    @staticmethod
+    def _preload_variants(engine):
+        if engine == "easyocr":
+            return _easyocr_preload()
+        if engine == "paddleocr":
+            return _paddle_preload()
+        return ["default"]
+
+    def _set(self, key, **fields):
+        with self._lock:
+            self._models[key].update(fields)
+
+    def _load_one(self, engine, variant):
+        key = (engine, self._label(variant))
+        load, warm = _LOADERS[engine]
+        self._set(key, status="loading")
+        try:
+            t0 = time.perf_counter()
+            model = load(variant)
+            load_s = time.perf_counter() - t0
+            self._set(key, status="warming" if self.warmup else "ready", load_s=round(load_s, 3))
+            if self.warmup:
+                t0 = time.perf_counter()
+                warm(model)
+                self._set(key, status="ready", warmup_s=round(time.perf_counter() - t0, 3))
+            print(f"[Registry] {engine}:{key[1]} ready")
+        except Exception as e:
+            print(f"[Registry] {engine}:{key[1]} failed: {e}")
+            self._set(key, status="failed", error=str(e))
+
+    def preload(self, max_workers=None):
+        """Load and warm every configured model in parallel (blocking)."""
+        tasks = [
+            (engine, variant)
+            for engine in ALL_ENGINES if engine in self.enabled
+            for variant in self._preload_variants(engine)
+        ]
+        if tasks:
+            with ThreadPoolExecutor(max_workers=max_workers or len(tasks), thread_name_prefix="preload") as pool:
+                list(pool.map(lambda task: self._load_one(*task), tasks))
+        with self._lock:
+            self._preloaded = True
+
+    @property
+    def ready(self):
+        with self._lock:
+            return self._preloaded and all(m["status"] == "ready" for m in self._models.values())
+
+    def status(self):
+        with self._lock:
+            return {
+                "ready": self._preloaded and all(m["status"] == "ready" for m in self._models.values()),
+                "enabled": list(self.enabled),
+                "models": [dict(m) for m in self._models.values()],
+            }
+
+
+registry = EngineRegistry()
@@ -0,0 +1,157 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from app.services.metrics import span
+from app.services.resolution import backproject_bbox, choose_scale, normalize_resolution
+
+# -------------------------------------------------------------
+# Common engine interface
+# -------------------------------------------------------------
+# Thin adapters over the per-engine services so callers (the cascade) can
+# treat every engine the same way:
+#
+#   engine.recognize(image_bgr, text_height=None) ->
+#       {"rows": [{"text", "confidence" (0-1), "bbox": [[x, y] * 4]}],
+#        "confidence": mean row confidence (0-1), "engine": name}
+#   engine.recognize_regions(image_bgr, rects, text_height=None) ->
+#       one {"text", "confidence"} per (x0, y0, x1, y1) rect
+#
+# Boxes are in the coordinates of the image passed in. ``text_height``
+# overrides the engine's preferred text height for resolution normalization
+# (lower = cheaper, coarser). Service modules are imported lazily so only the
+# engines actually used get loaded.
+
+
+def _mean_confidence(rows) -> float:
+    if not rows:
+        return 0.0
+    return round(float(np.mean([row["confidence"] for row in rows])), 4)
+
+
+def _reading_order(rows):
+    return sorted(rows, key=lambda row: (round(row["bbox"][0][1] / 10), row["bbox"][0][0]))
+
+
+def _scale_for(image, engine, text_height):
+    if text_height is None:
+        return None
+    scale, _ = choose_scale(image, engine, target_text_height=text_height)
+    return scale
+
+
+class OcrEngine(ABC):
+    name = None
+
+    @abstractmethod
+    def recognize(self, image: np.ndarray, text_height: Optional[float] = None) -> dict:
+        """Rows, mean confidence and engine name for ``image`` (see the interface above)."""
+
+    def recognize_regions(self, image: np.ndarray, rects: List[tuple], text_height: Optional[float] = None):
+        """Recognize each rect crop of ``image`` on its own (one call per crop)."""
+        results = []
+        for x0, y0, x1, y1 in rects:
+            crop = image[y0:y1, x0:x1]
+            if crop.size == 0:
+                results.append({"text": "", "confidence": 0.0})
+                continue
+            rows = _reading_order(self.recognize(crop, text_height)["rows"])
+            results.append({
+                "text": " ".join(row["text"] for row in rows if row["text"]),
+                "confidence": _mean_confidence(rows),
+            })
+        return results
+
+
+class TesseractEngine(OcrEngine):
+    """
+    ``search=False``: a single word-level call (cheapest tier).
+    ``search=True``: tesseract_best_ocr's variant x PSM search, one row per image.
+    """
+
+    name = "tesseract"
+
+    def __init__(self, search: bool = False, psm: int = 11):
+        self.search = search
+        self.psm = psm
+
+    def recognize(self, image, text_height=None):
+        from app.services.tesseract_backend import get_backend
+        from app.services.tesseract_service import tesseract_best_ocr
+
+        h, w = image.shape[:2]
+        if self.search:
+            result = tesseract_best_ocr(image, scale=_scale_for(image, "tesseract", text_height))
+            rows = []
+            if result["text"]:
+                rows.append({
+                    "text": result["text"],
+                    "confidence": max(0.0, result["confidence"]) / 100.0,
+                    "bbox": [[0.0, 0.0], [float(w), 0.0], [float(w), float(h)], [0.0, float(h)]],
+                })
+            return {"rows": rows, "confidence": _mean_confidence(rows), "engine": self.name}
+
+        img, resolution = normalize_resolution(
+            image, "tesseract", scale=_scale_for(image, "tesseract", text_height)
+        )
+        with span("recognize", engine=self.name):
+            words = get_backend().image_to_words(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), self.psm)
+        rows = []
+        scale = resolution["scale"]
+        for text, conf, (left, top, width, height) in zip(words["text"], words["conf"], words["boxes"]):
+            if conf < 0:
+                continue
+            x1, y1 = left + width, top + height
+            rows.append({
+                "text": text,
+                "confidence": round(float(conf) / 100.0, 4),
+                "bbox": backproject_bbox([[left, top], [x1, top], [x1, y1], [left, y1]], scale),
+            })
+        return {"rows": rows, "confidence": _mean_confidence(rows), "engine": self.name}
+
+
+class PaddleEngine(OcrEngine):
+    name = "paddleocr"
+
+    def __init__(self, lang: str = "en"):
+        self.lang = lang
+
+    def recognize(self, image, text_height=None):
+        from app.services.paddleocr_service import paddle_ocr_and_annotate
+
+        result = paddle_ocr_and_annotate(image, lang=self.lang, scale=_scale_for(image, "paddleocr", text_height))
+        rows = [
+            {"text": text, "confidence": score, "bbox": box}
+            for text, score, box in zip(result["texts"], result["scores"], result["boxes"])
+        ]
+        return {"rows": rows, "confidence": _mean_confidence(rows), "engine": self.name}
+
+
+class EasyOcrEngine(OcrEngine):
+    name = "easyocr"
+
+    def __init__(self, languages=("en",)):
+        self.languages = list(languages)
+
+    def recognize(self, image, text_height=None):
+        from app.services.ocr_service import extract_text_from_image
+
+        result = extract_text_from_image(image, self.languages, scale=_scale_for(image, "easyocr", text_height))
+        rows = [
+            {"text": row["text"], "confidence": row["confidence"], "bbox": row["bbox"]}
+            for row in result["results"]
+        ]
+        return {"rows": rows, "confidence": _mean_confidence(rows), "engine": self.name}
+
+
+def get_engine(name: str, mode: Optional[str] = None) -> OcrEngine:
+    """Adapter for ``name``; ``mode`` selects a setting (tesseract: fast|search)."""
+    if name == "tesseract":
+        return TesseractEngine(search=(mode == "search"))
+    if name == "paddleocr":
+        return PaddleEngine()
+    if name == "easyocr":
+        return EasyOcrEngine()
+    raise ValueError(f"Unknown engine: {name}")
@@ -0,0 +1,234 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from app.services.metrics import metrics, set_engine
+from app.services.deadlines import current_token, raise_if_cancelled
+
+
+# -------------------------------------------------------------
+# Per-engine execution pools
+# -------------------------------------------------------------
+# Every OCR engine gets its own pool so a burst of slow PDFs on one engine
+# cannot starve the others (or the event loop). Each pool is configurable
+# through environment variables, e.g. for EasyOCR:
+#
+#   OCR_EASYOCR_POOL=thread|process   (default: thread)
+#   OCR_EASYOCR_WORKERS=2             (concurrent jobs)
+#   OCR_EASYOCR_QUEUE=8               (jobs allowed to wait for a worker)
+#
+# When workers + queue are all taken, new jobs are rejected immediately with
+# EngineBusyError instead of piling up behind the running ones.
+#
+# Thread-pool jobs run inside a copy of the caller's context (request spans,
+# engine label, cancel token); process-pool jobs cannot carry it across the
+# boundary. A job whose request was cancelled while it waited in the queue
+# is dropped instead of started.
+#
+# PaddleOCR defaults to one worker: its predictor is not thread-safe and every
+# thread would share the one cached instance (calls on an instance are also
+# serialized in paddleocr_service). With OCR_PADDLEOCR_POOL=process each
+# worker process loads its own model, so more workers cost one model each.
+
+ENGINES = ("easyocr", "paddleocr", "tesseract")
+
+_DEFAULTS = {
+    "easyocr": {"workers": 2, "queue": 8},
+    "paddleocr": {"workers": 1, "queue": 8},
+    "tesseract": {"workers": 2, "queue": 16},
+}
+
+
+class EngineBusyError(RuntimeError):
+    """Raised when an engine pool has no free worker and its queue is full."""
+
+    def __init__(self, engine, retry_after, status_code=429):
+        super().__init__(f"{engine} engine is busy, retry in {retry_after}s")
+        self.engine = engine
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+class EnginePool:
+    """Bounded executor for one OCR engine."""
+
+    def __init__(self, name, workers, queue_size, kind="thread"):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.kind = kind
+        self._executor = None
+        self._lock = threading.Lock()
+        # Background callers wait on this for an idle worker
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._closed = False
+        # EWMA of job duration, used to estimate Retry-After
+        self._avg_seconds = 1.0
+
+    @property
+    def capacity(self):
+        return self.workers + self.queue_size
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    @property
+    def queued(self):
+        return max(0, self._in_flight - self.workers)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f"ocr-{self.name}"
+                )
+        return self._executor
+
+    def retry_after(self):
+        """Rough estimate (seconds) of when a slot should free up."""
+        waves = (self.queued + 1) / self.workers
+        return max(1, int(round(self._avg_seconds * waves)))
+
+    def _acquire(self):
+        with self._lock:
+            if self._closed:
+                raise EngineBusyError(self.name, self.retry_after(), status_code=503)
+            if self._in_flight >= self.capacity:
+                raise EngineBusyError(self.name, self.retry_after(), status_code=429)
+            self._in_flight += 1
+            return self._get_executor()
+
+    def _release(self, elapsed):
+        with self._lock:
+            self._in_flight -= 1
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+            self._idle.notify_all()
+
+    def _submit(self, executor, fn, args, kwargs):
+        """
+        Submit a job holding an acquired slot. The slot is freed when the job
+        itself finishes, not when its caller stops waiting: a cancelled request
+        leaves the thread/process job running, and it still occupies a worker.
+        """
+        start = time.monotonic()
+        try:
+            call = functools.partial(fn, *args, **kwargs)
+            if self.kind != "process":
+                context = contextvars.copy_context()
+                context.run(set_engine, self.name)
+                call = functools.partial(context.run, _start_unless_cancelled, call)
+            elif current_token() is not None:
+                raise_if_cancelled("job")
+            future = executor.submit(call)
+        except BaseException:
+            self._release(time.monotonic() - start)
+            raise
+        future.add_done_callback(lambda _: self._release(time.monotonic() - start))
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on this pool without blocking the event loop."""
+        executor = self._acquire()
+        return await asyncio.wrap_future(self._submit(executor, fn, args, kwargs))
+
+    def run_blocking(self, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` from a plain thread (background jobs).
+        Instead of being rejected it waits for an idle worker, so background
+        work only uses capacity interactive requests leave free. Process pools
+        cannot take arbitrary callables: there ``fn`` runs on the calling
+        thread while holding the slot.
+        """
+        with self._idle:
+            while not self._closed and self._in_flight >= self.workers:
+                self._idle.wait()
+            if self._closed:
+                raise EngineBusyError(self.name, self.retry_after(), status_code=503)
+            self._in_flight += 1
+            executor = self._get_executor()
+        if self.kind == "process":
+            start = time.monotonic()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._release(time.monotonic() - start)
+        return self._submit(executor, fn, args, kwargs).result()
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "avg_seconds": round(self._avg_seconds, 3),
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+            self._idle.notify_all()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _start_unless_cancelled(call):
+    raise_if_cancelled("job")
+    return call()
+
+
+def _build_pool(name):
+    prefix = f"OCR_{name.upper()}_"
+    defaults = _DEFAULTS[name]
+    return EnginePool(
+        name,
+        workers=_env_int(prefix + "WORKERS", defaults["workers"]),
+        queue_size=_env_int(prefix + "QUEUE", defaults["queue"]),
+        kind=os.getenv(prefix + "POOL", "thread").lower(),
+    )
+
+
+_POOLS = {name: _build_pool(name) for name in ENGINES}
+
+
+def get_pool(engine):
+    return _POOLS[engine]
+
+
+async def run_in_engine(engine, fn, *args, **kwargs):
+    """Dispatch a blocking OCR call to the pool of the given engine."""
+    return await get_pool(engine).run(fn, *args, **kwargs)
+
+
+def pool_stats():
+    return {name: pool.stats() for name, pool in _POOLS.items()}
+
+
+@metrics.collector
+def _pool_metrics():
+    stats = pool_stats()
+    for name, help, key in (
+        ("ocr_engine_pool_in_flight", "Jobs running or queued on an engine pool.", "in_flight"),
+        ("ocr_engine_pool_queued", "Jobs waiting for a free engine worker (queue depth).", "queued"),
+        ("ocr_engine_pool_workers", "Configured workers per engine pool.", "workers"),
+    ):
+        yield name, "gauge", help, [({"engine": engine}, s[key]) for engine, s in stats.items()]
+
+
+def shutdown_pools(wait=True):
+    for pool in _POOLS.values():
+        pool.shutdown(wait=wait)
@@ -0,0 +1,256 @@
+import bisect
+import os
+import re
+import unicodedata
+from datetime import date
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # falls back to difflib: same 0-100 scale, much slower
+    fuzz = process = None
+
+# -------------------------------------------------------------
+# Indexed fuzzy field matching
+# -------------------------------------------------------------
+# OCR output is tokenized and indexed once; every requested field is then
+# scored against all candidate token windows in one vectorized call instead
+# of a regex scan per field. Comparison happens on canonical forms:
+#
+#   text  lower-cased alphanumeric tokens with diacritics removed. Tokens are
+#         joined without separators, so a dropped space or a hyphenated name
+#         still lines up, but a match has to cover whole tokens exactly:
+#         "Rahul Kumari" is not found in "RAHUL KUMAR". The fuzzy score is
+#         reported for information only.
+#   id    tokens with OCR-confusable characters also folded (0/o, 1/i/l, 5/s,
+#         2/z, 8/b); a match has to be exact after folding by default
+#   date  day-first dates in any common layout (12/03/1990, 12-03-90,
+#         12031990, 12 Mar 1990, 1990-03-12) compared as ISO dates
+#
+#   OCR_MATCH_MIN_SCORE      similarity (0-100) for a text field to count as
+#                            found; 100 (exact) unless explicitly lowered
+#   OCR_MATCH_MIN_SCORE_ID   same for id fields
+
+MIN_SCORE = float(os.getenv("OCR_MATCH_MIN_SCORE", "100"))
+MIN_SCORE_ID = float(os.getenv("OCR_MATCH_MIN_SCORE_ID", "100"))
+FIELD_KINDS = ("text", "id", "date")
+
+# One-to-one, so folded strings keep the offsets of the original
+_CONFUSABLE = str.maketrans("oilszb|", "0115282")
+_DIGIT_CONFUSABLE = str.maketrans("oOilIsSzZbB|", "001115522881")
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+_MONTHS = {
+    name: number
+    for number, names in enumerate(
+        [("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",),
+         ("jun", "june"), ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"),
+         ("oct", "october"), ("nov", "november"), ("dec", "december")],
+        start=1,
+    )
+    for name in names
+}
+_DATE_RE = re.compile(
+    r"(?<![\dA-Za-z])(?:"
+    r"(?P<y1>\d{4})[/\-.](?P<m1>\d{1,2})[/\-.](?P<d1>\d{1,2})"
+    r"|(?P<d2>\d{1,2})\s*[/\-.\s]\s*(?P<m2>\d{1,2}|[A-Za-z]{3,9})\.?\s*[/\-.\s]\s*(?P<y2>\d{4}|\d{2})"
+    r"|(?P<d3>\d{2})(?P<m3>\d{2})(?P<y3>\d{4})"
+    r")(?![\dA-Za-z])"
+)
+
+
+def fold(text: str) -> str:
+    """Lower-case and fold OCR-confusable characters."""
+    return text.lower().translate(_CONFUSABLE)
+
+
+def fold_name(text: str) -> str:
+    """Lower-case and strip diacritics (no confusable folding: names must match exactly)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _fix_digit_token(match):
+    token = match.group()
+    # Only runs that are mostly digits are numbers with misread characters
+    if sum(c.isdigit() for c in token) * 2 >= len(token):
+        return token.translate(_DIGIT_CONFUSABLE)
+    return token
+
+
+def _to_iso(day, month, year) -> Optional[str]:
+    try:
+        day = int(day)
+        month = int(month) if month.isdigit() else _MONTHS.get(month.lower().rstrip("."))
+        if month is None:
+            return None
+        year = int(year)
+        if year < 100:
+            year += 2000 if year <= date.today().year % 100 else 1900
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def find_dates(text: str):
+    """Yield ``(iso_date, start, end)`` for every valid date in ``text``."""
+    digit_text = _TOKEN_RE.sub(_fix_digit_token, text)
+    for m in _DATE_RE.finditer(digit_text):
+        if m.group("y1"):
+            iso = _to_iso(m.group("d1"), m.group("m1"), m.group("y1"))
+        elif m.group("y2"):
+            iso = _to_iso(m.group("d2"), m.group("m2"), m.group("y2"))
+        else:
+            iso = _to_iso(m.group("d3"), m.group("m3"), m.group("y3"))
+        if iso:
+            yield iso, m.start(), m.end()
+
+
+def normalize_date(value: str) -> Optional[str]:
+    """ISO form of a single date string, or None if it is not a date."""
+    for iso, start, end in find_dates(value.strip()):
+        return iso
+    return None
+
+
+def _score_matrix(queries: List[str], choices: List[str]) -> np.ndarray:
+    """Similarity (0-100) of every query against every choice."""
+    if not queries or not choices:
+        return np.zeros((len(queries), len(choices)), dtype=np.float32)
+    if process is not None:
+        return process.cdist(queries, choices, scorer=fuzz.ratio, dtype=np.float32)
+    return np.array(
+        [[SequenceMatcher(None, q, c).ratio() * 100 for c in choices] for q in queries],
+        dtype=np.float32,
+    )
+
+
+class FieldIndex:
+    """
+    Tokens, folded token windows and dates of one OCR text, built once and
+    reused for any number of fields.
+    """
+
+    def __init__(self, text: str, row_starts: Optional[List[int]] = None, rows: Optional[List[dict]] = None):
+        self.text = text
+        self._row_starts = row_starts or []
+        self._rows = rows or []
+        matches = list(_TOKEN_RE.finditer(text))
+        self.tokens = [fold(m.group()) for m in matches]
+        self.name_tokens = [fold_name(m.group()) for m in matches]
+        self.spans = [(m.start(), m.end()) for m in matches]
+        self.dates = list(find_dates(text))
+        self._windows = {}
+
+    @classmethod
+    def from_rows(cls, rows: List[dict]) -> "FieldIndex":
+        """Index OCR result rows; spans of matches point back at their row."""
+        parts, starts, kept = [], [], []
+        offset = 0
+        for row in rows:
+            text = row.get("text") if isinstance(row, dict) else None
+            if not text:
+                continue
+            starts.append(offset)
+            kept.append(row)
+            parts.append(text)
+            offset += len(text) + 1
+        return cls(" ".join(parts), starts, kept)
+
+    def windows(self, size: int, kind: str = "id"):
+        """Concatenated folded tokens of every run of ``size`` consecutive tokens."""
+        key = (size, kind)
+        if key not in self._windows:
+            tokens = self.name_tokens if kind == "text" else self.tokens
+            count = max(0, len(tokens) - size + 1)
+            self._windows[key] = ["".join(tokens[i:i + size]) for i in range(count)]
+        return self._windows[key]
+
+    def _span(self, start: int, end: int) -> dict:
+        span = {"start": start, "end": end, "text": self.text[start:end]}
+        if self._rows:
+            row = self._rows[bisect.bisect_right(self._row_starts, start) - 1]
+            for key in ("page", "frame", "bbox"):
+                if key in row:
+                    span[key] = row[key]
+        return span
+
+    def _match_dates(self, iso: str):
+        best = {"score": 0.0, "found": False, "span": None}
+        for candidate, start, end in self.dates:
+            score = 100.0 if candidate == iso else float(_score_matrix([iso], [candidate])[0, 0])
+            if score > best["score"]:
+                best = {"score": score, "found": candidate == iso, "span": self._span(start, end)}
+                if best["found"]:
+                    break
+        return best
+
+    def match(self, fields: Dict[str, str], kinds: Optional[Dict[str, str]] = None,
+              min_score: Optional[float] = None) -> Dict[str, dict]:
+        """
+        Score every field (name -> expected value) against the index.
+        Text fields need an exact whole-token match unless ``min_score``
+        explicitly opts into fuzzy matching.
+        Returns name -> {"score", "found", "span"}; ``span`` locates the best
+        candidate in the indexed text (and its row's page/frame/bbox).
+        """
+        kinds = kinds or {}
+        results = {}
+        # (window size, kind) -> [(field name, folded query)]
+        by_size = {}
+        for name, value in fields.items():
+            kind = kinds.get(name, "text")
+            if kind not in FIELD_KINDS:
+                raise ValueError(f"Unknown field kind: {kind}")
+            if not value or not value.strip():
+                results[name] = {"score": 0.0, "found": False, "span": None}
+                continue
+            if kind == "date":
+                iso = normalize_date(value)
+                if iso is not None:
+                    results[name] = self._match_dates(iso)
+                    continue
+                kind = "text"
+            folder = fold_name if kind == "text" else fold
+            query_tokens = [folder(t) for t in _TOKEN_RE.findall(value)]
+            query = "".join(query_tokens)
+            threshold = MIN_SCORE_ID if kind == "id" else (MIN_SCORE if min_score is None else min_score)
+            results[name] = {"score": 0.0, "found": False, "span": None, "_threshold": threshold}
+            # OCR may merge or split one token either way
+            n = len(query_tokens)
+            for size in range(max(1, n - 1), n + 2):
+                by_size.setdefault((size, kind), []).append((name, query))
+
+        for (size, kind), queries in by_size.items():
+            windows = self.windows(size, kind)
+            if not windows:
+                continue
+            scores = _score_matrix([q for _, q in queries], windows)
+            best = scores.argmax(axis=1)
+            for row, (name, _) in enumerate(queries):
+                score = float(scores[row, best[row]])
+                if score > results[name]["score"]:
+                    first = int(best[row])
+                    start = self.spans[first][0]
+                    end = self.spans[first + size - 1][1]
+                    results[name].update(score=score, span=self._span(start, end))
+
+        for result in results.values():
+            threshold = result.pop("_threshold", None)
+            if threshold is not None:
+                result["found"] = result["score"] >= threshold
+            result["score"] = round(result["score"], 1)
+        return results
+
+
+def match_fields(rows_or_text, fields: Dict[str, str], kinds: Optional[Dict[str, str]] = None,
+                 min_score: Optional[float] = None) -> Dict[str, dict]:
+    """One-shot helper: index OCR rows (or plain text) and match ``fields``."""
+    if isinstance(rows_or_text, str):
+        index = FieldIndex(rows_or_text)
+    else:
+        index = FieldIndex.from_rows(rows_or_text)
+    return index.match(fields, kinds=kinds, min_score=min_score)
@@ -0,0 +1,66 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Union
+
+import cv2
+import numpy as np
+
+from app.services.metrics import span
+
+# -------------------------------------------------------------
+# Upload ingestion
+# -------------------------------------------------------------
+# Image uploads are decoded straight from memory into a BGR ndarray (OpenCV
+# channel order) which is what every engine receives. Disk is only touched
+# for inputs whose decoder needs a real path (video via cv2.VideoCapture, PDF
+# pages shared with the process pool), and those temp files are always removed.
+
+IMAGE_EXTS = [".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"]
+VIDEO_EXTS = [".mp4", ".mov", ".avi", ".mkv"]
+PDF_EXTS = [".pdf"]
+
+ImageSource = Union[np.ndarray, bytes, bytearray, memoryview, str, Path]
+
+
+def decode_image(data) -> np.ndarray:
+    """Decode encoded image bytes (png/jpg/...) into a BGR ndarray without touching disk."""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image data")
+    return image
+
+
+def load_image(source: ImageSource) -> np.ndarray:
+    """
+    Return a BGR ndarray for an ndarray, encoded bytes or a file path.
+    Arrays are passed through untouched.
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return decode_image(source)
+    path = Path(source)
+    if not path.exists():
+        raise FileNotFoundError(f"Image not found: {path}")
+    image = cv2.imread(str(path))
+    if image is None:
+        raise FileNotFoundError(f"Failed to load image: {path}")
+    return image
+
+
+@contextmanager
+def temp_path(data: bytes, suffix: str = ""):
+    """Write ``data`` to a temp file for engines that need a path; always deleted on exit."""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with span("temp_write"), os.fdopen(fd, "wb") as tmp:
+            tmp.write(data)
+        yield path
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
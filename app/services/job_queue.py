@@ -0,0 +1,394 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import fitz  # PyMuPDF
+
+from app.services.executor import get_pool
+from app.services.ingest import IMAGE_EXTS, VIDEO_EXTS, PDF_EXTS
+from app.services.metrics import metrics
+
+# -------------------------------------------------------------
+# Durable OCR job queue
+# -------------------------------------------------------------
+# Long PDFs and videos are accepted as jobs and processed in the background
+# so they are not bound to the ingress HTTP timeout. Jobs, and every
+# completed page/frame, are persisted in SQLite as they finish; a job that
+# was interrupted (crash, restart, deploy) is picked up again and continues
+# after its last completed unit instead of starting over.
+#
+#   OCR_JOBS_DIR            SQLite database and stored uploads
+#   OCR_JOB_WORKERS         background worker threads per process
+#   OCR_JOB_HEARTBEAT_S     how often running jobs refresh their heartbeat
+#   OCR_JOB_STALE_S         running jobs without a heartbeat for this long are
+#                           considered abandoned and re-queued
+#   OCR_JOB_MAX_ATTEMPTS    give up on a job after this many (re)starts
+#   OCR_JOB_TTL_S           finished jobs older than this are deleted
+#
+# Several processes (app.serve workers) can share one database: jobs are
+# claimed atomically, and only abandoned jobs are ever taken over.
+
+JOBS_DIR = Path(os.getenv("OCR_JOBS_DIR", "ocr_jobs"))
+JOB_WORKERS = int(os.getenv("OCR_JOB_WORKERS", "1"))
+JOB_HEARTBEAT_S = float(os.getenv("OCR_JOB_HEARTBEAT_S", "10"))
+JOB_STALE_S = float(os.getenv("OCR_JOB_STALE_S", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("OCR_JOB_MAX_ATTEMPTS", "3"))
+JOB_TTL_S = float(os.getenv("OCR_JOB_TTL_S", str(7 * 24 * 3600)))
+
+FINISHED = ("done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    filename TEXT,
+    kind TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    total_units INTEGER,
+    units_done INTEGER NOT NULL DEFAULT 0,
+    last_unit INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_units (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    unit TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    rows TEXT NOT NULL,
+    error TEXT,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+
+def job_kind(suffix: str) -> Optional[str]:
+    if suffix in PDF_EXTS:
+        return "pdf"
+    if suffix in VIDEO_EXTS:
+        return "video"
+    if suffix in IMAGE_EXTS:
+        return "image"
+    return None
+
+
+class JobStore:
+    """SQLite persistence for jobs and their per-unit results."""
+
+    def __init__(self, directory: Path = JOBS_DIR):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.directory / "jobs.db"), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(job_units)")}
+            if "error" not in columns:
+                # Databases created before units carried their render error
+                self._conn.execute("ALTER TABLE job_units ADD COLUMN error TEXT")
+
+    def input_path(self, job_id: str, suffix: str) -> Path:
+        return self.directory / f"{job_id}{suffix}"
+
+    def create(self, data: bytes, filename: str, kind: str, suffix: str, params: dict) -> str:
+        job_id = uuid.uuid4().hex
+        # Written before the row exists, so a queued job always has its input
+        path = self.input_path(job_id, suffix)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, filename, kind, suffix, params, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, filename, kind, suffix, json.dumps(params), now, now),
+            )
+        return job_id
+
+    def claim(self, owner: str) -> Optional[dict]:
+        """Atomically take the oldest queued (or abandoned running) job."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT * FROM jobs WHERE status = 'queued' "
+                        "OR (status = 'running' AND heartbeat < ?) ORDER BY created_at LIMIT 1",
+                        (now - JOB_STALE_S,),
+                    ).fetchone()
+                    if row is None or row["attempts"] < JOB_MAX_ATTEMPTS:
+                        break
+                    # Keeps crashing the worker that runs it: stop retrying
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'failed', owner = NULL, error = ?, updated_at = ? WHERE id = ?",
+                        (f"Gave up after {row['attempts']} attempts", now, row["id"]),
+                    )
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', owner = ?, attempts = attempts + 1, "
+                        "heartbeat = ?, updated_at = ? WHERE id = ?",
+                        (owner, now, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def heartbeat(self, owner: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = 'running'", (now, owner)
+            )
+
+    def set_total(self, job_id: str, total_units: Optional[int]):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET total_units = ? WHERE id = ?", (total_units, job_id))
+
+    def add_unit(self, job_id: str, unit: dict):
+        """Persist one completed page/frame and advance the resume point in one transaction."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._conn.execute(
+                    "SELECT units_done FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()["units_done"]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO job_units (job_id, seq, unit, idx, rows, error) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, seq, unit["unit"], unit["index"], json.dumps(unit["rows"]), unit.get("error")),
+                )
+                self._conn.execute(
+                    "UPDATE jobs SET units_done = ?, last_unit = ?, heartbeat = ?, updated_at = ? WHERE id = ?",
+                    (seq + 1, unit["index"], now, now, job_id),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, owner = NULL, updated_at = ? WHERE id = ?",
+                (status, error, now, job_id),
+            )
+
+    def requeue(self, owner: str):
+        """Hand this process's running jobs back (clean shutdown)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, attempts = MAX(attempts - 1, 0) "
+                "WHERE owner = ? AND status = 'running'",
+                (owner,),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def units(self, job_id: str, after_seq: int = -1, limit: int = 1000):
+        """Completed units with ``seq > after_seq``, in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, unit, idx, rows, error FROM job_units WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, after_seq, limit),
+            ).fetchall()
+        units = []
+        for r in rows:
+            unit = {"seq": r["seq"], "unit": r["unit"], "index": r["idx"], "rows": json.loads(r["rows"])}
+            if r["error"]:
+                unit["error"] = r["error"]
+            units.append(unit)
+        return units
+
+    def prune(self, ttl_s: float = JOB_TTL_S) -> int:
+        cutoff = time.time() - ttl_s
+        with self._lock:
+            ids = [r["id"] for r in self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (cutoff,)
+            )]
+            for job_id in ids:
+                self._conn.execute("DELETE FROM job_units WHERE job_id = ?", (job_id,))
+                self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return len(ids)
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+
+# ---------------- processing ----------------
+def _total_units(job, path):
+    if job["kind"] == "pdf":
+        with fitz.open(str(path)) as document:
+            return document.page_count
+    if job["kind"] == "video":
+        cap = cv2.VideoCapture(str(path))
+        try:
+            frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        finally:
+            cap.release()
+        # Upper bound: duplicate frames are not stored as units
+        return frames // job["params"]["frame_skip"] if frames else None
+    return 1
+
+
+def _iter_job_units(job, path):
+    """Units still to do, starting after the job's last completed page/frame."""
+    # ocr_service pulls in EasyOCR; only import it in processes that run jobs
+    from app.services.ocr_service import iter_image_units, iter_pdf_units, iter_video_units
+
+    params = job["params"]
+    languages = params["languages"]
+    if job["kind"] == "pdf":
+        # Open-ended selection: every page after the last completed one
+        return iter_pdf_units(
+            path.read_bytes(), languages, dpi=params.get("dpi"),
+            use_text_layer=params.get("use_text_layer", True), pages=[-(job["last_unit"] + 1)],
+        )
+    if job["kind"] == "video":
+        return iter_video_units(str(path), languages, frame_skip=params["frame_skip"], start_frame=job["last_unit"])
+    # A single unit: done once it is stored
+    return iter_image_units(path.read_bytes(), languages) if not job["units_done"] else iter(())
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        # Set in start(): the module is imported before app.serve forks its
+        # workers, and each worker must heartbeat/requeue only its own jobs
+        self.owner = None
+        self.store = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def start(self):
+        if self._threads:
+            return
+        self.store = self.store or JobStore()
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop.clear()
+        removed = self.store.prune()
+        if removed:
+            print(f"[Jobs] Pruned {removed} expired jobs")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"ocr-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        beat = threading.Thread(target=self._beat, name="ocr-job-heartbeat", daemon=True)
+        beat.start()
+        self._threads.append(beat)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self.store is not None and self.owner is not None:
+            # Whatever is unfinished resumes in the next process
+            self.store.requeue(self.owner)
+
+    def submit(self, data: bytes, filename: str, kind: str, suffix: str, params: dict) -> str:
+        self.store = self.store or JobStore()
+        job_id = self.store.create(data, filename, kind, suffix, params)
+        self._wake.set()
+        return job_id
+
+    def _beat(self):
+        while not self._stop.wait(JOB_HEARTBEAT_S):
+            try:
+                self.store.heartbeat(self.owner)
+            except sqlite3.Error as e:
+                print(f"[Jobs] Heartbeat failed: {e}")
+
+    def _work(self):
+        while not self._stop.is_set():
+            job = self.store.claim(self.owner)
+            if job is None:
+                # Also polls for jobs queued by other processes
+                self._wake.wait(JOB_HEARTBEAT_S)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        path = self.store.input_path(job["id"], job["suffix"])
+        print(f"[Jobs] {job['id']} {job['kind']} started (attempt {job['attempts'] + 1}, after unit {job['last_unit']})")
+        units = None
+        try:
+            if job["total_units"] is None:
+                self.store.set_total(job["id"], _total_units(job, path))
+            units = _iter_job_units(job, path)
+            # Each unit is OCR'd on the EasyOCR pool, once a worker is idle,
+            # so jobs never add CPU load on top of a busy interactive pool
+            pool = get_pool("easyocr")
+            while True:
+                unit = pool.run_blocking(next, units, None)
+                if unit is None:
+                    break
+                self.store.add_unit(job["id"], unit)
+                if self._stop.is_set():
+                    return  # requeued by stop(); resumes after this unit
+            self.store.finish(job["id"], "done")
+            print(f"[Jobs] {job['id']} done")
+        except Exception as e:
+            if self._stop.is_set():
+                return  # shutting down (engine pool closed); requeued by stop()
+            print(f"[Jobs] {job['id']} failed: {e}")
+            self.store.finish(job["id"], "failed", str(e))
+        finally:
+            close = getattr(units, "close", None)
+            if close is not None:
+                close()
+        job = self.store.get(job["id"])
+        if job is not None and job["status"] in FINISHED:
+            path.unlink(missing_ok=True)
+
+    def stats(self):
+        if self.store is None:
+            return {"workers": self.workers, "running": False}
+        return {"workers": self.workers, "running": bool(self._threads), "jobs": self.store.counts()}
+
+
+job_queue = JobQueue()
+
+
+@metrics.collector
+def _job_metrics():
+    counts = job_queue.store.counts() if job_queue.store is not None else {}
+    yield "ocr_jobs", "gauge", "Background OCR jobs by status (queued = queue depth).", [
+        ({"status": status}, n) for status, n in counts.items()
+    ]
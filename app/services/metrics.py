@@ -0,0 +1,321 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# -------------------------------------------------------------
+# Per-stage latency instrumentation
+# -------------------------------------------------------------
+# Code wraps each stage of a request in ``span("stage")``: upload_read,
+# temp_write, pdf_render, model_acquire, recognize, postprocess, serialize...
+# Every span is observed into a Prometheus histogram labeled by stage,
+# engine, endpoint and input type, and collected per request for the
+# ``Server-Timing`` response header. ``GET /metrics`` serves the Prometheus
+# text format (hand-rolled; prometheus_client is not a dependency):
+#
+#   OCR_METRICS_BUCKETS   histogram buckets in seconds, comma-separated
+#   OCR_SERVER_TIMING=1   add the Server-Timing header to responses
+#
+# The current request and engine live in context variables. The engine
+# pools run jobs inside a copy of the caller's context, so spans recorded on
+# worker threads still land on the request that submitted the job; spans
+# outside any request (background jobs, preload) use endpoint="background".
+# Point-in-time gauges (queue depth, cache state) come from collectors that
+# the owning modules register and that run at scrape time.
+
+BUCKETS = tuple(
+    float(b) for b in os.getenv(
+        "OCR_METRICS_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60"
+    ).split(",") if b.strip()
+)
+SERVER_TIMING = os.getenv("OCR_SERVER_TIMING", "1") != "0"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            samples = list(self._samples())
+        for name, labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield self.name, dict(zip(self.label_names, key)), value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self):
+        for key, (counts, total, count) in self._values.items():
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(float(bound))}, cumulative
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, count
+            yield f"{self.name}_sum", labels, round(total, 6)
+            yield f"{self.name}_count", labels, count
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable[tuple]]):
+        """
+        Register ``fn`` to run at scrape time; it yields
+        ``(name, type, help, [(labels, value), ...])`` for point-in-time gauges.
+        """
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        for metric in metrics:
+            lines.extend(metric.render())
+        for fn in collectors:
+            try:
+                families = list(fn())
+            except Exception as e:  # a broken collector must not break the scrape
+                print(f"[Metrics] Collector {getattr(fn, '__name__', fn)} failed: {e}")
+                continue
+            for name, metric_type, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+REQUESTS = metrics.counter(
+    "ocr_http_requests_total", "HTTP requests by endpoint, method and status.",
+    ("endpoint", "method", "status"),
+)
+REQUEST_SECONDS = metrics.histogram(
+    "ocr_http_request_duration_seconds", "End-to-end request latency.",
+    ("endpoint", "input_type", "engine"),
+)
+STAGE_SECONDS = metrics.histogram(
+    "ocr_stage_duration_seconds", "Latency of one processing stage.",
+    ("stage", "engine", "endpoint", "input_type"),
+)
+UNITS = metrics.counter(
+    "ocr_units_processed_total", "PDF pages and video frames processed.",
+    ("unit", "path", "engine", "endpoint"),
+)
+ERRORS = metrics.counter(
+    "ocr_unit_errors_total", "PDF pages and video frames that failed, by stage (render/ocr).",
+    ("unit", "stage", "engine", "endpoint"),
+)
+
+
+# ---------------- request context ----------------
+class RequestTimings:
+    """Labels and recorded spans of one HTTP request (shared with worker threads)."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.labels = {"input_type": "none", "engine": "none"}
+        self.spans = []  # [(stage, seconds)] in completion order
+        self._lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        # The router stores the matched route in the (shared) scope
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.spans.append((stage, seconds))
+
+    def server_timing(self, total_s: float) -> str:
+        """``stage;dur=<ms>`` entries (repeated stages summed), then ``total``."""
+        with self._lock:
+            spans = list(self.spans)
+        totals, counts = {}, {}
+        for stage, seconds in spans:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+            counts[stage] = counts.get(stage, 0) + 1
+        parts = []
+        for stage, seconds in totals.items():
+            part = f"{stage};dur={seconds * 1000:.1f}"
+            if counts[stage] > 1:
+                part += f';desc="x{counts[stage]}"'
+            parts.append(part)
+        parts.append(f"total;dur={total_s * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_request: ContextVar[Optional[RequestTimings]] = ContextVar("ocr_request", default=None)
+_engine: ContextVar[Optional[str]] = ContextVar("ocr_engine", default=None)
+
+
+def set_engine(engine: str):
+    """Mark the current context as running on ``engine`` (done by the engine pools)."""
+    _engine.set(engine)
+    label_request(engine=engine, overwrite=False)
+
+
+def label_request(overwrite: bool = True, **labels):
+    """Set labels (``input_type``, ``engine``) of the current request, if any."""
+    request = _request.get()
+    if request is None:
+        return
+    for key, value in labels.items():
+        if value is not None and (overwrite or request.labels.get(key) in (None, "none")):
+            request.labels[key] = str(value)
+
+
+def _labels(engine=None):
+    request = _request.get()
+    engine = engine or _engine.get() or (request.labels["engine"] if request else None) or "none"
+    if request is None:
+        return request, {"engine": engine, "endpoint": "background", "input_type": "none"}
+    return request, {"engine": engine, "endpoint": request.endpoint, "input_type": request.labels["input_type"]}
+
+
+@contextmanager
+def span(stage: str, engine: Optional[str] = None):
+    """Time the enclosed block as ``stage`` (histogram + Server-Timing)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        request, labels = _labels(engine)
+        STAGE_SECONDS.observe(elapsed, stage=stage, **labels)
+        if request is not None:
+            request.add(stage, elapsed)
+
+
+def count_units(unit: str, path: str = "ocr", n: int = 1, engine: Optional[str] = None):
+    """Count processed PDF pages (``unit="page"``) or video frames (``unit="frame"``)."""
+    _, labels = _labels(engine)
+    UNITS.inc(n, unit=unit, path=path, engine=labels["engine"], endpoint=labels["endpoint"])
+
+
+def count_error(unit: str, stage: str, engine: Optional[str] = None):
+    """Count a page/frame that failed to ``render`` or to be recognized (``ocr``)."""
+    _, labels = _labels(engine)
+    ERRORS.inc(unit=unit, stage=stage, engine=labels["engine"], endpoint=labels["endpoint"])
+
+
+# ---------------- ASGI middleware ----------------
+class MetricsMiddleware:
+    """Opens the request context, records request metrics and adds Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings(scope)
+        token = _request.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    header = timings.server_timing(time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            endpoint = timings.endpoint
+            REQUESTS.inc(endpoint=endpoint, method=scope.get("method", ""), status=status)
+            REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, **timings.labels)
+            _request.reset(token)
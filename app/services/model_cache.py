@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from app.services.metrics import metrics
+
+# -------------------------------------------------------------
+# Shared model cache (EasyOCR readers, PaddleOCR instances)
+# -------------------------------------------------------------
+# One LRU for every loaded model, bounded by a total memory budget:
+#
+#   MODEL_CACHE_BUDGET_MB=4096      total budget for cached models
+#   MODEL_SIZE_EASYOCR_MB=400       accounted size of one EasyOCR reader
+#   MODEL_SIZE_PADDLEOCR_MB=300     accounted size of one PaddleOCR instance
+#   MODEL_CACHE_SUPERSET_REUSE=0    1: serve ('en',) from a loaded ('en', 'hi') reader
+#                                   (saves a load, but a larger character set
+#                                   can change the output, so off by default)
+#
+# Language keys are normalized (lower-cased, de-duplicated, sorted), so
+# ('en', 'hi') and ('hi', 'en') are the same entry. Sizes are accounted from
+# the configured estimates; the RSS growth observed during each load is kept
+# in the stats for tuning them.
+
+MODEL_CACHE_BUDGET_MB = float(os.getenv("MODEL_CACHE_BUDGET_MB", "4096"))
+SUPERSET_REUSE = os.getenv("MODEL_CACHE_SUPERSET_REUSE", "0") == "1"
+MODEL_SIZE_MB = {
+    "easyocr": float(os.getenv("MODEL_SIZE_EASYOCR_MB", "400")),
+    "paddleocr": float(os.getenv("MODEL_SIZE_PADDLEOCR_MB", "300")),
+}
+
+try:
+    import psutil
+    _PROCESS = psutil.Process()
+except ImportError:  # RSS measurement is informational only
+    _PROCESS = None
+
+
+def normalize_languages(languages: Iterable[str]) -> Tuple[str, ...]:
+    if isinstance(languages, str):
+        languages = [languages]
+    return tuple(sorted({lang.strip().lower() for lang in languages if lang and lang.strip()}))
+
+
+def _rss():
+    return _PROCESS.memory_info().rss if _PROCESS is not None else None
+
+
+class _Entry:
+    __slots__ = ("engine", "languages", "model", "size", "pinned", "hits", "rss_delta", "load_s")
+
+    def __init__(self, engine, languages, model, size, pinned, rss_delta, load_s):
+        self.engine = engine
+        self.languages = languages
+        self.model = model
+        self.size = size
+        self.pinned = pinned
+        self.hits = 0
+        self.rss_delta = rss_delta
+        self.load_s = load_s
+
+
+class ModelCache:
+    def __init__(self, budget_mb: float = MODEL_CACHE_BUDGET_MB, superset_reuse: bool = SUPERSET_REUSE):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.superset_reuse = superset_reuse
+        self._entries = OrderedDict()  # (engine, languages) -> _Entry, LRU order
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._stats = {"hits": 0, "superset_hits": 0, "misses": 0, "loads": 0, "evictions": 0, "load_s": 0.0}
+
+    def _lookup(self, engine, languages, allow_superset):
+        key = (engine, languages)
+        entry = self._entries.get(key)
+        if entry is None and allow_superset and self.superset_reuse:
+            wanted = set(languages)
+            # Smallest loaded superset is the closest match
+            candidates = [
+                e for (eng, langs), e in self._entries.items()
+                if eng == engine and wanted <= set(langs)
+            ]
+            if candidates:
+                entry = min(candidates, key=lambda e: len(e.languages))
+                self._stats["superset_hits"] += 1
+        elif entry is not None:
+            self._stats["hits"] += 1
+        if entry is not None:
+            entry.hits += 1
+            self._entries.move_to_end((entry.engine, entry.languages))
+        return entry
+
+    def _make_room(self, size):
+        """Evict least recently used, unpinned models until ``size`` more bytes fit."""
+        for key in list(self._entries):
+            if self._bytes + size <= self.budget:
+                break
+            entry = self._entries[key]
+            if entry.pinned:
+                continue
+            del self._entries[key]
+            self._bytes -= entry.size
+            self._stats["evictions"] += 1
+            print(f"[ModelCache] Evicted {entry.engine}:{'+'.join(entry.languages)}")
+
+    def get(self, engine: str, languages, loader: Callable[[Tuple[str, ...]], Any],
+            allow_superset: bool = True, pin: bool = False, size_mb: Optional[float] = None) -> Any:
+        """
+        Return a cached model for ``engine``/``languages``, loading it with
+        ``loader(normalized_languages)`` on a miss.
+        """
+        languages = normalize_languages(languages)
+        with self._lock:
+            entry = self._lookup(engine, languages, allow_superset)
+            if entry is not None:
+                entry.pinned = entry.pinned or pin
+                return entry.model
+            load_lock = self._load_locks.setdefault((engine, languages), threading.Lock())
+
+        with load_lock:
+            # Another thread may have loaded it while we waited
+            with self._lock:
+                entry = self._entries.get((engine, languages))
+                if entry is not None:
+                    entry.hits += 1
+                    self._stats["hits"] += 1
+                    self._entries.move_to_end((engine, languages))
+                    return entry.model
+                self._stats["misses"] += 1
+                size = int((size_mb or MODEL_SIZE_MB.get(engine, 256)) * 1024 * 1024)
+                self._make_room(size)
+
+            rss_before = _rss()
+            t0 = time.perf_counter()
+            model = loader(languages)
+            load_s = time.perf_counter() - t0
+            rss_after = _rss()
+            rss_delta = rss_after - rss_before if rss_before is not None else None
+
+            with self._lock:
+                self._make_room(size)
+                self._entries[(engine, languages)] = _Entry(engine, languages, model, size, pin, rss_delta, load_s)
+                self._bytes += size
+                self._stats["loads"] += 1
+                self._stats["load_s"] += load_s
+                self._load_locks.pop((engine, languages), None)
+            print(f"[ModelCache] Loaded {engine}:{'+'.join(languages)} in {load_s:.2f}s")
+            return model
+
+    def evict(self, engine: str, languages) -> bool:
+        languages = normalize_languages(languages)
+        with self._lock:
+            entry = self._entries.pop((engine, languages), None)
+            if entry is None:
+                return False
+            self._bytes -= entry.size
+            self._stats["evictions"] += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "load_s": round(self._stats["load_s"], 3),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget,
+                "models": [
+                    {
+                        "engine": e.engine,
+                        "languages": list(e.languages),
+                        "size_bytes": e.size,
+                        "rss_delta_bytes": e.rss_delta,
+                        "load_s": round(e.load_s, 3),
+                        "hits": e.hits,
+                        "pinned": e.pinned,
+                    }
+                    for e in self._entries.values()
+                ],
+            }
+
+
+model_cache = ModelCache()
+
+
+@metrics.collector
+def _model_cache_metrics():
+    stats = model_cache.stats()
+    yield "ocr_model_cache_bytes", "gauge", "Accounted size of cached models.", [({}, stats["bytes"])]
+    yield "ocr_model_cache_budget_bytes", "gauge", "Model cache memory budget.", [({}, stats["budget_bytes"])]
+    loaded = {}
+    for model in stats["models"]:
+        loaded[model["engine"]] = loaded.get(model["engine"], 0) + 1
+    yield "ocr_model_cache_models", "gauge", "Models currently loaded.", [({"engine": e}, n) for e, n in loaded.items()]
+    yield "ocr_model_cache_events_total", "counter", "Model cache lookups and loads by outcome.", [
+        ({"event": event}, stats[event]) for event in ("hits", "superset_hits", "misses", "loads", "evictions")
+    ]
+    yield "ocr_model_load_seconds_total", "counter", "Time spent loading models.", [({}, stats["load_s"])]
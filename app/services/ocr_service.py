@@ -1,30 +1,68 @@
 import easyocr
-# Cache for EasyOCR Reader objects by language tuple
-_EASYOCR_READERS = {}
-
-def get_easyocr_reader(languages, gpu=False):
-    key = tuple(languages)
-    if key not in _EASYOCR_READERS:
-        _EASYOCR_READERS[key] = easyocr.Reader(languages, gpu=gpu)
-    return _EASYOCR_READERS[key]
+from app.services.model_cache import model_cache, MODEL_SIZE_MB
+
+# EasyOCR Reader objects live in the shared, memory-bounded model cache:
+# language order doesn't matter and a loaded superset reader is reused.
+def get_easyocr_reader(languages, gpu=False, pin=False):
+    with span("model_acquire", engine="easyocr"):
+        return model_cache.get(
+            "easyocr" if not gpu else "easyocr-gpu",
+            languages,
+            lambda langs: easyocr.Reader(list(langs), gpu=gpu),
+            pin=pin,
+            size_mb=MODEL_SIZE_MB["easyocr"],
+        )
 import ssl
+import os
 import re
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import cv2
 import numpy as np
 from pathlib import Path
-from pdf2image import convert_from_path
-from datetime import datetime
+import fitz  # PyMuPDF
+import time
+from app.services.ingest import load_image
+from app.services.metrics import span, count_units, count_error
+from app.services.pdf_service import extract_text_layer, iter_rendered_pages, render_page, TextLayer
+from app.services.batcher import MicroBatcher
+from app.services.resolution import backproject_bbox, normalize_resolution
+from app.services.tiling import should_tile, ocr_tiled
+from app.services.deadlines import check_cancelled, RequestCancelled
 # Fix SSL certificate verification issue on macOS
 ssl._create_default_https_context = ssl._create_unverified_context
 
 
+# -------------------------------------------------------------
+# Batched recognition
+# -------------------------------------------------------------
+def _readtext_batch(key, images):
+    reader, _shape = key
+    if len(images) == 1:
+        return [reader.readtext(images[0])]
+    # readtext_batched needs equally sized inputs, hence the shape in the key
+    return reader.readtext_batched(images)
+
+
+_EASYOCR_BATCHER = MicroBatcher("easyocr", _readtext_batch)
+
+
+def readtext(reader, image_rgb):
+    """reader.readtext(), coalesced with concurrent calls on the same reader when batching is on."""
+    with span("recognize", engine="easyocr"):
+        return _EASYOCR_BATCHER((reader, image_rgb.shape), image_rgb)
+
+
 # -------------------------------------------------------------
 # Utility: English text filtering
 # -------------------------------------------------------------
+_ENGLISH_RE = re.compile(r'^[a-zA-Z0-9\s\.\,\!\?\-\:\;\'\"\/\(\)\@\#\$\%\&\*\+\=\_]+$')
+
+
 def is_english(text):
     """Check if a string contains only English-like characters."""
-    pattern = re.compile(r'^[a-zA-Z0-9\s\.\,\!\?\-\:\;\'\"\/\(\)\@\#\$\%\&\*\+\=\_]+$')
-    return bool(pattern.match(text))
+    return bool(_ENGLISH_RE.match(text))
 
 
 def contains_english_words(text):
@@ -36,6 +74,9 @@ def contains_english_words(text):
 
 def filter_english_only(text):
     """Remove non-English characters but keep valid English words."""
+    # Fast path: the whole string is English-like, only whitespace changes
+    if _ENGLISH_RE.match(text):
+        return ' '.join(text.split())
     words = text.split()
     english_words = [
         ''.join(char for char in w if char.isascii())
@@ -45,6 +86,14 @@ def filter_english_only(text):
     return ' '.join(w.strip() for w in english_words if w.strip())
 
 
+def filter_english_bulk(texts):
+    """filter_english_only over a list; repeated strings (video frames) are filtered once."""
+    unique = {text: None for text in texts}
+    for text in unique:
+        unique[text] = filter_english_only(text)
+    return [unique[text] for text in texts]
+
+
 # -------------------------------------------------------------
 # Utility: Clean numpy types for JSON serialization
 # -------------------------------------------------------------
@@ -60,47 +109,75 @@ def clean_numpy_types(obj):
         return obj
 
 
+def rows_from_readtext(results, scale=1.0, **fields):
+    """
+    Turn EasyOCR ``(bbox, text, confidence)`` triples into result rows.
+    Boxes and confidences are converted in bulk with numpy (boxes mapped back
+    by ``scale``), so rows hold native Python types and need no
+    clean_numpy_types pass. ``fields`` (e.g. page/frame) are added to every row.
+    """
+    if not results:
+        return []
+    with span("postprocess"):
+        bboxes, texts, confidences = zip(*results)
+        boxes = backproject_bbox(np.asarray(bboxes, dtype=np.float64).reshape(len(results), 4, 2), scale)
+        confidences = np.round(np.asarray(confidences, dtype=np.float64), 2).tolist()
+        return [
+            {**fields, "text": text, "confidence": confidence, "bbox": bbox}
+            for text, confidence, bbox in zip(filter_english_bulk(texts), confidences, boxes)
+        ]
+
+
+def _readtext_rows(reader, image_rgb, scale=1.0, tile=None, **fields):
+    """
+    readtext() -> rows; large images are read as overlapping tiles in parallel
+    (see services.tiling). Returns (rows, tiling report or None).
+    """
+    if not should_tile(image_rgb, tile):
+        return rows_from_readtext(readtext(reader, image_rgb), scale, **fields), None
+    rows, report = ocr_tiled(image_rgb, lambda tile_rgb: rows_from_readtext(readtext(reader, tile_rgb)))
+    for row in rows:
+        row["bbox"] = backproject_bbox(row["bbox"], scale)
+    return [{**fields, **row} for row in rows], report
+
+
 # -------------------------------------------------------------
 # OCR from Image
 # -------------------------------------------------------------
-def extract_text_from_image(image_path: str, languages=['en']):
+def extract_text_from_image(image, languages=['en'], scale=None, tile=None):
     """
     Extract text from an image using EasyOCR.
+    The image is rescaled so text lands at EasyOCR's preferred height;
+    bounding boxes are reported in original image coordinates.
     Args:
-        image_path (str): Path to image file
+        image: BGR ndarray, encoded image bytes or path to image file
         languages (list): OCR language codes (default: ['en'])
+        scale (float): Override the automatically chosen scale factor
+        tile (bool): Read large images as overlapping tiles (None: automatic)
     Returns:
         list: OCR results with text, confidence, and bounding boxes
     """
     
     try:
-        start_time = datetime.now()
-        image_path1="image.png"
-        print("1",datetime.now())
+        start_time = time.perf_counter()
+        with span("decode"):
+            image_bgr = load_image(image)
+        with span("resize"):
+            image_bgr, resolution = normalize_resolution(image_bgr, "easyocr", scale=scale)
         reader = get_easyocr_reader(languages, gpu=False)
-        print("2",datetime.now())
-        results = reader.readtext(image_path1)
-        print("3",datetime.now())
-        end_time = datetime.now()
-        print("4",datetime.now())
-        extracted = []
-        for (bbox, text, confidence) in results:
-            cleaned = filter_english_only(text)
-            bbox_py = [[float(x), float(y)] for (x, y) in np.array(bbox).tolist()]
-            extracted.append({
-                "text": cleaned,
-                "confidence": round(float(confidence), 2),
-                "bbox": bbox_py
-            })
-
-        print("5",datetime.now())
-        time_taken = (end_time - start_time).total_seconds()
-        print("Time taken to process image OCR: ", time_taken, "seconds")
-
-        return {
-            "results": clean_numpy_types(extracted),
+        extracted, tiling = _readtext_rows(
+            reader, cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB), resolution["scale"], tile=tile
+        )
+        time_taken = time.perf_counter() - start_time
+
+        response = {
+            "results": extracted,
+            "resolution": resolution,
             "time_taken": time_taken
         }
+        if tiling is not None:
+            response["tiling"] = tiling
+        return response
     except Exception as e:
         raise RuntimeError(f"OCR image processing failed: {str(e)}")
 
@@ -108,51 +185,183 @@ def extract_text_from_image(image_path: str, languages=['en']):
 # -------------------------------------------------------------
 # OCR from Video
 # -------------------------------------------------------------
-def extract_text_from_video(video_path: str, languages=['en'], frame_skip=10):
+# Frames whose 64-bit difference hash is within this Hamming distance of the
+# last OCR'd frame are treated as duplicates and not OCR'd again.
+VIDEO_DEDUP_DISTANCE = int(os.getenv("OCR_VIDEO_DEDUP_DISTANCE", "4"))
+# A text span stays open across gaps of up to this many sampled frames
+VIDEO_SPAN_GAP_SAMPLES = int(os.getenv("OCR_VIDEO_SPAN_GAP_SAMPLES", "2"))
+
+
+def frame_dhash(frame) -> int:
+    """64-bit difference hash of a BGR frame (cheap near-duplicate check)."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _normalize_span_text(text):
+    return " ".join(text.lower().split())
+
+
+class _SpanTracker:
+    """Folds per-frame OCR rows into text spans with first/last frame."""
+
+    def __init__(self, max_gap):
+        self.max_gap = max_gap
+        self.spans = []
+        self._open = {}  # normalized text -> span
+        self._last_seen = []  # spans recognized on the last OCR'd frame
+
+    def add_frame(self, frame_no, rows):
+        self._last_seen = []
+        for row in rows:
+            key = _normalize_span_text(row["text"])
+            if not key:
+                continue
+            text_span = self._open.get(key)
+            if text_span is None or frame_no - text_span["last_frame"] > self.max_gap:
+                text_span = {
+                    "text": row["text"],
+                    "first_frame": frame_no,
+                    "last_frame": frame_no,
+                    "occurrences": 0,
+                    "confidence": row["confidence"],
+                    "bbox": row["bbox"],
+                }
+                self.spans.append(text_span)
+                self._open[key] = text_span
+            text_span["last_frame"] = frame_no
+            text_span["occurrences"] += 1
+            if row["confidence"] > text_span["confidence"]:
+                text_span["confidence"] = row["confidence"]
+                text_span["bbox"] = row["bbox"]
+            self._last_seen.append(text_span)
+
+    def extend(self, frame_no):
+        """A duplicate frame: whatever was visible is still visible."""
+        for text_span in self._last_seen:
+            text_span["last_frame"] = frame_no
+
+
+def _iter_video_samples(cap, frame_skip, dedup, stats, start_frame=0):
+    """
+    Yield ``(frame_no, frame)`` for every nth frame of ``cap``; ``frame`` is
+    None for near-duplicates of the last yielded frame. Skipped frames are
+    only grabbed (never retrieved/converted). Counters go into ``stats``.
+    Frames up to ``start_frame`` are grabbed past without being sampled.
+    """
+    last_hash = None
+    while stats["frames_read"] < start_frame:
+        if not cap.grab():
+            return
+        stats["frames_read"] += 1
+    while True:
+        # grab() advances without retrieving/converting the frame
+        if not cap.grab():
+            break
+
+        stats["frames_read"] += 1
+        frame_no = stats["frames_read"]
+        if frame_no % frame_skip != 0:
+            continue
+
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+        stats["frames_sampled"] += 1
+
+        if dedup:
+            frame_hash = frame_dhash(frame)
+            if last_hash is not None and (frame_hash ^ last_hash).bit_count() <= VIDEO_DEDUP_DISTANCE:
+                stats["frames_duplicate"] += 1
+                count_units("frame", "duplicate", engine="easyocr")
+                yield frame_no, None
+                continue
+            last_hash = frame_hash
+        yield frame_no, frame
+
+
+def _ocr_video_frame(reader, frame_no, frame):
+    count_units("frame", engine="easyocr")
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    return rows_from_readtext(readtext(reader, frame_rgb), frame=int(frame_no))
+
+
+def _open_video(video_path):
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video: {video_path}")
+    return cap
+
+
+def extract_text_from_video(video_path: str, languages=['en'], frame_skip=10, mode="frames", dedup=True):
     """
     Extract text from a video by running OCR on every nth frame.
+    Skipped frames are only grabbed (never retrieved/converted), and sampled
+    frames that are near-duplicates of the last OCR'd frame are not OCR'd.
     Args:
         video_path (str): Path to video file
         languages (list): OCR language codes
         frame_skip (int): Number of frames to skip between OCR reads
+        mode (str): "frames" for per-frame rows, "spans" for deduplicated
+            text spans with first/last frame
+        dedup (bool): Skip OCR on near-duplicate frames
     Returns:
-        list: OCR results for each processed frame
+        dict: OCR rows (or spans) and frame statistics
     """
     try:
+        if mode not in ("frames", "spans"):
+            raise ValueError(f"Unknown video mode: {mode}")
         reader = get_easyocr_reader(languages, gpu=False)
-        cap = cv2.VideoCapture(video_path)
+        cap = _open_video(video_path)
 
-        if not cap.isOpened():
-            raise RuntimeError(f"Cannot open video: {video_path}")
-
-        frame_count = 0
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        stats = {"frames_read": 0, "frames_sampled": 0, "frames_duplicate": 0}
         results = []
+        tracker = _SpanTracker(max_gap=frame_skip * VIDEO_SPAN_GAP_SAMPLES)
+        truncated = None
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            frame_count += 1
-            if frame_count % frame_skip != 0:
+        for frame_no, frame in _iter_video_samples(cap, frame_skip, dedup, stats):
+            if frame is None:
+                tracker.extend(frame_no)
                 continue
+            # Sampled frames left, estimated from the container's frame count
+            truncated = check_cancelled("frame", remaining=max(1, (frame_count - frame_no) // frame_skip + 1))
+            if truncated:
+                break
+            frame_rows = _ocr_video_frame(reader, frame_no, frame)
+            if mode == "spans":
+                tracker.add_frame(frame_no, frame_rows)
+            else:
+                results.extend(frame_rows)
 
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            ocr_results = reader.readtext(frame_rgb)
+        cap.release()
 
-            for (bbox, text, confidence) in ocr_results:
-                cleaned = filter_english_only(text)
-                bbox_py = [[float(x), float(y)] for (x, y) in np.array(bbox).tolist()]
-                results.append({
-                    "frame": int(frame_count),
-                    "text": cleaned,
-                    "confidence": round(float(confidence), 2),
-                    "bbox": bbox_py
-                })
+        if mode == "spans":
+            results = tracker.spans
+            if fps:
+                for text_span in results:
+                    text_span["start_time"] = round(text_span["first_frame"] / fps, 3)
+                    text_span["end_time"] = round(text_span["last_frame"] / fps, 3)
 
-        cap.release()
-        return clean_numpy_types(results)
+        response = {
+            "results": results,
+            "stats": {
+                "frames_read": stats["frames_read"],
+                "frames_sampled": stats["frames_sampled"],
+                "frames_ocr": stats["frames_sampled"] - stats["frames_duplicate"] - bool(truncated),
+                "frames_duplicate": stats["frames_duplicate"],
+                "fps": fps,
+            }
+        }
+        if truncated:
+            response["truncated"] = truncated
+        return response
 
+    except RequestCancelled:
+        raise
     except Exception as e:
         raise RuntimeError(f"OCR video processing failed: {str(e)}")
 
@@ -160,36 +369,290 @@ def extract_text_from_video(video_path: str, languages=['en'], frame_skip=10):
 # -------------------------------------------------------------
 # OCR from PDF
 # -------------------------------------------------------------
-def extract_text_from_pdf(pdf_path: str, languages=['en']):
+# Pages are rendered lazily with PyMuPDF (in-process, the next page ahead of
+# the one being OCR'd), so peak memory depends on the number of pages in
+# flight, not on the page count:
+#   OCR_PDF_DPI               default render resolution
+#   OCR_PDF_WORKERS           >1 renders + OCRs pages in a process pool
+#   OCR_PDF_PAGES_IN_FLIGHT   max pages submitted to the pool at once
+PDF_DPI = int(os.getenv("OCR_PDF_DPI", "300"))
+PDF_WORKERS = int(os.getenv("OCR_PDF_WORKERS", "1"))
+PDF_PAGES_IN_FLIGHT = int(os.getenv("OCR_PDF_PAGES_IN_FLIGHT", str(max(1, PDF_WORKERS))))
+
+_PDF_POOL = None
+_PDF_POOL_LOCK = threading.Lock()
+
+
+def _ocr_pdf_page_image(reader, page_num, image_np, tile=None):
+    count_units("page", engine="easyocr")
+    # image_np is RGB here; the estimate only needs intensity so the channel order is irrelevant
+    with span("resize"):
+        image_np, resolution = normalize_resolution(image_np, "easyocr")
+    rows, _tiling = _readtext_rows(reader, image_np, resolution["scale"], tile=tile, page=int(page_num))
+    for row in rows:
+        row["source"] = "ocr"
+    return rows
+
+
+def _init_pdf_worker(threads):
+    """Keep each pool worker's intra-op threads within its share of the CPU."""
+    import torch
+    torch.set_num_threads(max(1, threads))
+    cv2.setNumThreads(max(1, threads))
+
+
+def _ocr_pdf_page_worker(pdf_path, page_num, dpi, languages, tile=None):
+    """
+    Process-pool task: render and OCR a single page inside the worker.
+    A render failure is returned (not raised), like iter_rendered_pages does.
+    """
+    reader = get_easyocr_reader(languages, gpu=False)
+    try:
+        with fitz.open(pdf_path) as document:
+            image_np = cv2.cvtColor(render_page(document[page_num - 1], dpi=dpi), cv2.COLOR_BGR2RGB)
+    except Exception as e:
+        return e
+    return _ocr_pdf_page_image(reader, page_num, image_np, tile=tile)
+
+
+def _get_pdf_pool():
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None:
+            threads = (os.cpu_count() or 1) // PDF_WORKERS
+            _PDF_POOL = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pdf_worker,
+                initargs=(threads,),
+            )
+        return _PDF_POOL
+
+
+def shutdown_pdf_pool():
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        pool, _PDF_POOL = _PDF_POOL, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_pdf_results_parallel(pdf_path, dpi, languages, page_numbers, max_in_flight, tile=None):
+    """
+    Yield ``(page_num, rows, error)`` in page order, keeping at most
+    ``max_in_flight`` pages submitted. ``error`` is None or ``(stage, message)``
+    for a page that failed to render or recognize; the other pages go on.
+    """
+    pool = _get_pdf_pool()
+    pending = {}
+    ready = {}
+    to_submit = list(page_numbers)
+    to_yield = list(page_numbers)
+    try:
+        while to_yield:
+            while to_submit and len(pending) + len(ready) < max_in_flight:
+                page_num = to_submit.pop(0)
+                pending[pool.submit(_ocr_pdf_page_worker, pdf_path, page_num, dpi, languages, tile)] = page_num
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page_num = pending.pop(future)
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    ready[page_num] = ([], ("ocr", str(e)))
+                    continue
+                if isinstance(rows, Exception):
+                    ready[page_num] = ([], ("render", str(rows)))
+                else:
+                    ready[page_num] = (rows, None)
+            while to_yield and to_yield[0] in ready:
+                page_num = to_yield.pop(0)
+                yield (page_num, *ready.pop(page_num))
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _text_layer_rows(page_num, layer):
+    count_units("page", "text_layer", engine="easyocr")
+    texts = filter_english_bulk([word["text"] for word in layer.words])
+    return [
+        {
+            "page": int(page_num),
+            "text": text,
+            "confidence": word["confidence"],
+            "bbox": word["bbox"],
+            "source": "text_layer",
+        }
+        for text, word in zip(texts, layer.words)
+    ]
+
+
+def extract_text_from_pdf(pdf_path: str, languages=['en'], dpi=None, workers=None, max_pages_in_flight=None,
+                          use_text_layer=True, tile=None):
     """
     Extract text from each page of a PDF using EasyOCR.
+    Pages with a usable embedded text layer are read directly (no OCR);
+    only image-only or mixed pages are rendered and OCR'd.
     Args:
         pdf_path (str): Path to PDF file
         languages (list): OCR language codes
+        dpi (int): Render resolution (default: OCR_PDF_DPI)
+        workers (int): >1 to OCR pages in the process pool (default: OCR_PDF_WORKERS)
+        max_pages_in_flight (int): Cap on pages rendered/being OCR'd at once
+        use_text_layer (bool): Read born-digital pages from their text layer
+        tile (bool): Read large pages as overlapping tiles (None: automatic)
     Returns:
-        list: OCR results for each page
+        dict: OCR results for each page, the path each page took and time taken;
+        pages that fail to render (or, in the process pool, to recognize) get
+        path "error" and are listed under ``errors``
     """
     try:
-        # Convert PDF pages to images
-        pages = convert_from_path(pdf_path, dpi=300)
-        reader = get_easyocr_reader(languages, gpu=False)
+        start_time = time.perf_counter()
+        dpi = dpi or PDF_DPI
+        workers = PDF_WORKERS if workers is None else workers
         results = []
+        page_paths = {}
 
-        for page_num, page in enumerate(pages, start=1):
-            image_np = np.array(page)
-            ocr_results = reader.readtext(image_np)
+        # Text-layer pass: cheap, no rendering
+        with fitz.open(pdf_path) as document:
+            page_count = document.page_count
+            for page_num in range(1, page_count + 1):
+                layer = None
+                if use_text_layer:
+                    with span("text_layer"):
+                        layer = extract_text_layer(document[page_num - 1], dpi=dpi)
+                if layer is not None:
+                    results.extend(_text_layer_rows(page_num, layer))
+                    page_paths[page_num] = "text_layer"
+                else:
+                    page_paths[page_num] = "ocr"
+        ocr_pages = [page_num for page_num, path in page_paths.items() if path == "ocr"]
+        done_pages = set()
+        errors = []
+        truncated = None
 
-            for (bbox, text, confidence) in ocr_results:
-                cleaned = filter_english_only(text)
-                bbox_py = [[float(x), float(y)] for (x, y) in np.array(bbox).tolist()]
-                results.append({
-                    "page": int(page_num),
-                    "text": cleaned,
-                    "confidence": round(float(confidence), 2),
-                    "bbox": bbox_py
-                })
+        if ocr_pages and workers > 1:
+            max_in_flight = max_pages_in_flight or PDF_PAGES_IN_FLIGHT
+            page_iter = _iter_pdf_results_parallel(pdf_path, dpi, list(languages), ocr_pages, max_in_flight, tile)
+            try:
+                for page_num, page_results, error in page_iter:
+                    if error is not None:
+                        stage, message = error
+                        count_error("page", stage, engine="easyocr")
+                        errors.append({"page": page_num, "stage": stage, "error": message})
+                        page_paths[page_num] = "error"
+                    results.extend(page_results)
+                    done_pages.add(page_num)
+                    if len(done_pages) < len(ocr_pages):
+                        # Closing the iterator cancels the pages not yet started
+                        truncated = check_cancelled("page", remaining=len(ocr_pages) - len(done_pages))
+                        if truncated:
+                            break
+            finally:
+                page_iter.close()
+        elif ocr_pages:
+            reader = get_easyocr_reader(languages, gpu=False)
+            # The next page renders while this one is OCR'd; at most max_in_flight wait in memory
+            page_iter = iter_rendered_pages(
+                Path(pdf_path).read_bytes(), ocr_pages, dpi=dpi,
+                max_in_flight=max_pages_in_flight or PDF_PAGES_IN_FLIGHT, engine="easyocr",
+            )
+            try:
+                for i, (page_num, page_img, _render_s, _page_dpi) in enumerate(page_iter):
+                    truncated = check_cancelled("page", remaining=len(ocr_pages) - i)
+                    if truncated:
+                        break
+                    if isinstance(page_img, Exception):
+                        count_error("page", "render", engine="easyocr")
+                        errors.append({"page": page_num, "stage": "render", "error": str(page_img)})
+                        page_paths[page_num] = "error"
+                    else:
+                        image_np = cv2.cvtColor(page_img, cv2.COLOR_BGR2RGB)
+                        results.extend(_ocr_pdf_page_image(reader, page_num, image_np, tile=tile))
+                    done_pages.add(page_num)
+            finally:
+                page_iter.close()
 
-        return clean_numpy_types(results)
+        results.sort(key=lambda item: item["page"])
+        time_taken = time.perf_counter() - start_time
 
+        pages = []
+        for page_num, path in sorted(page_paths.items()):
+            if truncated and path == "ocr" and page_num not in done_pages:
+                path = "skipped"
+            pages.append({"page": page_num, "path": path})
+
+        response = {
+            "results": results,
+            "pages": pages,
+            "time_taken": time_taken
+        }
+        if truncated:
+            response["truncated"] = truncated
+        if errors:
+            response["errors"] = errors
+        return response
+
+    except RequestCancelled:
+        raise
     except Exception as e:
         raise RuntimeError(f"OCR PDF processing failed: {str(e)}")
+
+
+
+# -------------------------------------------------------------
+# Streaming text units
+# -------------------------------------------------------------
+# Generators yielding one recognized unit at a time as
+# ``{"unit": "image" | "page" | "frame", "index": n, "rows": [...]}`` so a
+# consumer can stop as soon as it has what it needs; closing the generator
+# stops rendering/decoding of the remaining input.
+
+def iter_image_units(image, languages=['en'], scale=None):
+    result = extract_text_from_image(image, languages, scale=scale)
+    yield {"unit": "image", "index": 1, "rows": result["results"]}
+
+
+def iter_pdf_units(data: bytes, languages=['en'], dpi=None, use_text_layer=True, max_in_flight=None, pages=None):
+    """
+    PDF pages in order from memory (``pages``: 1-based selection, default all);
+    text-layer pages cost no OCR, the next page renders ahead. A page that
+    fails to render is yielded with no rows and its ``error``.
+    """
+    reader = None
+    page_iter = iter_rendered_pages(
+        data, pages, dpi=dpi, max_in_flight=max_in_flight or PDF_PAGES_IN_FLIGHT,
+        use_text_layer=use_text_layer, engine="easyocr",
+    )
+    try:
+        for page_num, page_img, _render_s, _page_dpi in page_iter:
+            if isinstance(page_img, Exception):
+                count_error("page", "render", engine="easyocr")
+                yield {"unit": "page", "index": page_num, "rows": [], "error": str(page_img)}
+                continue
+            if isinstance(page_img, TextLayer):
+                rows = _text_layer_rows(page_num, page_img)
+            else:
+                reader = reader or get_easyocr_reader(languages, gpu=False)
+                rows = _ocr_pdf_page_image(reader, page_num, cv2.cvtColor(page_img, cv2.COLOR_BGR2RGB))
+            yield {"unit": "page", "index": page_num, "rows": rows}
+    finally:
+        page_iter.close()
+
+
+def iter_video_units(video_path: str, languages=['en'], frame_skip=10, dedup=True, start_frame=0):
+    """
+    Sampled frames in order, after ``start_frame``; near-duplicate frames carry
+    no new text and are not yielded.
+    """
+    reader = get_easyocr_reader(languages, gpu=False)
+    cap = _open_video(video_path)
+    stats = {"frames_read": 0, "frames_sampled": 0, "frames_duplicate": 0}
+    try:
+        for frame_no, frame in _iter_video_samples(cap, frame_skip, dedup, stats, start_frame=start_frame):
+            if frame is None:
+                continue
+            yield {"unit": "frame", "index": frame_no, "rows": _ocr_video_frame(reader, frame_no, frame)}
+    finally:
+        cap.release()
@@ -1,31 +1,220 @@
-from paddleocr import PaddleOCR
+import os
+import threading
+import time
+import weakref
+import numpy as np
+from app.services.ingest import load_image
+from app.services.metrics import span, count_units, count_error
+from app.services.model_cache import model_cache
+from app.services.pdf_service import iter_rendered_pages, open_pdf, resolve_pages, TextLayer
+from app.services.batcher import MicroBatcher
+from app.services.resolution import backproject_bbox, normalize_resolution
+from app.services.tiling import should_tile, ocr_tiled
+from app.services.deadlines import check_cancelled
 
 # ------------------------------
-# Load OCR Once (Huge Speed Boost)
+# Load OCR Once per language (Huge Speed Boost)
 # ------------------------------
-ocr = PaddleOCR(lang='en')
+# Models are built on first use (or preloaded by the engine registry at
+# startup), never at import time, and live in the shared model cache.
+def _load_paddle_ocr(langs):
+    from paddleocr import PaddleOCR
+    cpu_threads = os.getenv("PADDLE_CPU_THREADS")
+    if cpu_threads:
+        return PaddleOCR(lang=langs[0], cpu_threads=int(cpu_threads))
+    return PaddleOCR(lang=langs[0])
 
-def paddle_ocr_and_annotate(img_path: str, ocr=None):
+
+def get_paddle_ocr(lang='en', pin=False):
+    """Shared PaddleOCR instance for ``lang``."""
+    # A PaddleOCR model serves exactly one language: no superset reuse
+    with span("model_acquire", engine="paddleocr"):
+        return model_cache.get("paddleocr", [lang], _load_paddle_ocr, allow_superset=False, pin=pin)
+
+
+# Paddle inference predictors are not thread-safe: predict() calls on one
+# instance are serialized, whichever thread (pool, batcher, tile) makes them
+_PREDICT_LOCKS = weakref.WeakKeyDictionary()
+_PREDICT_LOCKS_GUARD = threading.Lock()
+
+
+def _predict_lock(ocr) -> threading.Lock:
+    with _PREDICT_LOCKS_GUARD:
+        lock = _PREDICT_LOCKS.get(ocr)
+        if lock is None:
+            lock = _PREDICT_LOCKS[ocr] = threading.Lock()
+        return lock
+
+
+def _predict_batch(ocr, images):
+    # predict() takes a list and returns one result per input image
+    with _predict_lock(ocr):
+        return list(ocr.predict(images if len(images) > 1 else images[0]))
+
+
+_PADDLE_BATCHER = MicroBatcher("paddleocr", _predict_batch)
+
+
+def _rows_from_result(result):
+    """One predict() result -> rows with text, score and detection polygon."""
+    return [
+        {"text": text, "confidence": round(float(score), 4), "bbox": np.asarray(poly, dtype=np.float64).tolist()}
+        for text, score, poly in zip(result['rec_texts'], result.get('rec_scores', []), result.get('rec_polys', []))
+    ]
+
+
+def _predict_rows(ocr, img):
+    with span("recognize", engine="paddleocr"):
+        return _rows_from_result(_PADDLE_BATCHER(ocr, img))
+
+
+def _predict_tile_rows(ocr, tiles):
+    # All tiles in one predict() call on this thread: the model is never shared across threads
+    with span("recognize", engine="paddleocr"):
+        return [_rows_from_result(result) for result in _predict_batch(ocr, tiles)]
+
+
+def paddle_ocr_and_annotate(image, ocr=None, lang='hi', scale=None, normalize=True, tile=None):
     """
     FAST PaddleOCR extraction using predict() 
     Compatible with PaddleOCR 3.3.1
-    Returns ONLY raw text (no boxes, no saving)
+    Accepts a BGR ndarray, encoded image bytes or an image path.
+    The image is rescaled so text lands at PaddleOCR's preferred height
+    (``scale`` overrides the estimate, ``normalize=False`` skips it).
+    Large images are read as overlapping tiles in parallel (``tile``; None
+    decides automatically, see services.tiling).
+    Returns the recognized texts with their scores and boxes (no annotation
+    is saved) and the scale used
     """
-    import time
-    start_time = time.time()
+    start_time = time.perf_counter()
     if ocr is None:
-        from paddleocr import PaddleOCR
-        ocr = PaddleOCR(lang='hi')
-        
-    result = ocr.predict(img_path)
-    texts = result[0]['rec_texts'] 
-    raw_text = " ".join(texts)
+        ocr = get_paddle_ocr(lang)
+
+    with span("decode"):
+        img = load_image(image)
+    resolution = None
+    if normalize:
+        with span("resize"):
+            img, resolution = normalize_resolution(img, "paddleocr", scale=scale)
+    tiling = None
+    if should_tile(img, tile):
+        rows, tiling = ocr_tiled(img, recognize_batch=lambda tiles: _predict_tile_rows(ocr, tiles))
+    else:
+        rows = _predict_rows(ocr, img)
+    with span("postprocess"):
+        texts = [row["text"] for row in rows]
+        raw_text = " ".join(texts)
+        scores = [row["confidence"] for row in rows]
+        # Detection polygons, mapped back to the caller's image coordinates
+        box_scale = resolution["scale"] if resolution else 1.0
+        boxes = [backproject_bbox(row["bbox"], box_scale) for row in rows]
 
-    exec_time = time.time() - start_time
+    exec_time = time.perf_counter() - start_time
 
     return {
         "texts": texts,
         "raw_text": raw_text,
+        "scores": scores,
+        "boxes": boxes,
         "annotated_path": None,  # Annotation saving not implemented here
+        "resolution": resolution,
+        "tiling": tiling,
         "execution_time": exec_time
     }
+
+
+def paddle_ocr_pdf(data: bytes, pages=None, dpi=None, max_in_flight: int = 2, ocr=None,
+                   use_text_layer: bool = True, lang='hi', tile=None):
+    """
+    OCR the selected pages of a PDF (all pages by default).
+    Page N+1 renders in memory while page N is in ocr.predict(); at most
+    ``max_in_flight`` rendered pages are held at once. Pages with a usable
+    text layer skip OCR entirely (``path`` is "text_layer" instead of "ocr").
+    ``dpi=None`` renders each page at the DPI that puts its text at PaddleOCR's
+    preferred height; the DPI used is reported per page. Large pages are read
+    as overlapping tiles (``tile``; None decides automatically).
+    When the request's deadline passes, the pages read so far are returned
+    with ``truncated`` set (see services.deadlines). Pages that fail to render
+    or recognize get ``path="error"`` and are listed under ``errors``.
+    Returns per-page texts and timings plus document-level totals.
+    """
+    start_time = time.perf_counter()
+    page_results = []
+    render_total = 0.0
+    ocr_total = 0.0
+    truncated = None
+    errors = []
+    with open_pdf(data) as document:
+        page_total = len(resolve_pages(pages, document.page_count))
+
+    page_iter = iter_rendered_pages(
+        data, pages, dpi=dpi, max_in_flight=max_in_flight, use_text_layer=use_text_layer
+    )
+    for page_num, page_img, render_time, page_dpi in page_iter:
+        truncated = check_cancelled("page", remaining=page_total - len(page_results))
+        if truncated:
+            # Closing the iterator stops the render thread
+            page_iter.close()
+            break
+        render_total += render_time
+        if isinstance(page_img, TextLayer):
+            count_units("page", "text_layer", engine="paddleocr")
+            page_results.append({
+                "page": page_num,
+                "path": "text_layer",
+                "texts": page_img.lines,
+                "raw_text": page_img.text,
+                "error": None,
+                "dpi": page_dpi,
+                "timing": {"render_s": round(render_time, 4), "ocr_s": 0.0},
+            })
+            continue
+        count_units("page", engine="paddleocr")
+        t0 = time.perf_counter()
+        try:
+            if isinstance(page_img, Exception):
+                raise page_img
+            # Page DPI already puts text at the preferred height
+            result = paddle_ocr_and_annotate(page_img, ocr=ocr, lang=lang, normalize=False, tile=tile)
+            page_results.append({
+                "page": page_num,
+                "path": "ocr",
+                "texts": result["texts"],
+                "raw_text": result["raw_text"],
+                "error": None,
+            })
+            if result["tiling"] is not None:
+                page_results[-1]["tiling"] = result["tiling"]
+        except Exception as page_e:
+            stage = "render" if isinstance(page_img, Exception) else "ocr"
+            count_error("page", stage, engine="paddleocr")
+            errors.append({"page": page_num, "stage": stage, "error": str(page_e)})
+            page_results.append({
+                "page": page_num,
+                "path": "error",
+                "texts": [],
+                "raw_text": "",
+                "error": str(page_e),
+            })
+        ocr_time = time.perf_counter() - t0
+        ocr_total += ocr_time
+        page_results[-1]["dpi"] = page_dpi
+        page_results[-1]["timing"] = {
+            "render_s": round(render_time, 4),
+            "ocr_s": round(ocr_time, 4),
+        }
+
+    result = {
+        "pages": page_results,
+        "timing": {
+            "render_s": round(render_total, 4),
+            "ocr_s": round(ocr_total, 4),
+            "total_s": round(time.perf_counter() - start_time, 4),
+        },
+    }
+    if truncated:
+        result["truncated"] = truncated
+    if errors:
+        # Failed pages are reported, and keep the result out of the result cache
+        result["errors"] = errors
+    return result
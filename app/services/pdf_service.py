@@ -0,0 +1,239 @@
+import contextvars
+import os
+import queue
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from app.services.metrics import span
+from app.services.resolution import estimate_text_height, TARGET_TEXT_HEIGHT
+
+
+# -------------------------------------------------------------
+# Page selection
+# -------------------------------------------------------------
+def parse_page_range(spec: Optional[str]) -> Optional[List[int]]:
+    """
+    Parse a 1-based page selection such as "1-3,5,8-" into a sorted list.
+    Open-ended ranges ("8-") are returned as negative sentinels and resolved
+    against the real page count by ``resolve_pages``. ``None``/"" means all pages.
+    """
+    if not spec or not spec.strip():
+        return None
+    pages = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, _, end = part.partition("-")
+            start = int(start) if start.strip() else 1
+            if not end.strip():
+                pages.add(-start)  # open-ended: start..last page
+                continue
+            end = int(end)
+            if start < 1 or end < start:
+                raise ValueError(f"Invalid page range: {part}")
+            pages.update(range(start, end + 1))
+        else:
+            page = int(part)
+            if page < 1:
+                raise ValueError(f"Invalid page number: {part}")
+            pages.add(page)
+    return sorted(pages)
+
+
+def resolve_pages(selection: Optional[List[int]], page_count: int) -> List[int]:
+    """Clamp a parsed selection to the document, expanding open-ended ranges."""
+    if selection is None:
+        return list(range(1, page_count + 1))
+    pages = set()
+    for page in selection:
+        if page < 0:
+            pages.update(range(-page, page_count + 1))
+        elif page <= page_count:
+            pages.add(page)
+    return sorted(pages)
+
+
+# -------------------------------------------------------------
+# Rendering
+# -------------------------------------------------------------
+def open_pdf(data: bytes):
+    """Open a PDF from memory."""
+    return fitz.open(stream=data, filetype="pdf")
+
+
+def render_page(page, dpi: int = 120) -> np.ndarray:
+    """Rasterize a PyMuPDF page straight into a BGR ndarray (no PNG round-trip)."""
+    with span("pdf_render"):
+        pix = page.get_pixmap(dpi=dpi)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+        if pix.n == 4:
+            return cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
+        if pix.n == 3:
+            return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+
+# Bounds for the automatic per-page DPI
+MIN_RENDER_DPI = int(os.getenv("PDF_MIN_RENDER_DPI", "72"))
+MAX_RENDER_DPI = int(os.getenv("PDF_MAX_RENDER_DPI", "300"))
+PROBE_DPI = 72
+
+
+def choose_render_dpi(page, engine: str, target_text_height: Optional[float] = None) -> int:
+    """
+    Pick a render DPI so the page's text lands near the engine's preferred
+    height, probing a cheap 72 DPI render first.
+    """
+    estimated = estimate_text_height(render_page(page, dpi=PROBE_DPI))
+    if not estimated:
+        return max(MIN_RENDER_DPI, min(MAX_RENDER_DPI, 150))
+    target = target_text_height or TARGET_TEXT_HEIGHT.get(engine, 32.0)
+    return int(max(MIN_RENDER_DPI, min(MAX_RENDER_DPI, round(PROBE_DPI * target / estimated))))
+
+
+# -------------------------------------------------------------
+# Text-layer fast path
+# -------------------------------------------------------------
+# Born-digital pages already carry their text; reading it is milliseconds
+# versus seconds for rasterizing + OCR. A page uses its text layer when it has
+# enough extractable characters and is not dominated by images (scans with an
+# OCR'd or stamped header are "mixed" and still go to the engines).
+TEXT_LAYER_MIN_CHARS = int(os.getenv("PDF_TEXT_LAYER_MIN_CHARS", "20"))
+TEXT_LAYER_MAX_IMAGE_COVERAGE = float(os.getenv("PDF_TEXT_LAYER_MAX_IMAGE_COVERAGE", "0.5"))
+
+
+class TextLayer:
+    """Embedded text of one page, boxes in pixel coordinates at the render DPI."""
+
+    def __init__(self, words, lines):
+        self.words = words  # [{"text", "confidence", "bbox": [[x, y] * 4]}]
+        self.lines = lines  # [str] in reading order
+
+    @property
+    def text(self):
+        return " ".join(self.lines)
+
+
+def _image_coverage(page) -> float:
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        covered += abs(fitz.Rect(info["bbox"]) & page.rect)
+    return min(1.0, covered / page_area)
+
+
+def extract_text_layer(page, dpi: int = 72) -> Optional[TextLayer]:
+    """
+    Return the page's usable text layer, or None if the page needs OCR
+    (no/too little text, undecodable glyphs, or mostly image).
+    """
+    words = page.get_text("words", sort=True)
+    chars = sum(len(w[4].strip()) for w in words)
+    if chars < TEXT_LAYER_MIN_CHARS:
+        return None
+    garbage = sum(w[4].count("\ufffd") for w in words)
+    if garbage > chars * 0.1:
+        return None
+    if _image_coverage(page) > TEXT_LAYER_MAX_IMAGE_COVERAGE:
+        return None
+
+    scale = dpi / 72.0
+    rows = []
+    lines = {}
+    for x0, y0, x1, y1, text, block_no, line_no, _ in words:
+        text = text.strip()
+        if not text:
+            continue
+        x0, y0, x1, y1 = x0 * scale, y0 * scale, x1 * scale, y1 * scale
+        rows.append({
+            "text": text,
+            "confidence": 1.0,
+            "bbox": [[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+        })
+        lines.setdefault((block_no, line_no), []).append(text)
+    return TextLayer(rows, [" ".join(parts) for parts in lines.values()])
+
+
+_DONE = object()
+
+
+def iter_rendered_pages(
+    data: bytes,
+    pages: Optional[List[int]] = None,
+    dpi: Optional[int] = 120,
+    max_in_flight: int = 2,
+    use_text_layer: bool = False,
+    engine: str = "paddleocr",
+) -> Iterator[Tuple[int, object, float, int]]:
+    """
+    Yield ``(page_number, bgr_image, render_seconds, dpi)`` for the selected pages
+    (``bgr_image`` is the exception instead if that page failed to render).
+    With ``use_text_layer`` pages that have a usable text layer are not
+    rendered; a ``TextLayer`` is yielded in place of the image.
+    ``dpi=None`` picks the DPI per page from its text size (``choose_render_dpi``).
+
+    Pages are rendered on a background thread while the caller processes the
+    previous one; at most ``max_in_flight`` rendered pages wait in memory, so
+    memory stays flat regardless of document length.
+    """
+    document = open_pdf(data)
+    selected = resolve_pages(pages, document.page_count)
+    buffer = queue.Queue(maxsize=max(1, max_in_flight))
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page_num in selected:
+                t0 = time.perf_counter()
+                page_dpi = dpi
+                try:
+                    page = document[page_num - 1]
+                    layer = None
+                    if use_text_layer:
+                        with span("text_layer"):
+                            layer = extract_text_layer(page, dpi=dpi or PROBE_DPI)
+                    if layer is not None:
+                        page_dpi = dpi or PROBE_DPI
+                    elif page_dpi is None:
+                        page_dpi = choose_render_dpi(page, engine)
+                    item = (page_num, layer or render_page(page, dpi=page_dpi), time.perf_counter() - t0, page_dpi)
+                except Exception as e:
+                    item = (page_num, e, time.perf_counter() - t0, page_dpi)
+                if not put(item):
+                    return
+            put(_DONE)
+        finally:
+            document.close()
+
+    # Runs in a copy of the caller's context so render spans reach its request
+    producer = threading.Thread(
+        target=contextvars.copy_context().run, args=(produce,), name="pdf-render", daemon=True
+    )
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        producer.join()
@@ -0,0 +1,141 @@
+import math
+import os
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# -------------------------------------------------------------
+# Adaptive resolution normalization
+# -------------------------------------------------------------
+# Engines work best (and fastest) at a particular text size, not at whatever
+# resolution the phone camera produced. A cheap pass on a downscaled copy
+# estimates the median character height, and the image is rescaled so text
+# lands at the engine's preferred height. Boxes found on the rescaled image
+# are mapped back to original coordinates with ``backproject_bbox``.
+#
+#   OCR_TARGET_TEXT_HEIGHT_<ENGINE>   preferred character height in px
+#   OCR_MIN_SCALE / OCR_MAX_SCALE     clamp for the automatic scale
+#   OCR_MAX_MEGAPIXELS                hard cap on the processed image size
+#
+# An explicit ``scale`` override must lie in (0, MAX_SCALE_OVERRIDE].
+
+TARGET_TEXT_HEIGHT = {
+    "easyocr": float(os.getenv("OCR_TARGET_TEXT_HEIGHT_EASYOCR", "32")),
+    "paddleocr": float(os.getenv("OCR_TARGET_TEXT_HEIGHT_PADDLEOCR", "32")),
+    "tesseract": float(os.getenv("OCR_TARGET_TEXT_HEIGHT_TESSERACT", "30")),
+}
+MIN_SCALE = float(os.getenv("OCR_MIN_SCALE", "0.25"))
+MAX_SCALE = float(os.getenv("OCR_MAX_SCALE", "2.0"))
+MAX_MEGAPIXELS = float(os.getenv("OCR_MAX_MEGAPIXELS", "8"))
+MAX_SCALE_OVERRIDE = 8.0
+# Scales this close to 1 are not worth a resize
+SCALE_TOLERANCE = 0.1
+PROBE_MAX_SIDE = 1024
+MIN_COMPONENTS = 8
+
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def estimate_text_height(image: np.ndarray) -> Optional[float]:
+    """
+    Median height (in original pixels) of character-like connected components,
+    or None when the image does not contain enough of them.
+    """
+    gray = _to_gray(image)
+    h, w = gray.shape[:2]
+    factor = min(1.0, PROBE_MAX_SIDE / float(max(h, w)))
+    if factor < 1.0:
+        gray = cv2.resize(gray, (max(1, int(w * factor)), max(1, int(h * factor))), interpolation=cv2.INTER_AREA)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # Text is the minority class; flip for light text on dark backgrounds
+    if cv2.countNonZero(binary) > binary.size / 2:
+        binary = cv2.bitwise_not(binary)
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return None
+    comp_w = stats[1:, cv2.CC_STAT_WIDTH]
+    comp_h = stats[1:, cv2.CC_STAT_HEIGHT]
+    area = stats[1:, cv2.CC_STAT_AREA]
+    fill = area / np.maximum(comp_w * comp_h, 1)
+    probe_h = gray.shape[0]
+    is_char = (
+        (comp_h >= 3)
+        & (comp_h <= probe_h * 0.2)
+        & (comp_w <= comp_h * 3)
+        & (comp_w * 5 >= comp_h)
+        & (fill > 0.1)
+        & (fill < 0.95)
+    )
+    heights = comp_h[is_char]
+    if heights.size < MIN_COMPONENTS:
+        return None
+    return float(np.median(heights)) / factor
+
+
+def validate_scale(scale: Optional[float]):
+    """Raise ValueError unless ``scale`` is None or a usable override."""
+    if scale is not None and not 0 < scale <= MAX_SCALE_OVERRIDE:
+        raise ValueError(f"scale must be in (0, {MAX_SCALE_OVERRIDE:g}], got {scale}")
+
+
+def choose_scale(image: np.ndarray, engine: str, scale: Optional[float] = None,
+                 target_text_height: Optional[float] = None) -> Tuple[float, dict]:
+    """Scale factor for ``image`` on ``engine`` plus a report of how it was chosen."""
+    h, w = image.shape[:2]
+    target = target_text_height or TARGET_TEXT_HEIGHT.get(engine, 32.0)
+    estimated = None
+    if scale is not None:
+        validate_scale(scale)
+        source = "override"
+    else:
+        estimated = estimate_text_height(image)
+        if estimated:
+            scale = min(MAX_SCALE, max(MIN_SCALE, target / estimated))
+            source = "estimated"
+        else:
+            scale = 1.0
+            source = "default"
+        if abs(scale - 1.0) < SCALE_TOLERANCE:
+            scale = 1.0
+    max_pixels = MAX_MEGAPIXELS * 1e6
+    if h * w * scale * scale > max_pixels:
+        scale = math.sqrt(max_pixels / float(h * w))
+        source += "+megapixel_cap"
+    scale = round(scale, 4)
+    return scale, {
+        "scale": scale,
+        "source": source,
+        "estimated_text_height": round(estimated, 1) if estimated else None,
+        "target_text_height": target,
+        "original_size": [w, h],
+        "processed_size": [max(1, int(round(w * scale))), max(1, int(round(h * scale)))],
+    }
+
+
+def normalize_resolution(image: np.ndarray, engine: str, scale: Optional[float] = None,
+                         target_text_height: Optional[float] = None) -> Tuple[np.ndarray, dict]:
+    """Rescale ``image`` for ``engine``. Returns the processed image and the scale report."""
+    scale, report = choose_scale(image, engine, scale=scale, target_text_height=target_text_height)
+    if scale == 1.0:
+        return image, report
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+    resized = cv2.resize(image, tuple(report["processed_size"]), interpolation=interpolation)
+    return resized, report
+
+
+def backproject_bbox(bbox, scale: float):
+    """
+    Map a polygon (or an array of polygons) found on the rescaled image back
+    to original coordinates, as nested lists of floats.
+    """
+    points = np.asarray(bbox, dtype=np.float64)
+    if scale != 1.0:
+        points = points / scale
+    return points.tolist()
+
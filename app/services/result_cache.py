@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from app.services.metrics import metrics
+from app.services.deadlines import RequestCancelled, is_truncated
+
+# -------------------------------------------------------------
+# Content-addressed OCR result cache
+# -------------------------------------------------------------
+# Results are keyed by sha256(upload bytes) + engine + the parameters that
+# influence the output, so the same file OCR'd by the same engine with the
+# same settings is only processed once. Two tiers:
+#
+#   memory  LRU bounded by entry count and total serialized bytes
+#   disk    optional (OCR_CACHE_DIR), survives restarts, bounded by bytes
+#
+# Values must be JSON-serializable; the serialized size is what the byte
+# budgets account for. Results flagged ``truncated``, ``errors`` or
+# ``budget_exhausted`` are returned but never stored.
+
+CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_DIR = os.getenv("OCR_CACHE_DIR") or None
+CACHE_DISK_MAX_BYTES = int(os.getenv("OCR_CACHE_DISK_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+
+
+def make_key(data: bytes, engine: str, **params) -> str:
+    """Cache key for an upload processed by ``engine`` with ``params``."""
+    digest = hashlib.sha256(data).hexdigest()
+    param_blob = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(f"{digest}|{engine}|{param_blob}".encode()).hexdigest()
+
+
+def _cacheable(value) -> bool:
+    """
+    Partial (deadline) results, results with failed pages/frames and searches
+    cut short by a per-request budget are never stored.
+    """
+    if is_truncated(value):
+        return False
+    return not (isinstance(value, dict) and (value.get("errors") or value.get("budget_exhausted")))
+
+
+class ResultCache:
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 disk_dir=CACHE_DIR, disk_max_bytes=CACHE_DISK_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+            "coalesced": 0,
+        }
+        self._disk_writes = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    # ---------------- memory tier ----------------
+    def _store_memory(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self._stats["evictions"] += 1
+
+    # ---------------- disk tier ----------------
+    def _disk_path(self, key):
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _load_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            blob = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            value = json.loads(blob)
+        except ValueError:
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)  # keep recently used entries away from pruning
+        return value, len(blob)
+
+    def _store_disk(self, key, blob):
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+        self._disk_writes += 1
+        if self._disk_writes % 64 == 0:
+            self.prune_disk()
+
+    def prune_disk(self):
+        """Delete least recently used disk entries until under the byte budget."""
+        if self.disk_dir is None:
+            return
+        files = []
+        total = 0
+        for path in self.disk_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self._stats["disk_evictions"] += 1
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            self._stats["memory_hits"] += 1
+            return entry[0]
+
+    # ---------------- public API ----------------
+    # get/set may touch the disk tier and encode JSON; async code uses
+    # aget/aset, which keep that work off the event loop.
+    def get(self, key: str) -> Optional[Any]:
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        loaded = self._load_disk(key)
+        with self._lock:
+            if loaded is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._stats["disk_hits"] += 1
+        value, size = loaded
+        self._store_memory(key, value, size)
+        return value
+
+    def set(self, key: str, value: Any):
+        blob = json.dumps(value).encode()
+        # Store the decoded copy so memory hits return the same shape as disk hits
+        self._store_memory(key, json.loads(blob), len(blob))
+        self._store_disk(key, blob)
+        with self._lock:
+            self._stats["stores"] += 1
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """``get`` for async callers: memory hits inline, disk lookups in a thread."""
+        value = self._get_memory(key)
+        if value is not None or self.disk_dir is None:
+            if value is None:
+                with self._lock:
+                    self._stats["misses"] += 1
+            return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any):
+        """``set`` for async callers; encoding, disk writes and pruning run in a thread."""
+        await asyncio.to_thread(self.set, key, value)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for ``key`` or await ``compute()`` and cache it.
+        Concurrent requests for the same key share a single computation.
+        """
+        value = await self.aget(key)
+        if value is not None:
+            return value
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            with self._lock:
+                self._stats["coalesced"] += 1
+            try:
+                value = await asyncio.shield(inflight)
+            except RequestCancelled:
+                # The owning request was cancelled, not this one
+                return await self.get_or_compute(key, compute)
+            if not _cacheable(value):
+                return await self.get_or_compute(key, compute)
+            return value
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+            # Partial or failed results are returned but never cached
+            if _cacheable(value):
+                await self.aset(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; avoid "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+            }
+
+
+result_cache = ResultCache()
+
+
+@metrics.collector
+def _result_cache_metrics():
+    stats = result_cache.stats()
+    yield "ocr_result_cache_entries", "gauge", "Results held in the memory cache.", [({}, stats["entries"])]
+    yield "ocr_result_cache_bytes", "gauge", "Serialized size of the memory cache.", [({}, stats["bytes"])]
+    yield "ocr_result_cache_events_total", "counter", "Result cache lookups and stores by outcome.", [
+        ({"event": event}, stats[event])
+        for event in ("memory_hits", "disk_hits", "misses", "stores", "evictions", "coalesced")
+    ]
@@ -0,0 +1,80 @@
+import json
+from typing import Any, List
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from app.services.metrics import span
+
+# -------------------------------------------------------------
+# Response serialization
+# -------------------------------------------------------------
+# OCR responses on dense documents and videos carry tens of thousands of
+# boxes. Routes that return them hand a FastJSONResponse back directly, which
+# skips FastAPI's recursive jsonable_encoder walk and encodes with orjson when
+# installed, else ujson, else the stdlib. ``to_columnar`` turns result rows
+# into parallel arrays (format=columnar), which is both smaller on the wire
+# and far cheaper to encode than one object per box.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Row keys that become columns when present
+_COLUMN_KEYS = ("page", "frame", "source", "first_frame", "last_frame", "occurrences", "start_time", "end_time")
+
+
+def _to_builtin(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` (numpy scalars/arrays allowed) as JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_to_builtin,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    if ujson is not None:
+        return ujson.dumps(content, ensure_ascii=False, default=_to_builtin).encode("utf-8")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_to_builtin).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return dumps(content)
+
+
+def to_columnar(rows: List[dict]) -> dict:
+    """
+    Convert result rows to parallel arrays: ``text``, ``confidence`` and
+    ``bbox`` (flattened, ``bbox_stride`` = 8 floats per row: x1, y1, ... x4, y4),
+    plus page/frame/source (and video span) columns when the rows carry them.
+    """
+    rows = [row for row in rows if isinstance(row, dict)]
+    columns = {
+        "format": "columnar",
+        "count": len(rows),
+        "text": [row.get("text", "") for row in rows],
+        "confidence": [row.get("confidence") for row in rows],
+    }
+    boxes = [row.get("bbox") for row in rows]
+    if rows and all(box is not None and len(box) == 4 for box in boxes):
+        columns["bbox"] = np.asarray(boxes, dtype=np.float64).reshape(-1).tolist()
+        columns["bbox_stride"] = 8
+    else:
+        # Missing/irregular boxes: keep them per row
+        columns["bbox"] = boxes
+    for key in _COLUMN_KEYS:
+        if rows and key in rows[0]:
+            columns[key] = [row.get(key) for row in rows]
+    return columns
@@ -0,0 +1,397 @@
+import json
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from app.services.document_ids import scan_document_ids
+from app.services.field_matcher import FIELD_KINDS, normalize_date
+from app.services.ingest import load_image
+from app.services.metrics import span
+
+# -------------------------------------------------------------
+# Template-driven field OCR for known card layouts
+# -------------------------------------------------------------
+# PAN, Aadhaar and driving licence cards have fixed layouts, so instead of
+# reading the whole image and regex-searching the text, the card is aligned
+# to a canonical ID-1 frame and only the named field regions are recognized
+# (EasyOCR's recognition-only ``reader.recognize``, no text detection):
+#
+#   1. ORB keypoints + RANSAC homography against the template's reference
+#      image, when one exists (OCR_TEMPLATE_DIR/<name>.png|jpg)
+#   2. otherwise the largest convex quad in the edge map (the card outline),
+#      warped flat
+#   3. otherwise the whole image, if it already has a card's aspect ratio;
+#      nothing confirms this is a card, so it only counts as aligned when the
+#      template's ID field reads as a valid ID
+#
+# Field boxes are fractions of the canonical card. With template "auto" the
+# reference images (ORB inliers) or, without them, the validity of each
+# template's ID field decides the layout.
+#
+#   OCR_TEMPLATE_FILE          JSON with extra/overriding templates
+#                              {"PAN": {"reference": path, "fields": {"name":
+#                              {"box": [x0, y0, x1, y1], "kind": "text"}}}}
+#   OCR_TEMPLATE_DIR           directory of reference images
+#   OCR_TEMPLATE_WIDTH         canonical card width in px (height follows ID-1)
+#   OCR_TEMPLATE_ORB_FEATURES  ORB keypoints per image
+#   OCR_TEMPLATE_MIN_INLIERS   homography inliers needed to accept ORB alignment
+
+CARD_WIDTH = int(os.getenv("OCR_TEMPLATE_WIDTH", "1012"))  # 85.6 mm at 300 DPI
+CARD_HEIGHT = round(CARD_WIDTH * 54 / 85.6)
+TEMPLATE_FILE = os.getenv("OCR_TEMPLATE_FILE", "")
+TEMPLATE_DIR = os.getenv("OCR_TEMPLATE_DIR", "templates")
+ORB_FEATURES = int(os.getenv("OCR_TEMPLATE_ORB_FEATURES", "1500"))
+ORB_MIN_INLIERS = int(os.getenv("OCR_TEMPLATE_MIN_INLIERS", "25"))
+# A card outline must cover this share of the image
+MIN_CARD_AREA = 0.2
+# An unaligned image within this relative distance of the card aspect is used as is
+ASPECT_TOLERANCE = 0.25
+RATIO_TEST = 0.75
+QUAD_PROBE_SIDE = 800
+ID_ALLOWLIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 "
+
+DEFAULT_TEMPLATES = {
+    "PAN": {
+        "fields": {
+            "number": {"box": [0.25, 0.20, 0.75, 0.32], "kind": "id", "id_type": "PAN"},
+            "name": {"box": [0.03, 0.38, 0.68, 0.48]},
+            "father_name": {"box": [0.03, 0.52, 0.68, 0.62]},
+            "dob": {"box": [0.03, 0.66, 0.45, 0.76], "kind": "date"},
+        },
+    },
+    "Aadhaar": {
+        "fields": {
+            "name": {"box": [0.30, 0.27, 0.97, 0.38]},
+            "dob": {"box": [0.30, 0.39, 0.97, 0.49], "kind": "date"},
+            "gender": {"box": [0.30, 0.50, 0.80, 0.59]},
+            "number": {"box": [0.18, 0.78, 0.82, 0.91], "kind": "id", "id_type": "Aadhaar"},
+        },
+    },
+    "Driving_License": {
+        "fields": {
+            "number": {"box": [0.25, 0.17, 0.97, 0.28], "kind": "id", "id_type": "Driving_License"},
+            "name": {"box": [0.25, 0.34, 0.97, 0.44]},
+            "dob": {"box": [0.25, 0.47, 0.62, 0.57], "kind": "date"},
+            "valid_till": {"box": [0.62, 0.47, 0.97, 0.57], "kind": "date"},
+        },
+    },
+}
+
+
+def _validate(name: str, template: dict) -> dict:
+    fields = template.get("fields") or {}
+    if not fields:
+        raise ValueError(f"Template {name} has no fields")
+    for field, spec in fields.items():
+        box = spec.get("box")
+        if not box or len(box) != 4 or not all(0.0 <= v <= 1.0 for v in box) or box[0] >= box[2] or box[1] >= box[3]:
+            raise ValueError(f"Template {name}: field {field} needs a box of 4 fractions (x0, y0, x1, y1)")
+        if spec.get("kind", "text") not in FIELD_KINDS:
+            raise ValueError(f"Template {name}: unknown kind for field {field}")
+        if spec.get("kind") == "id" and not spec.get("id_type"):
+            raise ValueError(f"Template {name}: id field {field} needs an id_type")
+    return template
+
+
+def _load_templates() -> Dict[str, dict]:
+    templates = dict(DEFAULT_TEMPLATES)
+    if TEMPLATE_FILE:
+        with open(TEMPLATE_FILE, encoding="utf-8") as f:
+            templates.update(json.load(f))
+    return {name: _validate(name, template) for name, template in templates.items()}
+
+
+TEMPLATES = _load_templates()
+
+
+def template_names() -> List[str]:
+    return list(TEMPLATES)
+
+
+def _id_field(template: dict) -> Optional[str]:
+    return next((name for name, spec in template["fields"].items() if spec.get("kind") == "id"), None)
+
+
+def _field_rects(template: dict) -> Dict[str, tuple]:
+    return {
+        name: (
+            int(spec["box"][0] * CARD_WIDTH), int(spec["box"][1] * CARD_HEIGHT),
+            int(spec["box"][2] * CARD_WIDTH), int(spec["box"][3] * CARD_HEIGHT),
+        )
+        for name, spec in template["fields"].items()
+    }
+
+
+# ---------------- alignment ----------------
+def _reference_path(name: str) -> Optional[str]:
+    path = TEMPLATES[name].get("reference")
+    if path:
+        return path
+    for suffix in (".png", ".jpg", ".jpeg"):
+        candidate = Path(TEMPLATE_DIR) / f"{name.lower()}{suffix}"
+        if candidate.exists():
+            return str(candidate)
+    return None
+
+
+@lru_cache(maxsize=None)
+def _reference_features(name: str):
+    """ORB keypoints/descriptors of the template's reference card, or None."""
+    path = _reference_path(name)
+    if path is None:
+        return None
+    reference = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if reference is None:
+        print(f"[Templates] Could not read reference image {path}")
+        return None
+    reference = cv2.resize(reference, (CARD_WIDTH, CARD_HEIGHT), interpolation=cv2.INTER_AREA)
+    keypoints, descriptors = cv2.ORB_create(ORB_FEATURES).detectAndCompute(reference, None)
+    if descriptors is None:
+        return None
+    return np.float32([kp.pt for kp in keypoints]), descriptors
+
+
+def _align_orb(gray: np.ndarray, names: List[str]):
+    """(template name, homography, inliers) of the best-matching reference, or None."""
+    references = {name: _reference_features(name) for name in names}
+    references = {name: ref for name, ref in references.items() if ref is not None}
+    if not references:
+        return None
+    keypoints, descriptors = cv2.ORB_create(ORB_FEATURES).detectAndCompute(gray, None)
+    if descriptors is None or len(keypoints) < ORB_MIN_INLIERS:
+        return None
+    points = np.float32([kp.pt for kp in keypoints])
+    matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+    best = None
+    for name, (ref_points, ref_descriptors) in references.items():
+        pairs = matcher.knnMatch(descriptors, ref_descriptors, k=2)
+        good = [p[0] for p in pairs if len(p) == 2 and p[0].distance < RATIO_TEST * p[1].distance]
+        if len(good) < ORB_MIN_INLIERS:
+            continue
+        src = points[[m.queryIdx for m in good]]
+        dst = ref_points[[m.trainIdx for m in good]]
+        homography, mask = cv2.findHomography(src, dst, cv2.RANSAC, 5.0)
+        if homography is None:
+            continue
+        inliers = int(mask.sum())
+        if inliers >= ORB_MIN_INLIERS and (best is None or inliers > best[2]):
+            best = (name, homography, inliers)
+    return best
+
+
+def _order_corners(points: np.ndarray) -> np.ndarray:
+    """Top-left, top-right, bottom-right, bottom-left; long side horizontal."""
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    corners = np.float32([points[sums.argmin()], points[diffs.argmin()], points[sums.argmax()], points[diffs.argmax()]])
+    top = np.linalg.norm(corners[1] - corners[0])
+    left = np.linalg.norm(corners[3] - corners[0])
+    if left > top:
+        # Card photographed sideways: rotate a quarter turn
+        corners = np.roll(corners, 1, axis=0)
+    return corners
+
+
+def _find_card_quad(gray: np.ndarray) -> Optional[np.ndarray]:
+    """Corners of the card outline (largest convex quadrilateral), or None."""
+    scale = min(1.0, QUAD_PROBE_SIDE / max(gray.shape[:2]))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    edges = cv2.Canny(cv2.GaussianBlur(small, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = MIN_CARD_AREA * small.shape[0] * small.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contour) < min_area:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            return _order_corners(approx.reshape(4, 2).astype(np.float32) / scale)
+    return None
+
+
+def align_card(image: np.ndarray, names: List[str]):
+    """
+    Warp the card in ``image`` (BGR) onto the canonical frame.
+    Returns (card or None, method, template name if alignment identified it).
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    size = (CARD_WIDTH, CARD_HEIGHT)
+
+    matched = _align_orb(gray, names)
+    if matched is not None:
+        name, homography, _inliers = matched
+        return cv2.warpPerspective(image, homography, size), "orb", name
+
+    corners = _find_card_quad(gray)
+    if corners is not None:
+        target = np.float32([[0, 0], [CARD_WIDTH - 1, 0], [CARD_WIDTH - 1, CARD_HEIGHT - 1], [0, CARD_HEIGHT - 1]])
+        transform = cv2.getPerspectiveTransform(corners, target)
+        return cv2.warpPerspective(image, transform, size), "quad", None
+
+    h, w = image.shape[:2]
+    if h > w:
+        image = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+        h, w = w, h
+    if abs((w / h) / (CARD_WIDTH / CARD_HEIGHT) - 1.0) <= ASPECT_TOLERANCE:
+        interpolation = cv2.INTER_AREA if w > CARD_WIDTH else cv2.INTER_CUBIC
+        return cv2.resize(image, size, interpolation=interpolation), "resize", None
+    return None, None, None
+
+
+# ---------------- recognition ----------------
+def _recognize_easyocr(card: np.ndarray, rects: Dict[str, tuple], allowlists: Dict[str, Optional[str]],
+                       languages) -> Dict[str, tuple]:
+    """
+    Recognition-only EasyOCR over the field rects, one ``reader.recognize``
+    call per allowlist. Returns field -> (text, confidence).
+    """
+    from app.services.ocr_service import get_easyocr_reader
+
+    reader = get_easyocr_reader(languages, gpu=False)
+    gray = cv2.cvtColor(card, cv2.COLOR_BGR2GRAY)
+    groups = {}
+    for name, rect in rects.items():
+        groups.setdefault(allowlists.get(name), []).append(name)
+
+    found = {}
+    for allowlist, names in groups.items():
+        horizontal = [[rects[n][0], rects[n][2], rects[n][1], rects[n][3]] for n in names]
+        with span("recognize", engine="easyocr"):
+            results = reader.recognize(
+                gray, horizontal_list=horizontal, free_list=[], allowlist=allowlist,
+                detail=1, paragraph=False, batch_size=len(horizontal),
+            )
+        # Results come back in EasyOCR's own order (boxes may overlap): map each
+        # to the unclaimed field rect whose center is nearest its box center
+        centers = {n: ((rects[n][0] + rects[n][2]) / 2, (rects[n][1] + rects[n][3]) / 2) for n in names}
+        for box, text, confidence in results:
+            cx, cy = np.asarray(box, dtype=np.float64).reshape(-1, 2).mean(axis=0)
+            unclaimed = [n for n in names if n not in found]
+            if not unclaimed:
+                break
+            name = min(unclaimed, key=lambda n: (centers[n][0] - cx) ** 2 + (centers[n][1] - cy) ** 2)
+            found[name] = (text, float(confidence))
+    return found
+
+
+def _recognize(card, rects, allowlists, engine, languages) -> Dict[str, tuple]:
+    if engine == "easyocr":
+        return _recognize_easyocr(card, rects, allowlists, languages)
+    from app.services.engines import get_engine
+
+    names = list(rects)
+    results = get_engine(engine).recognize_regions(card, [rects[n] for n in names])
+    return {name: (result["text"], result["confidence"]) for name, result in zip(names, results)}
+
+
+def _parse_field(spec: dict, text: str) -> dict:
+    """Normalized value of one field: ISO dates, validated IDs, whitespace-collapsed text."""
+    text = " ".join(text.split())
+    kind = spec.get("kind", "text")
+    if kind == "date":
+        iso = normalize_date(text) if text else None
+        return {"value": iso or text, "valid": iso is not None}
+    if kind == "id":
+        matches = [m for m in scan_document_ids(text) if m["type"] == spec["id_type"]]
+        if matches:
+            return {"value": matches[0]["value"], "valid": True}
+        return {"value": text, "valid": False}
+    return {"value": text, "valid": bool(text)}
+
+
+def _allowlist(spec: dict) -> Optional[str]:
+    return spec.get("allowlist") or (ID_ALLOWLIST if spec.get("kind") == "id" else None)
+
+
+def _unaligned(start_time: float) -> dict:
+    return {"template": None, "aligned": False, "alignment": None, "fields": {}, "results": [],
+            "time_taken": time.perf_counter() - start_time}
+
+
+def extract_template_fields(image, template: str = "auto", engine: str = "easyocr", languages=("en",)) -> dict:
+    """
+    Align a card image to ``template`` (or detect the layout with "auto") and
+    recognize only its field regions.
+    Returns the template used, the alignment method, per-field value/text/
+    confidence/valid, rows (field text with its box on the aligned card) and
+    the share of card pixels recognized. ``aligned`` is False, with no
+    fields, when no card could be located, or when the image was only
+    resized to the card frame and its ID field does not validate.
+    """
+    start_time = time.perf_counter()
+    if template != "auto" and template not in TEMPLATES:
+        raise ValueError(f"Unknown template: {template} (known: {', '.join(TEMPLATES)})")
+    names = list(TEMPLATES) if template == "auto" else [template]
+
+    with span("decode"):
+        img = load_image(image)
+    with span("align"):
+        card, method, matched = align_card(img, names)
+    if card is None:
+        return _unaligned(start_time)
+
+    recognized = {}
+    if matched is None and len(names) > 1:
+        # Layout unknown: read every template's ID field and keep the one that validates
+        probes = {}
+        for name in names:
+            field = _id_field(TEMPLATES[name])
+            if field is not None:
+                probes[(name, field)] = _field_rects(TEMPLATES[name])[field]
+        keys = list(probes)
+        texts = _recognize(card, {str(i): probes[k] for i, k in enumerate(keys)},
+                           {str(i): ID_ALLOWLIST for i in range(len(keys))}, engine, languages)
+        best = None
+        for i, (name, field) in enumerate(keys):
+            text, confidence = texts.get(str(i), ("", 0.0))
+            parsed = _parse_field(TEMPLATES[name]["fields"][field], text)
+            score = (parsed["valid"], confidence)
+            if best is None or score > best[0]:
+                best = (score, name, field, (text, confidence))
+        if best is not None:
+            matched = best[1]
+            recognized[best[2]] = best[3]
+    matched = matched or names[0]
+
+    spec = TEMPLATES[matched]["fields"]
+    rects = _field_rects(TEMPLATES[matched])
+    if method == "resize":
+        # Any photo of card-like proportions gets here: require a valid ID first
+        id_field = _id_field(TEMPLATES[matched])
+        if id_field is None:
+            return _unaligned(start_time)
+        if id_field not in recognized:
+            recognized.update(_recognize(card, {id_field: rects[id_field]}, {id_field: ID_ALLOWLIST},
+                                         engine, languages))
+        if not _parse_field(spec[id_field], recognized.get(id_field, ("", 0.0))[0])["valid"]:
+            return _unaligned(start_time)
+    pending = {name: rect for name, rect in rects.items() if name not in recognized}
+    if pending:
+        recognized.update(_recognize(card, pending, {n: _allowlist(spec[n]) for n in pending}, engine, languages))
+
+    with span("postprocess"):
+        fields, rows = {}, []
+        for name, (x0, y0, x1, y1) in rects.items():
+            text, confidence = recognized.get(name, ("", 0.0))
+            parsed = _parse_field(spec[name], text)
+            fields[name] = {**parsed, "text": text, "confidence": round(float(confidence), 4)}
+            if parsed["value"]:
+                bbox = [[float(x0), float(y0)], [float(x1), float(y0)], [float(x1), float(y1)], [float(x0), float(y1)]]
+                rows.append({"text": parsed["value"], "confidence": fields[name]["confidence"],
+                             "bbox": bbox, "field": name})
+        covered = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in rects.values())
+
+    return {
+        "template": matched,
+        "aligned": True,
+        "alignment": method,
+        "fields": fields,
+        "results": rows,
+        "pixels_recognized": round(covered / (CARD_WIDTH * CARD_HEIGHT), 3),
+        "time_taken": time.perf_counter() - start_time,
+    }
@@ -0,0 +1,194 @@
+import os
+import queue
+import threading
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+import pytesseract
+
+from app.services.metrics import metrics
+
+# -------------------------------------------------------------
+# Tesseract backends
+# -------------------------------------------------------------
+# Both backends take an image buffer (numpy array) and return word-level
+# results as parallel arrays:
+#   {"text": [str, ...], "conf": float32[N], "boxes": int32[N, 4]}
+# where boxes are (left, top, width, height) and conf is -1 for words
+# Tesseract did not score.
+#
+#   TESSERACT_BACKEND=subprocess   one `tesseract` process per call (pytesseract)
+#   TESSERACT_BACKEND=tesserocr    resident in-process engines (needs `tesserocr`)
+#
+# If the requested backend cannot be loaded the subprocess backend is used;
+# the fallback is logged and ocr_tesseract_backend_info shows requested vs
+# active backend.
+
+TESSERACT_BACKEND = os.getenv("TESSERACT_BACKEND", "subprocess").lower()
+TESSERACT_LANG = os.getenv("TESSERACT_LANG", "eng")
+RESIDENT_ENGINES = int(os.getenv("TESSERACT_RESIDENT_ENGINES", str(min(4, os.cpu_count() or 1))))
+
+
+def _empty_words() -> Dict[str, object]:
+    return {
+        "text": [],
+        "conf": np.zeros(0, dtype=np.float32),
+        "boxes": np.zeros((0, 4), dtype=np.int32),
+    }
+
+
+class SubprocessBackend:
+    """pytesseract: forks `tesseract`, round-trips the image through a temp file."""
+
+    name = "subprocess"
+
+    def __init__(self, lang: str = TESSERACT_LANG):
+        self.lang = lang
+
+    def image_to_words(self, img: np.ndarray, psm: int) -> Dict[str, object]:
+        config = f"--oem 3 --psm {psm} -c tessedit_write_images=0"
+        data = pytesseract.image_to_data(
+            img, lang=self.lang, config=config, output_type=pytesseract.Output.DICT
+        )
+        keep = [i for i, w in enumerate(data["text"]) if str(w).strip() != ""]
+        if not keep:
+            return _empty_words()
+        return {
+            "text": [str(data["text"][i]).strip() for i in keep],
+            "conf": np.array([float(data["conf"][i]) for i in keep], dtype=np.float32),
+            "boxes": np.array(
+                [[data["left"][i], data["top"][i], data["width"][i], data["height"][i]] for i in keep],
+                dtype=np.int32,
+            ),
+        }
+
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """
+    Keeps a pool of initialized TessBaseAPI engines resident in-process.
+    Language data is loaded once per engine and images are handed over as raw
+    buffers, so a call costs only the recognition itself.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = TESSERACT_LANG, size: int = RESIDENT_ENGINES):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self.lang = lang
+        self._engines = queue.Queue()
+        self._all = []
+        try:
+            for _ in range(max(1, size)):
+                api = tesserocr.PyTessBaseAPI(lang=lang, oem=tesserocr.OEM.DEFAULT)
+                self._engines.put(api)
+                self._all.append(api)
+        except RuntimeError:
+            # e.g. missing tessdata / language: release the engines already built
+            self.close()
+            raise
+
+    def image_to_words(self, img: np.ndarray, psm: int) -> Dict[str, object]:
+        tesserocr = self._tesserocr
+        if img.ndim == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+        height, width = img.shape[:2]
+        bpp = 1 if img.ndim == 2 else img.shape[2]
+
+        api = self._engines.get()
+        try:
+            api.SetPageSegMode(psm)
+            api.SetImageBytes(img.tobytes(), width, height, bpp, width * bpp)
+            api.Recognize()
+            texts, confs, boxes = [], [], []
+            level = tesserocr.RIL.WORD
+            iterator = api.GetIterator()
+            if iterator is not None:
+                for word in tesserocr.iterate_level(iterator, level):
+                    text = word.GetUTF8Text(level)
+                    if not text or not text.strip():
+                        continue
+                    bbox = word.BoundingBox(level)
+                    if bbox is None:
+                        continue
+                    x1, y1, x2, y2 = bbox
+                    texts.append(text.strip())
+                    confs.append(word.Confidence(level))
+                    boxes.append((x1, y1, x2 - x1, y2 - y1))
+        finally:
+            api.Clear()
+            self._engines.put(api)
+
+        if not texts:
+            return _empty_words()
+        return {
+            "text": texts,
+            "conf": np.array(confs, dtype=np.float32),
+            "boxes": np.array(boxes, dtype=np.int32),
+        }
+
+    def close(self):
+        for api in self._all:
+            api.End()
+        self._all = []
+
+
+_BACKENDS = {
+    "subprocess": SubprocessBackend,
+    "tesserocr": TesserocrBackend,
+}
+_backend = None
+_backend_requested = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str):
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown Tesseract backend: {name}")
+    try:
+        return _BACKENDS[name]()
+    except ImportError as e:
+        print(f"[Tesseract] Backend '{name}' is not available ({e}); falling back to subprocess. "
+              f"Install `{name}` (see requirements.txt) to use it.")
+        return SubprocessBackend()
+    except RuntimeError as e:
+        # Installed but cannot initialize (tessdata or language data missing)
+        print(f"[Tesseract] Backend '{name}' failed to initialize ({e}); falling back to subprocess.")
+        return SubprocessBackend()
+
+
+def get_backend():
+    global _backend, _backend_requested
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend_requested = TESSERACT_BACKEND
+                _backend = create_backend(TESSERACT_BACKEND)
+    return _backend
+
+
+def set_backend(name: Optional[str]):
+    """Switch the process-wide backend (``None`` resets to TESSERACT_BACKEND)."""
+    global _backend, _backend_requested
+    with _backend_lock:
+        if _backend is not None:
+            _backend.close()
+        _backend_requested = name or TESSERACT_BACKEND
+        _backend = create_backend(_backend_requested)
+    return _backend
+
+
+@metrics.collector
+def _backend_metrics():
+    backend = _backend
+    if backend is None:
+        return
+    yield "ocr_tesseract_backend_info", "gauge", "Requested and active Tesseract backend.", [
+        ({"requested": _backend_requested, "active": backend.name}, 1)
+    ]
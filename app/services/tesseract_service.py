@@ -1,61 +1,230 @@
-import pytesseract
-from pathlib import Path
-from typing import List, Tuple
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Tuple
 import cv2
 import numpy as np
+from app.services.tesseract_backend import get_backend
+from app.services.ingest import load_image
+from app.services.metrics import span
+from app.services.resolution import normalize_resolution
+from app.services.deadlines import check_cancelled, remaining_time
 
-def load_image(image_path: Path) -> np.ndarray:
-    if not Path(image_path).exists():
-        raise FileNotFoundError(f"Image not found: {image_path}")
-    image = cv2.imread(str(image_path))
-    if image is None:
-        raise FileNotFoundError(f"Failed to load image: {image_path}")
-    return image
+PSM_MODES = (6, 11, 12, 13)
 
-def preprocess_variants(image: np.ndarray) -> List[Tuple[str, np.ndarray]]:
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+# Stop searching once a result reaches this average confidence
+EARLY_EXIT_CONFIDENCE = float(os.getenv("TESSERACT_EARLY_EXIT_CONF", "80"))
+# Concurrent tesseract calls per request (each call is its own process)
+SEARCH_PARALLELISM = int(os.getenv("TESSERACT_SEARCH_PARALLELISM", str(min(4, os.cpu_count() or 1))))
+# Number of recent winners used to order the variant/PSM grid
+WIN_HISTORY_SIZE = int(os.getenv("TESSERACT_WIN_HISTORY", "200"))
+
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=max(1, SEARCH_PARALLELISM), thread_name_prefix="tesseract-search")
+_RECENT_WINNERS = deque(maxlen=WIN_HISTORY_SIZE)
+_WINNERS_LOCK = threading.Lock()
+
+
+def _otsu(gray: np.ndarray) -> np.ndarray:
     _, bin_otsu = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    bin_adaptive = cv2.adaptiveThreshold(
+    return bin_otsu
+
+
+def _adaptive(gray: np.ndarray) -> np.ndarray:
+    return cv2.adaptiveThreshold(
         gray, 255,
         cv2.ADAPTIVE_THRESH_MEAN_C,
         cv2.THRESH_BINARY,
         31, 10
     )
+
+
+def _sharp(gray: np.ndarray) -> np.ndarray:
     sharp = cv2.GaussianBlur(gray, (0, 0), 3)
-    sharp = cv2.addWeighted(gray, 1.5, sharp, -0.5, 0)
+    return cv2.addWeighted(gray, 1.5, sharp, -0.5, 0)
+
+
+def _morph(gray: np.ndarray) -> np.ndarray:
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-    morph = cv2.morphologyEx(bin_otsu, cv2.MORPH_OPEN, kernel)
-    return [
-        ("gray", gray),
-        ("otsu", bin_otsu),
-        ("adaptive", bin_adaptive),
-        ("sharp", sharp),
-        ("morph", morph),
-    ]
+    return cv2.morphologyEx(_otsu(gray), cv2.MORPH_OPEN, kernel)
+
+
+# Variant name -> builder from the grayscale image, in the legacy search order
+VARIANT_BUILDERS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "gray": lambda gray: gray,
+    "otsu": _otsu,
+    "adaptive": _adaptive,
+    "sharp": _sharp,
+    "morph": _morph,
+}
+
+
+def preprocess_variants(image: np.ndarray) -> List[Tuple[str, np.ndarray]]:
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return [(name, build(gray)) for name, build in VARIANT_BUILDERS.items()]
+
 
 def ocr_text(img: np.ndarray, psm: int) -> Tuple[str, float]:
-    config = f"--oem 3 --psm {psm} -c tessedit_write_images=0"
-    data = pytesseract.image_to_data(img, config=config, output_type=pytesseract.Output.DICT)
-    text = " ".join([w for w in data["text"] if w.strip() != ""])
-    confs = [int(c) for c in data["conf"] if str(c).isdigit() and int(c) > -1]
-    avg_conf = sum(confs) / len(confs) if confs else 0
+    words = get_backend().image_to_words(img, psm)
+    text = " ".join(words["text"])
+    confs = words["conf"][words["conf"] > -1]
+    avg_conf = float(confs.mean()) if confs.size else 0
     return text.strip(), avg_conf
 
-def tesseract_best_ocr(image_path: str):
-    img = load_image(Path(image_path))
-    variants = preprocess_variants(img)
+
+# -------------------------------------------------------------
+# Adaptive search order
+# -------------------------------------------------------------
+def _variant_label(vname: str, psm: int) -> str:
+    return f"{vname} | psm={psm}"
+
+
+def search_order() -> List[Tuple[str, int]]:
+    """
+    Variant/PSM combinations ordered by how often they won recently.
+    Ties (and never-seen pairs) keep the legacy grid order.
+    """
+    grid = [(vname, psm) for vname in VARIANT_BUILDERS for psm in PSM_MODES]
+    with _WINNERS_LOCK:
+        wins = Counter(_RECENT_WINNERS)
+    return sorted(grid, key=lambda combo: -wins[_variant_label(*combo)])
+
+
+def record_winner(label: str):
+    with _WINNERS_LOCK:
+        _RECENT_WINNERS.append(label)
+
+
+def tesseract_best_ocr(
+    image,
+    min_confidence: Optional[float] = None,
+    max_calls: Optional[int] = None,
+    max_ms: Optional[float] = None,
+    scale: Optional[float] = None,
+):
+    """
+    Search the preprocessing variant x PSM grid for the best Tesseract result.
+    ``image`` may be a BGR ndarray, encoded image bytes or a path.
+
+    Combinations run in parallel, most-recently-successful first, and the
+    search stops as soon as a result reaches ``min_confidence`` or the
+    per-request budget (``max_calls`` tesseract calls / ``max_ms``) is spent.
+    A passed request deadline also ends the search with the best result so
+    far, flagged ``truncated``. The image is first rescaled to Tesseract's preferred text height
+    (``scale`` overrides the estimate).
+    A search cut short by the budget before reaching ``min_confidence`` is
+    flagged ``budget_exhausted`` ("max_calls" / "max_ms"): its result depends
+    on timing and on the adaptive search order, so it is not cached.
+    """
+    min_confidence = EARLY_EXIT_CONFIDENCE if min_confidence is None else min_confidence
+    start = time.monotonic()
+    deadline = start + max_ms / 1000.0 if max_ms else None
+
+    with span("decode"):
+        img = load_image(image)
+    with span("resize"):
+        img, resolution = normalize_resolution(img, "tesseract", scale=scale)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    variant_cache: Dict[str, np.ndarray] = {}
+    variant_lock = threading.Lock()
+
+    def get_variant(vname: str) -> np.ndarray:
+        with variant_lock:
+            if vname not in variant_cache:
+                variant_cache[vname] = VARIANT_BUILDERS[vname](gray)
+            return variant_cache[vname]
+
+    # Set once the search is over: combos already picked up by a pool thread
+    # skip the backend call instead of occupying the shared pool
+    stop = threading.Event()
+
+    def run_combo(vname: str, psm: int):
+        if stop.is_set():
+            return "", -1
+        return ocr_text(get_variant(vname), psm)
+
+    order = search_order()
+    full_grid = len(order)
+    if max_calls:
+        order = order[:max_calls]
+
     best_text = ""
     best_conf = -1
     best_variant = ""
-    for vname, vimg in variants:
-        for psm in (6, 11, 12, 13):
-            text, conf = ocr_text(vimg, psm)
-            if conf > best_conf and len(text) > 5:
-                best_conf = conf
-                best_text = text
-                best_variant = f"{vname} | psm={psm}"
-    return {
+    calls = 0
+    pending = {}
+    queue = iter(order)
+    truncated = None
+    budget_exhausted = None
+
+    def submit_next():
+        combo = next(queue, None)
+        if combo is None:
+            return False
+        pending[_SEARCH_POOL.submit(run_combo, *combo)] = combo
+        return True
+
+    with span("recognize", engine="tesseract"):
+        for _ in range(max(1, SEARCH_PARALLELISM)):
+            if not submit_next():
+                break
+
+        try:
+            while pending:
+                timeout = max(0.0, deadline - time.monotonic()) if deadline else None
+                request_left = remaining_time()
+                if request_left is not None:
+                    timeout = request_left if timeout is None else min(timeout, request_left)
+                finished, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                left = len(order) - calls - len(finished)
+                if left > 0:
+                    # Request deadline / client gone: stop at this variant boundary
+                    truncated = check_cancelled("variant", remaining=left)
+                if not finished:
+                    if truncated:
+                        break
+                    if deadline and time.monotonic() >= deadline:
+                        # Time budget spent while calls were still running
+                        budget_exhausted = "max_ms"
+                        break
+                    # Woke up on the request deadline a moment early: wait again
+                    continue
+                for future in finished:
+                    vname, psm = pending.pop(future)
+                    calls += 1
+                    text, conf = future.result()
+                    if conf > best_conf and len(text) > 5:
+                        best_conf = conf
+                        best_text = text
+                        best_variant = _variant_label(vname, psm)
+                if truncated or best_conf >= min_confidence:
+                    break
+                if deadline and time.monotonic() >= deadline:
+                    budget_exhausted = "max_ms"
+                    break
+                while len(pending) < max(1, SEARCH_PARALLELISM) and submit_next():
+                    pass
+        finally:
+            stop.set()
+            for future in pending:
+                future.cancel()
+
+    if budget_exhausted is None and not truncated and len(order) < full_grid and best_conf < min_confidence:
+        budget_exhausted = "max_calls"
+    if best_variant:
+        record_winner(best_variant)
+
+    result = {
         "text": best_text,
         "confidence": best_conf,
-        "variant": best_variant
+        "variant": best_variant,
+        "calls": calls,
+        "search_time_ms": round((time.monotonic() - start) * 1000, 1),
+        "resolution": resolution,
     }
+    if truncated:
+        result["truncated"] = truncated
+    if budget_exhausted:
+        result["budget_exhausted"] = budget_exhausted
+    return result
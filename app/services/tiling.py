@@ -0,0 +1,180 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.metrics import span
+
+# -------------------------------------------------------------
+# Tiled OCR for large images
+# -------------------------------------------------------------
+# Very large pages (large-format scans, 300 DPI renders) are split into
+# overlapping tiles that are recognized in parallel; detection then runs at
+# full resolution on bounded-size arrays instead of downsampling away small
+# text or grinding through one huge array on one core. Tile boxes are
+# shifted into page coordinates and duplicates along the seams are removed
+# with NMS, preferring the copy of a word that was not cut by a tile edge:
+#
+#   OCR_TILE_SIZE       tile side in pixels (after resolution normalization)
+#   OCR_TILE_OVERLAP    overlap between neighbouring tiles; should exceed the
+#                       longest word so every word is whole in some tile
+#   OCR_TILE_WORKERS    tiles recognized concurrently
+#   OCR_TILE_AUTO_PX    tile automatically when the longer side exceeds this
+#                       (0 = only when requested)
+#   OCR_TILE_NMS_IOU    IoU above which two seam boxes are the same word
+#
+# A tile is copied out of the page only while it is being recognized and at
+# most OCR_TILE_WORKERS tiles are in flight, so per-tile memory stays bounded.
+# Engines whose model must not be called from several threads at once
+# (PaddleOCR) pass ``recognize_batch`` instead: all tiles go through one call
+# on the caller's thread.
+
+TILE_SIZE = int(os.getenv("OCR_TILE_SIZE", "1600"))
+TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", "192"))
+TILE_WORKERS = int(os.getenv("OCR_TILE_WORKERS", str(min(8, os.cpu_count() or 1))))
+TILE_AUTO_PX = int(os.getenv("OCR_TILE_AUTO_PX", "0"))
+TILE_NMS_IOU = float(os.getenv("OCR_TILE_NMS_IOU", "0.5"))
+# A box covered this much by a better box is a fragment of the same word
+CONTAINMENT = 0.8
+# Boxes within this many pixels of an inner tile edge were probably cut
+EDGE_MARGIN = 2
+
+_TILE_POOL = ThreadPoolExecutor(max_workers=max(1, TILE_WORKERS), thread_name_prefix="ocr-tile")
+
+
+def should_tile(image: np.ndarray, tile: Optional[bool] = None, tile_size: int = TILE_SIZE) -> bool:
+    """``tile`` forces the decision; None tiles automatically above OCR_TILE_AUTO_PX."""
+    longest = max(image.shape[:2])
+    if tile is not None:
+        return bool(tile) and longest > tile_size
+    return TILE_AUTO_PX > 0 and longest > TILE_AUTO_PX
+
+
+def tile_grid(height: int, width: int, tile_size: int = TILE_SIZE, overlap: int = TILE_OVERLAP):
+    """(x0, y0, x1, y1) tiles covering the image; the last row/column is snapped to the edge."""
+    if overlap >= tile_size:
+        raise ValueError("Tile overlap must be smaller than the tile size")
+    step = tile_size - overlap
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (x, y, min(width, x + tile_size), min(height, y + tile_size))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def _rects(rows) -> np.ndarray:
+    if not rows:
+        return np.zeros((0, 4))
+    boxes = np.asarray([row["bbox"] for row in rows], dtype=np.float64).reshape(len(rows), -1, 2)
+    return np.concatenate([boxes.min(axis=1), boxes.max(axis=1)], axis=1)
+
+
+def nms_rows(rows: List[dict], iou_threshold: float = TILE_NMS_IOU) -> List[dict]:
+    """
+    Drop seam duplicates: rows are kept greedily, uncut words first, then by
+    confidence and size; a row overlapping a kept row by ``iou_threshold`` or
+    lying mostly inside it is dropped.
+    """
+    if len(rows) < 2:
+        return list(rows)
+    rects = _rects(rows)
+    areas = np.maximum(rects[:, 2] - rects[:, 0], 0) * np.maximum(rects[:, 3] - rects[:, 1], 0)
+    order = sorted(
+        range(len(rows)),
+        key=lambda i: (not rows[i].get("_cut", False), rows[i].get("confidence") or 0.0, areas[i]),
+        reverse=True,
+    )
+    kept = []
+    suppressed = np.zeros(len(rows), dtype=bool)
+    for i in order:
+        if suppressed[i]:
+            continue
+        kept.append(i)
+        x0 = np.maximum(rects[i, 0], rects[:, 0])
+        y0 = np.maximum(rects[i, 1], rects[:, 1])
+        x1 = np.minimum(rects[i, 2], rects[:, 2])
+        y1 = np.minimum(rects[i, 3], rects[:, 3])
+        inter = np.maximum(x1 - x0, 0) * np.maximum(y1 - y0, 0)
+        union = areas[i] + areas - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        covered = np.divide(inter, areas, out=np.zeros_like(inter), where=areas > 0)
+        suppressed |= (iou >= iou_threshold) | (covered >= CONTAINMENT)
+    return [rows[i] for i in sorted(kept)]
+
+
+def _shift_rows(rows, tile, height, width):
+    """Move tile rows into page coordinates and flag boxes touching an inner tile edge."""
+    x0, y0, x1, y1 = tile
+    inner = (x0 > 0, y0 > 0, x1 < width, y1 < height)
+    shifted = []
+    for row in rows:
+        quad = (np.asarray(row["bbox"], dtype=np.float64).reshape(-1, 2) + (x0, y0))
+        bx0, by0 = quad.min(axis=0)
+        bx1, by1 = quad.max(axis=0)
+        cut = (
+            (inner[0] and bx0 <= x0 + EDGE_MARGIN) or (inner[1] and by0 <= y0 + EDGE_MARGIN)
+            or (inner[2] and bx1 >= x1 - EDGE_MARGIN) or (inner[3] and by1 >= y1 - EDGE_MARGIN)
+        )
+        shifted.append({**row, "bbox": quad.tolist(), "_cut": bool(cut)})
+    return shifted
+
+
+def reading_order(rows: List[dict], line_tolerance: float = 10.0) -> List[dict]:
+    rects = _rects(rows)
+    order = sorted(range(len(rows)), key=lambda i: (round(rects[i, 1] / line_tolerance), rects[i, 0]))
+    return [rows[i] for i in order]
+
+
+def ocr_tiled(
+    image: np.ndarray,
+    recognize: Optional[Callable[[np.ndarray], List[dict]]] = None,
+    tile_size: int = TILE_SIZE,
+    overlap: int = TILE_OVERLAP,
+    recognize_batch: Optional[Callable[[List[np.ndarray]], List[List[dict]]]] = None,
+) -> Tuple[List[dict], dict]:
+    """
+    Run ``recognize(tile) -> rows`` (``{"text", "confidence", "bbox"}`` in tile
+    coordinates) over overlapping tiles in parallel, or ``recognize_batch(tiles)
+    -> rows per tile`` once over all of them, and merge the rows into page
+    coordinates. Returns (rows in reading order, tiling report).
+    """
+    height, width = image.shape[:2]
+    tiles = tile_grid(height, width, tile_size, overlap)
+
+    def crop(tile):
+        x0, y0, x1, y1 = tile
+        return np.ascontiguousarray(image[y0:y1, x0:x1])
+
+    if recognize_batch is not None:
+        tile_rows = recognize_batch([crop(tile) for tile in tiles])
+        rows = [row for tile, found in zip(tiles, tile_rows) for row in _shift_rows(found, tile, height, width)]
+    else:
+        def run(tile):
+            return _shift_rows(recognize(crop(tile)), tile, height, width)
+
+        # Each tile runs in a copy of the caller's context so its spans reach the request
+        futures = [_TILE_POOL.submit(contextvars.copy_context().run, run, tile) for tile in tiles]
+        rows = [row for future in futures for row in future.result()]
+    with span("tile_merge"):
+        merged = nms_rows(rows)
+        for row in merged:
+            row.pop("_cut", None)
+        merged = reading_order(merged)
+    report = {
+        "tiles": len(tiles),
+        "tile_size": tile_size,
+        "overlap": overlap,
+        "boxes": len(rows),
+        "duplicates_removed": len(rows) - len(merged),
+    }
+    return merged, report
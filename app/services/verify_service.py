@@ -0,0 +1,119 @@
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+from app.services.deadlines import check_cancelled
+from app.services.field_matcher import FieldIndex
+from app.services.ocr_service import iter_image_units, iter_pdf_units, iter_video_units
+
+# -------------------------------------------------------------
+# Early-terminating field verification
+# -------------------------------------------------------------
+# Verification only needs to know whether (and where) each requested field
+# occurs, so instead of OCR'ing the whole upload first, pages/frames are
+# checked as they are recognized and processing stops once every field has
+# been found or the budget is spent. Each unit is indexed once and all
+# missing fields are fuzzy-matched against it in one pass (field_matcher).
+#
+#   OCR_VERIFY_MAX_UNITS   max pages/frames to recognize (0 = no limit)
+#   OCR_VERIFY_MAX_MS      wall-clock budget in milliseconds (0 = no limit)
+
+VERIFY_MAX_UNITS = int(os.getenv("OCR_VERIFY_MAX_UNITS", "0"))
+VERIFY_MAX_MS = float(os.getenv("OCR_VERIFY_MAX_MS", "0"))
+
+
+def units_from_results(results):
+    """Group already computed OCR rows (e.g. a cached /ocr/ result) into units."""
+    units = {}
+    for row in results:
+        if "page" in row:
+            key = ("page", row["page"])
+        elif "frame" in row:
+            key = ("frame", row["frame"])
+        else:
+            key = ("image", 1)
+        units.setdefault(key, []).append(row)
+    for (unit, index), rows in units.items():
+        yield {"unit": unit, "index": index, "rows": rows}
+
+
+def verify_units(units: Iterable[dict], fields: Dict[str, str], kinds: Optional[Dict[str, str]] = None,
+                 max_units: Optional[int] = None, max_ms: Optional[float] = None):
+    """
+    Check ``fields`` (name -> expected value, matched as ``kinds[name]``:
+    text/id/date) against each unit as it arrives.
+    Stops when every field is found, ``max_units``/``max_ms`` is spent or the
+    request's deadline passes (``stopped="deadline"``), and closes ``units``
+    so no further input is decoded or recognized.
+    """
+    start = time.monotonic()
+    max_units = VERIFY_MAX_UNITS if max_units is None else max_units
+    max_ms = VERIFY_MAX_MS if max_ms is None else max_ms
+    matches = {name: {"found": False, "score": 0.0} for name in fields}
+    pending = {name: value for name, value in fields.items() if value and value.strip()}
+    texts = []
+    errors = []
+    processed = 0
+    stopped = "all_found" if not pending else "exhausted"
+
+    try:
+        for unit in (units if pending else ()):
+            processed += 1
+            if unit.get("error"):
+                errors.append({"unit": unit["unit"], "index": unit["index"], "error": unit["error"]})
+            index = FieldIndex.from_rows(unit["rows"])
+            texts.append(index.text.strip().lower())
+            for name, match in index.match(pending, kinds=kinds).items():
+                if match["found"]:
+                    matches[name] = {"found": True, "unit": unit["unit"], "index": unit["index"],
+                                     "score": match["score"], "span": match["span"]}
+                    del pending[name]
+                elif match["score"] > matches[name]["score"]:
+                    # Closest miss so far, useful when tuning OCR_MATCH_MIN_SCORE
+                    matches[name]["score"] = match["score"]
+            if not pending:
+                stopped = "all_found"
+                break
+            if max_units and processed >= max_units:
+                stopped = "max_units"
+                break
+            if max_ms and (time.monotonic() - start) * 1000 >= max_ms:
+                stopped = "max_ms"
+                break
+            if check_cancelled(unit["unit"]):
+                stopped = "deadline"
+                break
+    finally:
+        close = getattr(units, "close", None)
+        if close is not None:
+            close()
+
+    result = {
+        "matches": matches,
+        "full_text": " ".join(t for t in texts if t),
+        "units_processed": processed,
+        "stopped": stopped,
+        "time_taken": round(time.monotonic() - start, 4),
+    }
+    if errors:
+        # Pages that could not be read; a field "not found" there is not a mismatch
+        result["errors"] = errors
+    return result
+
+
+def verify_upload(source, kind: str, fields: Dict[str, str], kinds: Optional[Dict[str, str]] = None,
+                  languages=['en'], frame_skip: int = 10,
+                  max_units: Optional[int] = None, max_ms: Optional[float] = None):
+    """
+    Stream ``source`` (image bytes, PDF bytes or a video path) through EasyOCR
+    and verify ``fields`` against it, stopping early.
+    """
+    if kind == "image":
+        units = iter_image_units(source, languages)
+    elif kind == "pdf":
+        units = iter_pdf_units(source, languages)
+    elif kind == "video":
+        units = iter_video_units(source, languages, frame_skip=frame_skip)
+    else:
+        raise ValueError(f"Unsupported input kind: {kind}")
+    return verify_units(units, fields, kinds=kinds, max_units=max_units, max_ms=max_ms)
@@ -0,0 +1,82 @@
+"""
+Throughput vs latency of micro-batched engine inference.
+
+Fires ``--requests`` single-image calls from ``--concurrency`` threads through
+a MicroBatcher for each batching window and reports throughput and latency
+percentiles. Window 0 is the unbatched baseline.
+
+    python -m benchmarks.batching --engine paddleocr --windows 0,5,10,20
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from app.services.batcher import MicroBatcher
+from benchmarks.report import percentile
+
+
+def synthetic_image(width=640, height=200):
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.putText(img, "NAME: RAHUL KUMAR", (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (0, 0, 0), 2, cv2.LINE_AA)
+    cv2.putText(img, "ABCPK1234F", (20, 150), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (0, 0, 0), 2, cv2.LINE_AA)
+    return img
+
+
+def engine_target(engine):
+    """Return (batch function, batch key, input image) for an engine."""
+    img = synthetic_image()
+    if engine == "paddleocr":
+        from app.services.paddleocr_service import _predict_batch, get_paddle_ocr
+        return _predict_batch, get_paddle_ocr("en"), img
+    from app.services.ocr_service import _readtext_batch, get_easyocr_reader
+    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return _readtext_batch, (get_easyocr_reader(["en"]), rgb.shape), rgb
+
+
+def run(engine, windows, max_batch, concurrency, requests):
+    run_batch, key, img = engine_target(engine)
+    run_batch(key, [img])  # warm up the model
+    report = []
+    for window in windows:
+        batcher = MicroBatcher(f"bench-{engine}-{window}", run_batch, window_ms=window, max_batch_size=max_batch)
+
+        def call(_):
+            t0 = time.perf_counter()
+            batcher(key, img)
+            return (time.perf_counter() - t0) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = sorted(pool.map(call, range(requests)))
+        elapsed = time.perf_counter() - start
+        report.append({
+            "window_ms": window,
+            "throughput_rps": round(requests / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "avg_batch": batcher.stats()["avg_batch"],
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engine", choices=("paddleocr", "easyocr"), default="paddleocr")
+    parser.add_argument("--windows", default="0,5,10,20", help="comma-separated batching windows in ms")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=64)
+    args = parser.parse_args()
+
+    windows = [float(w) for w in args.windows.split(",") if w.strip()]
+    report = run(args.engine, windows, args.max_batch, args.concurrency, args.requests)
+    print(json.dumps({"engine": args.engine, "concurrency": args.concurrency, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Synthetic KYC-style benchmark corpus with ground truth.
+
+Generates PAN/Aadhaar/DL-like card images (clean and degraded), multi-page
+scanned PDFs (no text layer, so they take the OCR path), one PDF with an
+embedded text layer, and short videos of a card, all deterministic for a
+given seed. ``manifest.json`` records each file's kind, ground-truth lines
+and the fields /ocr/verify-ocr is checked against.
+
+    python -m benchmarks.corpus --out bench_corpus --seed 7
+"""
+import argparse
+import json
+import random
+import string
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services.document_ids import verhoeff_valid
+
+CARD_SIZE = (1012, 638)  # ID-1 card aspect ratio at ~300 DPI
+FIRST_NAMES = ("RAHUL", "PRIYA", "AMIT", "SNEHA", "VIKRAM", "ANJALI", "ROHAN", "KAVYA")
+LAST_NAMES = ("KUMAR", "SHARMA", "PATEL", "SINGH", "IYER", "REDDY", "SONTAKKE", "GUPTA")
+DL_STATES = ("MH", "KA", "DL", "TN", "GJ", "UP")
+
+
+def _font(size):
+    return ImageFont.load_default(size=size)
+
+
+def random_pan(rng):
+    letters = "".join(rng.choice(string.ascii_uppercase) for _ in range(3))
+    return f"{letters}P{rng.choice(string.ascii_uppercase)}{rng.randint(1, 9999):04d}{rng.choice(string.ascii_uppercase)}"
+
+
+def random_aadhaar(rng):
+    body = str(rng.randint(2, 9)) + "".join(str(rng.randint(0, 9)) for _ in range(10))
+    check = next(d for d in "0123456789" if verhoeff_valid(body + d))
+    number = body + check
+    return f"{number[:4]} {number[4:8]} {number[8:]}"
+
+
+def random_dl(rng):
+    return f"{rng.choice(DL_STATES)}{rng.randint(1, 50):02d} {rng.randint(2005, 2022)}{rng.randint(1, 9999999):07d}"
+
+
+def random_person(rng):
+    return {
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "father": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "dob": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1960, 2004)}",
+    }
+
+
+def card_lines(doc_type, person, rng):
+    """Ground-truth lines and the document number of one card."""
+    if doc_type == "PAN":
+        number = random_pan(rng)
+        lines = ["INCOME TAX DEPARTMENT", "GOVT OF INDIA", person["name"], person["father"], person["dob"],
+                 "Permanent Account Number", number]
+    elif doc_type == "Aadhaar":
+        number = random_aadhaar(rng)
+        lines = ["GOVERNMENT OF INDIA", person["name"], f"DOB: {person['dob']}", "MALE", number,
+                 "Aadhaar - Aam Aadmi ka Adhikar"]
+    else:
+        number = random_dl(rng)
+        lines = ["INDIAN UNION DRIVING LICENCE", f"DL No: {number}", f"Name: {person['name']}",
+                 f"S/D/W of: {person['father']}", f"DOB: {person['dob']}"]
+    return lines, number
+
+
+def render_card(lines, size=CARD_SIZE, font_size=34):
+    """White card with black text lines; returns a BGR ndarray."""
+    img = Image.new("RGB", size, (250, 250, 245))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([8, 8, size[0] - 9, size[1] - 9], outline=(40, 40, 120), width=4)
+    font = _font(font_size)
+    y = 40
+    step = min(int(font_size * 1.6), (size[1] - 60) // max(1, len(lines)))
+    for line in lines:
+        draw.text((48, y), line, fill=(10, 10, 10), font=font)
+        y += step
+    return cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+
+
+def degrade(img, rng, angle=2.5, noise=8.0, blur=True):
+    """Scan-like degradation: small rotation, sensor noise, blur and a resize."""
+    h, w = img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), rng.uniform(-angle, angle), 1.0)
+    out = cv2.warpAffine(img, matrix, (w, h), borderValue=(235, 235, 235))
+    if blur:
+        out = cv2.GaussianBlur(out, (3, 3), 0)
+    noise_img = np.random.default_rng(rng.randint(0, 2**31)).normal(0, noise, out.shape)
+    out = np.clip(out.astype(np.float32) + noise_img, 0, 255).astype(np.uint8)
+    scale = rng.uniform(0.6, 0.85)
+    return cv2.resize(out, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def write_scanned_pdf(path, page_images):
+    pages = [Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)) for img in page_images]
+    pages[0].save(path, "PDF", resolution=300.0, save_all=True, append_images=pages[1:])
+
+
+def write_text_pdf(path, pages_lines):
+    import fitz
+
+    doc = fitz.open()
+    for lines in pages_lines:
+        page = doc.new_page(width=595, height=842)
+        for i, line in enumerate(lines):
+            page.insert_text((60, 80 + i * 24), line, fontsize=14)
+    doc.save(path)
+    doc.close()
+
+
+def write_video(path, img, seconds=3, fps=10):
+    """A card drifting across a grey background; returns the written path."""
+    h, w = img.shape[:2]
+    frame_w, frame_h = w + 160, h + 120
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (frame_w, frame_h))
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV cannot write {path}")
+    try:
+        for i in range(seconds * fps):
+            frame = np.full((frame_h, frame_w, 3), 90, dtype=np.uint8)
+            x = 20 + int(120 * i / max(1, seconds * fps - 1))
+            frame[60:60 + h, x:x + w] = img
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def build_corpus(out_dir, seed=7, images=6, pdf_pages=3, videos=1):
+    """Generate the corpus in ``out_dir`` and return its manifest."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    items = []
+
+    def add(item_id, kind, path, lines, person, number, doc_type, **extra):
+        items.append({
+            "id": item_id,
+            "kind": kind,
+            "path": path.name,
+            "doc_type": doc_type,
+            "lines": lines,
+            "text": " ".join(lines),
+            "fields": {"name": person["name"], "dob": person["dob"], "Pan": number},
+            **extra,
+        })
+
+    doc_types = ("PAN", "Aadhaar", "DL")
+    for i in range(images):
+        doc_type = doc_types[i % len(doc_types)]
+        person = random_person(rng)
+        lines, number = card_lines(doc_type, person, rng)
+        img = render_card(lines)
+        degraded = i % 2 == 1
+        if degraded:
+            img = degrade(img, rng)
+        path = out_dir / f"card_{i:02d}_{doc_type.lower()}.png"
+        cv2.imwrite(str(path), img)
+        add(path.stem, "image", path, lines, person, number, doc_type, degraded=degraded)
+
+    person = random_person(rng)
+    page_lines, page_images = [], []
+    for p in range(pdf_pages):
+        lines, number = card_lines(doc_types[p % len(doc_types)], person, rng)
+        page_lines.append(lines)
+        page_images.append(render_card(lines, size=(1240, 1754), font_size=40))
+    scanned = out_dir / "scanned.pdf"
+    write_scanned_pdf(scanned, page_images)
+    add(scanned.stem, "pdf", scanned, [line for lines in page_lines for line in lines], person, number,
+        "PDF", pages=pdf_pages, text_layer=False, page_lines=page_lines)
+
+    text_pdf = out_dir / "text_layer.pdf"
+    write_text_pdf(text_pdf, page_lines)
+    add(text_pdf.stem, "pdf", text_pdf, [line for lines in page_lines for line in lines], person, number,
+        "PDF", pages=pdf_pages, text_layer=True, page_lines=page_lines)
+
+    for v in range(videos):
+        person = random_person(rng)
+        lines, number = card_lines("PAN", person, rng)
+        path = write_video(out_dir / f"video_{v:02d}.mp4", render_card(lines, size=(640, 400), font_size=24))
+        add(path.stem, "video", path, lines, person, number, "PAN")
+
+    manifest = {"seed": seed, "items": items}
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def load_corpus(out_dir, seed=7, rebuild=False):
+    """Manifest of the corpus in ``out_dir`` (built first if missing); paths are made absolute."""
+    out_dir = Path(out_dir)
+    manifest_path = out_dir / "manifest.json"
+    if rebuild or not manifest_path.exists():
+        manifest = build_corpus(out_dir, seed=seed)
+    else:
+        manifest = json.loads(manifest_path.read_text())
+    for item in manifest["items"]:
+        item["path"] = str(out_dir / Path(item["path"]).name)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default="bench_corpus")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--images", type=int, default=6)
+    parser.add_argument("--pdf-pages", type=int, default=3)
+    parser.add_argument("--videos", type=int, default=1)
+    args = parser.parse_args()
+
+    manifest = build_corpus(args.out, args.seed, args.images, args.pdf_pages, args.videos)
+    print(json.dumps({"out": args.out, "items": {i["id"]: i["kind"] for i in manifest["items"]}}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
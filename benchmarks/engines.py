@@ -0,0 +1,111 @@
+"""
+Engine-level microbenchmarks: EasyOCR, PaddleOCR and tesseract_best_ocr.
+
+Each engine reads every corpus image (and every page of the scanned PDF)
+``--repeat`` times after a warm-up call, straight through the engine
+adapters (no HTTP, no pools, no result cache). Reports latency percentiles,
+model load time, peak RSS and character error rate against ground truth.
+
+    python -m benchmarks.engines --engines easyocr,paddleocr,tesseract --repeat 3
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from app.services.engines import get_engine
+from benchmarks.corpus import load_corpus
+from benchmarks.report import cer, latency_summary, peak_rss_mb, reset_peak_rss, save_baseline
+
+ENGINES = ("easyocr", "paddleocr", "tesseract")
+# tesseract_best_ocr's variant x PSM search, as /tesseract/tes runs it
+ENGINE_MODES = {"tesseract": "search"}
+
+
+def corpus_samples(manifest, pdf_dpi=200):
+    """(sample id, BGR image, ground-truth text) for every image and scanned PDF page."""
+    import fitz
+
+    samples = []
+    for item in manifest["items"]:
+        if item["kind"] == "image":
+            samples.append((item["id"], cv2.imread(item["path"]), item["text"]))
+        elif item["kind"] == "pdf" and not item.get("text_layer"):
+            with fitz.open(item["path"]) as doc:
+                for page_no, (page, lines) in enumerate(zip(doc, item["page_lines"]), 1):
+                    pix = page.get_pixmap(dpi=pdf_dpi)
+                    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+                    img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR if pix.n == 3 else cv2.COLOR_RGBA2BGR)
+                    samples.append((f"{item['id']}#p{page_no}", img, " ".join(lines)))
+    return samples
+
+
+def reading_order_text(rows):
+    rows = sorted(rows, key=lambda row: (round(row["bbox"][0][1] / 10), row["bbox"][0][0]))
+    return " ".join(row["text"] for row in rows if row["text"])
+
+
+def bench_engine(name, samples, repeat):
+    reset_peak_rss()
+    engine = get_engine(name, ENGINE_MODES.get(name))
+    t0 = time.perf_counter()
+    try:
+        engine.recognize(samples[0][1])  # loads and warms the model
+    except (ImportError, OSError) as e:  # engine package / tesseract binary missing
+        return {"name": name, "status": "unavailable", "error": str(e)}
+    warmup_s = time.perf_counter() - t0
+
+    latencies = []
+    per_sample = []
+    start = time.perf_counter()
+    for sample_id, img, truth in samples:
+        sample_latencies = []
+        text = ""
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            text = reading_order_text(engine.recognize(img)["rows"])
+            sample_latencies.append((time.perf_counter() - t0) * 1000)
+        latencies.extend(sample_latencies)
+        per_sample.append({
+            "name": sample_id,
+            "shape": list(img.shape[:2]),
+            "p50_ms": latency_summary(sample_latencies)["p50_ms"],
+            "cer": cer(truth, text),
+        })
+    elapsed = time.perf_counter() - start
+
+    return {
+        "name": name,
+        "status": "ok",
+        "warmup_s": round(warmup_s, 2),
+        **latency_summary(latencies, elapsed),
+        "cer": round(sum(s["cer"] for s in per_sample) / len(per_sample), 4),
+        "peak_rss_mb": peak_rss_mb(),
+        "samples": per_sample,
+    }
+
+
+def run(engines, corpus_dir="bench_corpus", repeat=3):
+    samples = corpus_samples(load_corpus(corpus_dir))
+    return [bench_engine(name, samples, repeat) for name in engines]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engines", default=",".join(ENGINES))
+    parser.add_argument("--corpus", default="bench_corpus")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="write the report as a JSON baseline to this path")
+    args = parser.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    report = {"engines": run(engines, args.corpus, args.repeat)}
+    if args.save:
+        save_baseline(report, args.save)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+In-process load test of the FastAPI app with concurrency sweeps.
+
+Drives the real ASGI app (lifespan included) through httpx's ASGITransport,
+so routing, upload parsing, the engine pools, batchers and serialization are
+all measured without a server or network in the way. For every scenario and
+concurrency level it fires ``--requests`` uploads and reports latency
+percentiles, throughput, status codes, peak RSS and CER of the returned text
+(verify-ocr: share of fields found). A full engine pool rejects with 429 and
+Retry-After (reported as ``busy_rate``, also counted in ``error_rate``); 503
+only comes from a pool that is shutting down.
+
+Uploads are made byte-unique per request so the result cache does not turn
+the sweep into a cache benchmark; ``--cache-hits`` sends identical bytes
+instead. Scenarios whose engine is disabled (OCR_ENGINES) are skipped.
+
+    OCR_ENGINES=easyocr,tesseract python -m benchmarks.load --concurrency 1,4,8 --requests 16
+"""
+import argparse
+import asyncio
+import json
+import struct
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks.corpus import load_corpus
+from benchmarks.report import cer, latency_summary, peak_rss_mb, reset_peak_rss, save_baseline
+
+# name -> (route name, corpus selector, verify: send the item's fields as the form)
+SCENARIOS = {
+    "ocr-image": ("Perform OCR (Image or Video)", "image", False),
+    "ocr-pdf": ("Perform OCR (Image or Video)", "pdf-scanned", False),
+    "ocr-pdf-text": ("Perform OCR (Image or Video)", "pdf-text", False),
+    "ocr-video": ("Perform OCR (Image or Video)", "video", False),
+    "verify-image": ("Perform OCR and Verify Name/DOB", "image", True),
+    "tesseract-image": ("Perform Tesseract OCR (Best Variant)", "image", False),
+    "paddle-image": ("PaddleOCR Fast Predict", "image", False),
+    "paddle-pdf": ("PaddleOCR PDF Predict and Annotate", "pdf-scanned", False),
+}
+DEFAULT_SCENARIOS = ("ocr-image", "ocr-pdf", "ocr-pdf-text", "verify-image", "tesseract-image", "paddle-image")
+MIME_TYPES = {".png": "image/png", ".pdf": "application/pdf", ".mp4": "video/mp4"}
+
+
+def select_items(manifest, selector):
+    items = manifest["items"]
+    if selector == "pdf-scanned":
+        return [i for i in items if i["kind"] == "pdf" and not i.get("text_layer")]
+    if selector == "pdf-text":
+        return [i for i in items if i["kind"] == "pdf" and i.get("text_layer")]
+    return [i for i in items if i["kind"] == selector]
+
+
+def unique_bytes(data, suffix, seq):
+    """Same content, different bytes: defeats the content-addressed result cache."""
+    if suffix == ".png":
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        img[0, 0] = (seq & 0xFF, (seq >> 8) & 0xFF, (seq >> 16) & 0xFF)
+        return cv2.imencode(".png", img)[1].tobytes()
+    if suffix == ".pdf":
+        return data + f"\n%bench-{seq}\n".encode()
+    if suffix == ".mp4":
+        # Trailing "free" box, ignored by MP4 demuxers
+        payload = f"bench-{seq}".encode()
+        return data + struct.pack(">I", 8 + len(payload)) + b"free" + payload
+    return data + seq.to_bytes(8, "little")
+
+
+def response_text(body):
+    if not isinstance(body, dict):
+        return ""
+    for key in ("full_text", "raw_text", "text"):
+        if isinstance(body.get(key), str):
+            return body[key]
+    pages = body.get("pages")
+    if isinstance(pages, list):
+        return " ".join(page.get("raw_text", "") for page in pages if isinstance(page, dict))
+    return ""
+
+
+def build_requests(items, count, verify, cache_hits, first_seq=0):
+    requests = []
+    for seq in range(first_seq, first_seq + count):
+        item = items[seq % len(items)]
+        path = Path(item["path"])
+        data = path.read_bytes()
+        if not cache_hits:
+            data = unique_bytes(data, path.suffix, seq)
+        form = dict(item["fields"]) if verify else None
+        requests.append((item, path.name, MIME_TYPES.get(path.suffix, "application/octet-stream"), data, form))
+    return requests
+
+
+async def sweep_scenario(client, name, url, requests, concurrency, verify):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses, scores = [], {}, []
+
+    async def send(item, filename, mime, data, form):
+        async with semaphore:
+            t0 = time.perf_counter()
+            response = await client.post(url, files={"file": (filename, data, mime)}, data=form)
+            latency = (time.perf_counter() - t0) * 1000
+        latencies.append(latency)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code != 200:
+            return
+        body = response.json()
+        if verify:
+            found = [body.get(f"{field}_found") for field in item["fields"]]
+            scores.append(sum(bool(f) for f in found) / len(found))
+        else:
+            scores.append(cer(item["text"], response_text(body)))
+
+    reset_peak_rss()
+    start = time.perf_counter()
+    await asyncio.gather(*(send(*request) for request in requests))
+    elapsed = time.perf_counter() - start
+
+    errors = sum(count for status, count in statuses.items() if status != 200)
+    busy = statuses.get(429, 0)
+    result = {
+        "name": name,
+        "concurrency": concurrency,
+        "requests": len(requests),
+        "status_counts": {str(status): count for status, count in sorted(statuses.items())},
+        "error_rate": round(errors / len(requests), 4),
+        "busy_rate": round(busy / len(requests), 4),
+        **latency_summary(latencies, elapsed),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if scores:
+        result["found_rate" if verify else "cer"] = round(sum(scores) / len(scores), 4)
+    return result
+
+
+async def run(scenarios, concurrency_levels, requests, corpus_dir="bench_corpus", cache_hits=False):
+    import httpx
+    from starlette.routing import NoMatchFound
+
+    from app.main import app
+
+    manifest = load_corpus(corpus_dir)
+    results = []
+    seq = 0  # never reused, so no level is served from an earlier level's cache entries
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in scenarios:
+                route_name, selector, verify = SCENARIOS[name]
+                try:
+                    url = app.url_path_for(route_name)
+                except NoMatchFound:
+                    results.append({"name": name, "status": "unavailable", "error": "engine disabled"})
+                    continue
+                items = select_items(manifest, selector)
+                if not items:
+                    results.append({"name": name, "status": "unavailable", "error": f"no {selector} in corpus"})
+                    continue
+                # Warm-up (model load, first-call allocations) is not measured
+                await sweep_scenario(client, name, url, build_requests(items, 1, verify, False), 1, verify)
+                for level in concurrency_levels:
+                    batch = build_requests(items, requests, verify, cache_hits, first_seq=seq)
+                    seq += requests
+                    results.append(await sweep_scenario(client, name, url, batch, level, verify))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS),
+                        help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=16, help="requests per scenario and level")
+    parser.add_argument("--corpus", default="bench_corpus")
+    parser.add_argument("--cache-hits", action="store_true", help="send identical bytes (measures cache hits)")
+    parser.add_argument("--save", help="write the report as a JSON baseline to this path")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    report = {"load": asyncio.run(run(scenarios, levels, args.requests, args.corpus, args.cache_hits))}
+    if args.save:
+        save_baseline(report, args.save)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
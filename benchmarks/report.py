@@ -0,0 +1,177 @@
+"""
+Shared measurement helpers and JSON baselines for the benchmark suite.
+
+Latency percentiles, throughput, peak RSS and character error rate (CER) are
+computed the same way by every benchmark. A saved baseline can be diffed
+against a later run to spot regressions:
+
+    python -m benchmarks.report bench_baselines/before.json bench_baselines/after.json --threshold 10
+"""
+import argparse
+import json
+import platform
+import re
+import resource
+import sys
+import time
+from pathlib import Path
+
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:  # pure-Python edit distance below
+    Levenshtein = None
+
+# Metrics where a higher value is worse; everything else numeric is ignored
+# by the diff unless listed in HIGHER_IS_BETTER.
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "mean_ms", "peak_rss_mb", "cer", "error_rate", "busy_rate")
+HIGHER_IS_BETTER = ("throughput_rps", "found_rate")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_summary(latencies_ms, elapsed_s=None):
+    """p50/p95/p99/mean of per-call latencies (ms), plus throughput when ``elapsed_s`` is given."""
+    values = sorted(latencies_ms)
+    summary = {
+        "calls": len(values),
+        "mean_ms": round(sum(values) / len(values), 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+    }
+    if elapsed_s:
+        summary["throughput_rps"] = round(len(values) / elapsed_s, 2)
+    return summary
+
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", (text or "").upper()).strip()
+
+
+def _edit_distance(a, b):
+    if Levenshtein is not None:
+        return Levenshtein.distance(a, b)
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def cer(reference, hypothesis):
+    """Character error rate of ``hypothesis`` against ``reference`` (case/whitespace-insensitive)."""
+    reference, hypothesis = normalize_text(reference), normalize_text(hypothesis)
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    return round(_edit_distance(reference, hypothesis) / len(reference), 4)
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS counter (Linux); a no-op elsewhere."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """Peak RSS of this process (since the last reset_peak_rss on Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB on Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def save_baseline(report, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"environment": environment(), **report}, indent=2))
+    return path
+
+
+def _flatten(node, prefix=""):
+    """{"a": {"b": [{"name": "x", "p50_ms": 1}]}} -> {"a.b.x.p50_ms": 1}"""
+    flat = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "environment":
+                continue
+            flat.update(_flatten(value, f"{prefix}{key}."))
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            label = i
+            if isinstance(value, dict):
+                label = next((value[k] for k in ("name", "concurrency", "window_ms") if k in value), i)
+                if "concurrency" in value and "name" in value:
+                    label = f"{value['name']}@{value['concurrency']}"
+            flat.update(_flatten(value, f"{prefix}{label}."))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        flat[prefix[:-1]] = node
+    return flat
+
+
+def compare(baseline, current, threshold_pct=10.0):
+    """
+    Metrics present in both reports that moved by more than ``threshold_pct``,
+    as {"regressions": [...], "improvements": [...]}.
+    """
+    base, new = _flatten(baseline), _flatten(current)
+    regressions, improvements = [], []
+    for key in sorted(base.keys() & new.keys()):
+        metric = key.rsplit(".", 1)[-1]
+        if metric in LOWER_IS_BETTER:
+            sign = 1
+        elif metric in HIGHER_IS_BETTER:
+            sign = -1
+        else:
+            continue
+        old_value, new_value = base[key], new[key]
+        if old_value == 0:
+            continue
+        change = (new_value - old_value) / abs(old_value) * 100.0
+        if abs(change) < threshold_pct:
+            continue
+        entry = {"metric": key, "baseline": old_value, "current": new_value, "change_pct": round(change, 1)}
+        (regressions if change * sign > 0 else improvements).append(entry)
+    return {"regressions": regressions, "improvements": improvements}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two benchmark baselines")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="minimum change to report, in percent")
+    args = parser.parse_args()
+
+    diff = compare(json.loads(Path(args.baseline).read_text()), json.loads(Path(args.current).read_text()),
+                   args.threshold)
+    print(json.dumps(diff, indent=2))
+    # Non-zero exit so CI can gate on regressions
+    sys.exit(1 if diff["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
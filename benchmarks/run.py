@@ -0,0 +1,67 @@
+"""
+Run the benchmark suites and save one JSON baseline.
+
+Suites: ``engines`` (engine microbenchmarks), ``load`` (in-process ASGI
+concurrency sweep), ``batching`` (micro-batching windows) and
+``tesseract_backend`` (per-call backend overhead). A suite whose engine is
+not installed is recorded as unavailable rather than failing the run.
+Compare two baselines with ``python -m benchmarks.report OLD NEW``.
+
+    python -m benchmarks.run --suites engines,load --save bench_baselines/main.json
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.corpus import load_corpus
+from benchmarks.report import save_baseline
+
+SUITES = ("engines", "load", "batching", "tesseract_backend")
+
+
+def run_suite(name, args):
+    if name == "engines":
+        from benchmarks import engines
+        return engines.run(engines.ENGINES, args.corpus, args.repeat)
+    if name == "load":
+        from benchmarks import load
+        levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+        return asyncio.run(load.run(load.DEFAULT_SCENARIOS, levels, args.requests, args.corpus))
+    if name == "batching":
+        from benchmarks import batching
+        return batching.run("paddleocr", [0.0, 5.0, 10.0, 20.0], 8, 8, 64)
+    if name == "tesseract_backend":
+        from benchmarks import tesseract_backend
+        return tesseract_backend.run(40)
+    raise ValueError(f"Unknown suite: {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suites", default=",".join(SUITES))
+    parser.add_argument("--corpus", default="bench_corpus")
+    parser.add_argument("--rebuild-corpus", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3, help="engines: reads per sample")
+    parser.add_argument("--concurrency", default="1,4,8", help="load: comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=16, help="load: requests per scenario and level")
+    parser.add_argument("--save", default=f"bench_baselines/{time.strftime('%Y%m%d-%H%M%S')}.json")
+    args = parser.parse_args()
+
+    load_corpus(args.corpus, rebuild=args.rebuild_corpus)
+    report = {}
+    for name in (s.strip() for s in args.suites.split(",") if s.strip()):
+        t0 = time.perf_counter()
+        try:
+            report[name] = run_suite(name, args)
+        except ImportError as e:
+            report[name] = {"status": "unavailable", "error": str(e)}
+        print(f"[Bench] {name} done in {time.perf_counter() - t0:.1f}s")
+
+    path = save_baseline(report, args.save)
+    print(json.dumps(report, indent=2))
+    print(f"[Bench] baseline saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Per-call overhead of the Tesseract backends.
+
+Runs the same synthetic text image through every available backend for each
+PSM used by tesseract_best_ocr and reports per-call latency. The difference
+between the subprocess and resident backends is the fork + temp-file +
+traineddata-load overhead removed per call.
+
+    python -m benchmarks.tesseract_backend --calls 40
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from app.services.tesseract_backend import create_backend
+from app.services.tesseract_service import PSM_MODES
+from benchmarks.report import latency_summary
+
+
+def synthetic_image(width=900, height=300):
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    lines = ["INCOME TAX DEPARTMENT", "NAME: RAHUL KUMAR", "DOB: 01/01/1990  ABCPK1234F"]
+    for i, line in enumerate(lines):
+        cv2.putText(img, line, (20, 70 + i * 80), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2, cv2.LINE_AA)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def bench_backend(name, img, calls):
+    backend = create_backend(name)
+    if backend.name != name:
+        return None
+    try:
+        backend.image_to_words(img, PSM_MODES[0])  # warm up
+        timings = []
+        for i in range(calls):
+            psm = PSM_MODES[i % len(PSM_MODES)]
+            t0 = time.perf_counter()
+            backend.image_to_words(img, psm)
+            timings.append((time.perf_counter() - t0) * 1000)
+    finally:
+        backend.close()
+    return latency_summary(timings)
+
+
+def run(calls):
+    img = synthetic_image()
+    report = {}
+    for name in ("subprocess", "tesserocr"):
+        result = bench_backend(name, img, calls)
+        report[name] = result if result is not None else "unavailable"
+
+    sub, res = report.get("subprocess"), report.get("tesserocr")
+    if isinstance(sub, dict) and isinstance(res, dict):
+        report["overhead_removed_ms_per_call"] = round(sub["mean_ms"] - res["mean_ms"], 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=40)
+    args = parser.parse_args()
+    print(json.dumps(run(args.calls), indent=2))
+
+
+if __name__ == "__main__":
+    main()